@@ -6,6 +6,8 @@ from .views import transfers
 from .views import games
 from .views import players
 from .views import clubs
+from . import db
+from . import reference_data
 
 load_dotenv()
 
@@ -18,11 +20,15 @@ def create_app():
     except OSError:
         pass
 
+    db.init_app(app)
 
     app.register_blueprint(main.bp)
     app.register_blueprint(transfers.transfers_bp)
     app.register_blueprint(games.games_bp)    
     app.register_blueprint(players.players_bp)
     app.register_blueprint(clubs.clubs_bp)
+
+    # dropdown / filter lists are served from memory from the first request on
+    reference_data.preload(app)
     
     return app
\ No newline at end of file
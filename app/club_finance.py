@@ -0,0 +1,188 @@
+"""
+Club finance summary tables, kept up to date with every transfer write.
+
+    ClubFinance        per club name (as written in Transfers.to/from_club_name):
+                       spent / earned (fees > 0), paid_in / paid_out (transfers with
+                       a fee), transfers_in / transfers_out (all transfers)
+    ClubSeasonFinance  per club id and transfer season: spent, earned, transfers_in,
+                       transfers_out (a transfer to the same club only counts as in)
+
+The write views call apply_transfers() in the same transaction as their change:
+-1 for the old rows before an UPDATE/DELETE (while they can still be read), +1 for
+the new ones after an INSERT/UPDATE. The loader calls rebuild() after a load.
+transfer_stats and club_details then read a few indexed rows instead of
+aggregating Transfers.
+
+Without the tables (migration 0003 not applied) the writes skip the summaries and
+the readers return None, so the views fall back to aggregating Transfers.
+"""
+from mysql.connector import Error, errorcode
+
+CLUB_FINANCE_SQL = """
+    CREATE TABLE IF NOT EXISTS ClubFinance (
+        club_name VARCHAR(100) NOT NULL PRIMARY KEY,
+        spent DOUBLE NOT NULL DEFAULT 0,
+        earned DOUBLE NOT NULL DEFAULT 0,
+        paid_in INT NOT NULL DEFAULT 0,
+        paid_out INT NOT NULL DEFAULT 0,
+        transfers_in INT NOT NULL DEFAULT 0,
+        transfers_out INT NOT NULL DEFAULT 0,
+        KEY idx_club_finance_spent (spent)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+CLUB_SEASON_FINANCE_SQL = """
+    CREATE TABLE IF NOT EXISTS ClubSeasonFinance (
+        club_id INT NOT NULL,
+        season VARCHAR(50) NOT NULL,
+        spent DOUBLE NOT NULL DEFAULT 0,
+        earned DOUBLE NOT NULL DEFAULT 0,
+        transfers_in INT NOT NULL DEFAULT 0,
+        transfers_out INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (club_id, season)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# The transfers matching {where} (twice: in side, out side) aggregated per club name / club season.
+# %s before the SUMs is the sign: 1 adds the transfers, -1 takes them out again.
+_CLUB_FINANCE_UPSERT = """
+    INSERT INTO ClubFinance (club_name, spent, earned, paid_in, paid_out, transfers_in, transfers_out)
+    SELECT f_name, %s * SUM(f_spent), %s * SUM(f_earned), %s * SUM(f_paid_in), %s * SUM(f_paid_out),
+           %s * SUM(f_in), %s * SUM(f_out)
+    FROM (
+        SELECT to_club_name AS f_name, IF(transfer_fee > 0, transfer_fee, 0) AS f_spent, 0 AS f_earned,
+               IF(transfer_fee > 0, 1, 0) AS f_paid_in, 0 AS f_paid_out, 1 AS f_in, 0 AS f_out
+        FROM Transfers WHERE to_club_name IS NOT NULL AND ({where})
+        UNION ALL
+        SELECT from_club_name, 0, IF(transfer_fee > 0, transfer_fee, 0),
+               0, IF(transfer_fee > 0, 1, 0), 0, 1
+        FROM Transfers WHERE from_club_name IS NOT NULL AND ({where})
+    ) changes
+    GROUP BY f_name
+    ON DUPLICATE KEY UPDATE
+        spent = spent + VALUES(spent), earned = earned + VALUES(earned),
+        paid_in = paid_in + VALUES(paid_in), paid_out = paid_out + VALUES(paid_out),
+        transfers_in = transfers_in + VALUES(transfers_in), transfers_out = transfers_out + VALUES(transfers_out)
+"""
+
+_CLUB_SEASON_FINANCE_UPSERT = """
+    INSERT INTO ClubSeasonFinance (club_id, season, spent, earned, transfers_in, transfers_out)
+    SELECT f_club, f_season, %s * SUM(f_spent), %s * SUM(f_earned), %s * SUM(f_in), %s * SUM(f_out)
+    FROM (
+        SELECT to_club_id AS f_club, transfer_season AS f_season,
+               IF(transfer_fee > 0, transfer_fee, 0) AS f_spent, 0 AS f_earned, 1 AS f_in, 0 AS f_out
+        FROM Transfers WHERE to_club_id IS NOT NULL AND ({where})
+        UNION ALL
+        SELECT from_club_id, transfer_season, 0, IF(transfer_fee > 0, transfer_fee, 0), 0, 1
+        FROM Transfers
+        WHERE from_club_id IS NOT NULL AND (to_club_id IS NULL OR to_club_id <> from_club_id) AND ({where})
+    ) changes
+    GROUP BY f_club, f_season
+    ON DUPLICATE KEY UPDATE
+        spent = spent + VALUES(spent), earned = earned + VALUES(earned),
+        transfers_in = transfers_in + VALUES(transfers_in), transfers_out = transfers_out + VALUES(transfers_out)
+"""
+
+_CLUB_FINANCE_CLEANUP = """
+    DELETE FROM ClubFinance
+    WHERE transfers_in <= 0 AND transfers_out <= 0
+      AND club_name IN (
+          SELECT to_club_name FROM Transfers WHERE ({where})
+          UNION SELECT from_club_name FROM Transfers WHERE ({where})
+      )
+"""
+
+_CLUB_SEASON_FINANCE_CLEANUP = """
+    DELETE FROM ClubSeasonFinance
+    WHERE transfers_in <= 0 AND transfers_out <= 0
+      AND (club_id, season) IN (
+          SELECT to_club_id, transfer_season FROM Transfers WHERE ({where})
+          UNION SELECT from_club_id, transfer_season FROM Transfers WHERE ({where})
+      )
+"""
+
+
+def _missing_table(e):
+    return getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE
+
+
+def apply_transfers(cursor, where, params, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) the Transfers rows matching where (SQL over the
+    Transfers columns, e.g. "transfer_id = %s") to/from both summaries. Does not commit.
+    """
+    params = tuple(params)
+    try:
+        cursor.execute(_CLUB_FINANCE_UPSERT.format(where=where), (sign,) * 6 + params * 2)
+        cursor.execute(_CLUB_SEASON_FINANCE_UPSERT.format(where=where), (sign,) * 4 + params * 2)
+        if sign < 0:
+            # the touched clubs / seasons that have no transfer left
+            cursor.execute(_CLUB_FINANCE_CLEANUP.format(where=where), params * 2)
+            cursor.execute(_CLUB_SEASON_FINANCE_CLEANUP.format(where=where), params * 2)
+    except Error as e:
+        if not _missing_table(e):
+            raise
+        print(f"Club finance summaries not updated (run migrate.py apply): {e}")
+
+
+def forget_club(cursor, club_id):
+    """A deleted club: its transfers keep their names but lose the club id (ON DELETE SET NULL)."""
+    try:
+        cursor.execute("DELETE FROM ClubSeasonFinance WHERE club_id = %s", (club_id,))
+    except Error as e:
+        if not _missing_table(e):
+            raise
+
+
+def rebuild(cursor):
+    """Recomputes both summaries from Transfers (creates them if needed). Does not commit."""
+    cursor.execute(CLUB_FINANCE_SQL)
+    cursor.execute(CLUB_SEASON_FINANCE_SQL)
+    cursor.execute("DELETE FROM ClubFinance")
+    cursor.execute("DELETE FROM ClubSeasonFinance")
+    apply_transfers(cursor, "1 = 1", ())
+
+
+def _fetch(cursor, query, params=()):
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    except Error as e:
+        if not _missing_table(e):
+            raise
+        return None
+
+
+def top_spenders(cursor, limit=10):
+    """Clubs by total paid fees (same rows as GROUP BY to_club_name over fees > 0), None without the table."""
+    return _fetch(cursor, """
+        SELECT club_name AS to_club_name, spent AS total_spent, paid_in AS transfer_count
+        FROM ClubFinance
+        WHERE paid_in > 0
+        ORDER BY spent DESC
+        LIMIT %s
+    """, (limit,))
+
+
+def high_rollers(cursor, share=0.2, limit=5):
+    """Clubs that spent more than share * the average club spending, None without the table."""
+    return _fetch(cursor, """
+        SELECT club_name AS to_club_name, spent AS total_spent, paid_in AS transfer_count
+        FROM ClubFinance
+        WHERE paid_in > 0
+          AND spent > (SELECT AVG(spent) * %s FROM ClubFinance WHERE paid_in > 0)
+        ORDER BY spent DESC
+        LIMIT %s
+    """, (share, limit))
+
+
+def season_totals(cursor, club_id):
+    """{season: row} of a club's ClubSeasonFinance rows, None without the table."""
+    rows = _fetch(cursor, """
+        SELECT season, spent, earned, transfers_in, transfers_out
+        FROM ClubSeasonFinance
+        WHERE club_id = %s
+    """, (club_id,))
+    if rows is None:
+        return None
+    return {(r["season"] if isinstance(r, dict) else r[0]): r for r in rows}
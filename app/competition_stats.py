@@ -0,0 +1,157 @@
+"""
+Per-competition aggregates for the player and club detail pages.
+
+player_detail compares a player with the averages of their club and league and
+club_details lists the other clubs of the league; both used to run their own
+queries over Clubs/Players filtered by competition_id on every page view.
+competition_stats() computes everything for one competition with two queries:
+
+    clubs                        member clubs (club_id, club_name, club_code,
+                                 average_age, squad_size), by name
+    club_ids                     set of the member club ids
+    league_average_age           squad-size weighted average of the clubs' average_age
+    league_average_market_value  average market value of the active players
+    club_average_market_value    {club_id: average market value of its active players}
+
+Results are kept in a small LRU cache. The write views drop the entries of the
+competitions they touch (invalidate_competitions / invalidate_clubs). Every change to
+Clubs, Players or Competitions reported through app/table_versions, including the
+writes of other app workers and the loader, drops the whole cache (invalidate_tables);
+COMPETITION_CACHE_TTL only remains as a backstop.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.table_versions import on_change, versions
+
+# last_season from which a player counts as active
+ACTIVE_SEASON = 2023
+
+COMPETITION_CACHE_TTL = 300
+COMPETITION_CACHE_SIZE = 64
+# tables the aggregates are computed from
+TABLES = ("Clubs", "Players", "Competitions")
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+# bumped by every invalidation; a result computed across one is not cached
+_epoch = 0
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def invalidate_competitions(*competition_ids):
+    """Drops the cached aggregates of these competitions."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        for competition_id in competition_ids:
+            _cache.pop(competition_id, None)
+
+
+def invalidate_clubs(*club_ids):
+    """Drops the cached aggregates of the competitions these clubs belong to."""
+    global _epoch
+    club_ids = {c for c in club_ids if c is not None}
+    with _lock:
+        _epoch += 1
+        for competition_id in [k for k, (stats, _) in _cache.items() if stats["club_ids"] & club_ids]:
+            del _cache[competition_id]
+
+
+@on_change
+def invalidate_tables(*tables):
+    """Called for every table change (tables_changed, version polls): drops everything read from them."""
+    global _epoch
+    if {t.lower() for t in tables} & {t.lower() for t in TABLES}:
+        with _lock:
+            _epoch += 1
+            _cache.clear()
+
+
+def player_club(cursor, player_id):
+    """current_club_id of a player (None if unknown), read before a write that affects it."""
+    cursor.execute("SELECT current_club_id FROM Players WHERE player_id = %s", (player_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    return rows[0]["current_club_id"] if isinstance(rows[0], dict) else rows[0][0]
+
+
+def _compute(cursor, competition_id):
+    cursor.execute(
+        """
+        SELECT club_id, name AS club_name, club_code, average_age, squad_size
+        FROM Clubs
+        WHERE competition_id = %s
+        ORDER BY name ASC
+        """,
+        (competition_id,),
+    )
+    clubs = [dict(row) for row in cursor.fetchall()]
+
+    weighted = [(c["average_age"], c["squad_size"]) for c in clubs
+                if c["average_age"] is not None and c["squad_size"] and c["squad_size"] > 0]
+    squad_total = sum(size for _, size in weighted)
+    league_average_age = float(sum(age * size for age, size in weighted) / squad_total) if squad_total else None
+
+    cursor.execute(
+        """
+        SELECT p.current_club_id, SUM(p.market_value) AS mv_sum, COUNT(*) AS mv_count
+        FROM Players p
+        INNER JOIN Clubs c ON p.current_club_id = c.club_id
+        WHERE c.competition_id = %s
+            AND p.market_value IS NOT NULL
+            AND p.last_season >= %s
+        GROUP BY p.current_club_id
+        """,
+        (competition_id, ACTIVE_SEASON),
+    )
+    club_average_market_value = {}
+    mv_sum, mv_count = 0.0, 0
+    for row in cursor.fetchall():
+        club_average_market_value[row["current_club_id"]] = float(row["mv_sum"]) / row["mv_count"]
+        mv_sum += float(row["mv_sum"])
+        mv_count += row["mv_count"]
+
+    return {
+        "competition_id": competition_id,
+        "clubs": clubs,
+        "club_ids": {c["club_id"] for c in clubs},
+        "league_average_age": league_average_age,
+        "league_average_market_value": mv_sum / mv_count if mv_count else None,
+        "club_average_market_value": club_average_market_value,
+    }
+
+
+def competition_stats(cursor, competition_id):
+    """Aggregates of a competition (see the module docstring). Needs a dictionary cursor."""
+    # polls the shared versions now and then, which reports the writes of other
+    # processes to invalidate_tables
+    versions(TABLES)
+    ttl = _env_int("COMPETITION_CACHE_TTL", COMPETITION_CACHE_TTL)
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(competition_id)
+        if cached and now - cached[1] < ttl:
+            _cache.move_to_end(competition_id)
+            return cached[0]
+        epoch = _epoch
+
+    stats = _compute(cursor, competition_id)
+
+    with _lock:
+        if epoch == _epoch:
+            _cache[competition_id] = (stats, now)
+            _cache.move_to_end(competition_id)
+            while len(_cache) > COMPETITION_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return stats
@@ -0,0 +1,144 @@
+"""
+Total counts for the paginated listings.
+
+Every listing used to run a full COUNT(*) with the same joins and filters before
+reading its page. count_total() picks one of three strategies:
+
+    exact   COUNT(*), cached per normalized filter set until a write to one of the
+            listing's tables (invalidate_counts) or COUNT_CACHE_TTL seconds
+    approx  unfiltered listings use the InnoDB row estimate from
+            information_schema.TABLES (filtered ones still count exactly)
+    none    no count at all (?include_total=false, for infinite scroll clients)
+
+The default mode comes from LIST_COUNT_MODE (exact), a request can ask for another
+one with ?count=exact|approx or ?include_total=false.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from mysql.connector import Error
+
+from app.table_versions import on_change
+
+COUNT_MODES = ("exact", "approx", "none")
+
+# Writes from other processes (loader, other app workers) are not seen by
+# invalidate_counts, so cached counts also expire
+COUNT_CACHE_TTL = 300
+COUNT_CACHE_SIZE = 1024
+ESTIMATE_TTL = 60
+
+_lock = threading.Lock()
+_generations = {}
+_counts = OrderedDict()
+_estimates = {}
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def count_mode(args):
+    """Count strategy asked for by the request args (falls back to LIST_COUNT_MODE)."""
+    if args.get("include_total", "").strip().lower() in ("0", "false", "no", "off"):
+        return "none"
+    mode = args.get("count", "").strip().lower() or os.getenv("LIST_COUNT_MODE", "exact").strip().lower()
+    return mode if mode in COUNT_MODES else "exact"
+
+
+@on_change
+def invalidate_counts(*tables):
+    """Called on every write (tables_changed): cached counts over these tables are stale."""
+    with _lock:
+        for table in tables:
+            key = table.lower()
+            _generations[key] = _generations.get(key, 0) + 1
+
+
+def _generation(tables):
+    return tuple(_generations.get(t.lower(), 0) for t in tables)
+
+
+def normalize_filters(filters):
+    """Filter dict -> hashable key; empty filters are dropped, strings trimmed and lowercased
+    (the tables use case-insensitive collations, so 'attack' and 'Attack' count the same)."""
+    items = []
+    for name, value in filters.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        items.append((name, str(value)))
+    return tuple(sorted(items))
+
+
+def table_estimate(cursor, table):
+    """InnoDB's row estimate for a table, None when it is not available."""
+    now = time.monotonic()
+    with _lock:
+        cached = _estimates.get(table.lower())
+        if cached and now - cached[1] < ESTIMATE_TTL:
+            return cached[0]
+    try:
+        cursor.execute(
+            "SELECT TABLE_ROWS AS table_rows FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND LOWER(TABLE_NAME) = %s",
+            (table.lower(),),
+        )
+        row = cursor.fetchone()
+    except Error as e:
+        print(f"Error reading the row estimate of {table}: {e}")
+        return None
+    if not row:
+        return None
+    estimate = row["table_rows"] if isinstance(row, dict) else row[0]
+    if estimate is None:
+        return None
+    with _lock:
+        _estimates[table.lower()] = (int(estimate), now)
+    return int(estimate)
+
+
+def count_total(cursor, scope, tables, filters, count_sql, params, mode="exact"):
+    """
+    Total rows of a listing as (total, is_estimate); total is None in "none" mode.
+    scope names the listing, tables are the tables its count reads (the first one is
+    estimated in approx mode), filters the request filters the count depends on.
+    count_sql must return the count as its first column.
+    """
+    if mode == "none":
+        return None, False
+
+    key = (scope, normalize_filters(filters))
+    if mode == "approx" and not key[1]:
+        estimate = table_estimate(cursor, tables[0])
+        if estimate is not None:
+            return estimate, True
+
+    ttl = _env_int("COUNT_CACHE_TTL", COUNT_CACHE_TTL)
+    now = time.monotonic()
+    with _lock:
+        generation = _generation(tables)
+        cached = _counts.get(key)
+        if cached and cached[1] == generation and now - cached[2] < ttl:
+            _counts.move_to_end(key)
+            return cached[0], False
+
+    cursor.execute(count_sql, tuple(params))
+    row = cursor.fetchone()
+    total = (next(iter(row.values())) if isinstance(row, dict) else row[0]) if row else 0
+    total = int(total or 0)
+
+    with _lock:
+        # a write during the COUNT leaves the entry with an old generation, it is not reused
+        _counts[key] = (total, generation, now)
+        _counts.move_to_end(key)
+        while len(_counts) > COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    return total, False
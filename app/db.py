@@ -1,24 +1,622 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
 from dotenv import load_dotenv
-from pathlib import Path 
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from pathlib import Path
 
 base_dir = Path(__file__).resolve().parent.parent
 env_file = base_dir / '.env'
 
 load_dotenv(dotenv_path=env_file)
 
-def get_db_connection():
-    """Establishes a connection to the MySQL database."""
+
+def _env_int(name, default):
+    value = os.getenv(name)
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME"),
-        )
-        return connection
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw MySQL connection borrowed from a ConnectionPool.
+    Everything is delegated to the real connection except close(),
+    which hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    @property
+    def closed(self):
+        return self._raw is None
+
+    def close(self):
+        # Safe to call more than once (views close early, teardown closes again)
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool.release(raw, self._created_at)
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise PoolError("Connection has already been returned to the pool")
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe MySQL connection pool.
+
+    - size:         connections kept open while idle
+    - max_overflow: extra connections allowed during spikes (closed on return)
+    - timeout:      seconds to wait for a free connection before PoolError
+    - pre_ping:     check the connection is alive before handing it out
+    - recycle:      seconds after which a connection is closed and reopened
+    """
+
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30, pre_ping=True, recycle=3600):
+        self.connect_args = dict(connect_args)
+        self.size = max(1, size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.recycle = recycle
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._waiters = 0
+
+        # Statistics
+        self._acquired = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._acquire_total = 0.0
+        self._acquire_max = 0.0
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._created += 1
+        return raw, time.monotonic()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Error:
+            pass
+        with self._cond:
+            self._discarded += 1
+
+    def _is_usable(self, raw, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                return raw.is_connected()
+            except Error:
+                return False
+        return True
+
+    def acquire(self):
+        """Borrows a connection, blocking up to `timeout` seconds when the pool is exhausted."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    # Reserve a slot, the connection itself is opened outside the lock
+                    self._open += 1
+                    raw, created_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError(
+                        f"Connection pool exhausted ({self._open} open, timeout {self.timeout}s)"
+                    )
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+            self._in_use += 1
+
+        try:
+            if raw is not None and not self._is_usable(raw, created_at):
+                self._discard(raw)
+                raw = None
+            if raw is None:
+                raw, created_at = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._acquired += 1
+            self._acquire_total += elapsed
+            self._acquire_max = max(self._acquire_max, elapsed)
+
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at):
+        """Returns a connection to the pool. Overflow and broken connections are closed."""
+        keep = True
+        try:
+            # Drop any uncommitted work so the next borrower starts clean
+            raw.rollback()
+        except Error:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((raw, created_at))
+            else:
+                self._open -= 1
+                keep = False
+            self._cond.notify()
+
+        if not keep:
+            self._discard(raw)
+
+    def dispose(self):
+        """Closes every idle connection (borrowed ones are closed on return)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiters": self._waiters,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "avg_acquire_ms": round(self._acquire_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+                "max_acquire_ms": round(self._acquire_max * 1000, 3),
+            }
+
+
+_pool = None
+_replica_router = None
+_pool_lock = threading.Lock()
+
+# GET/HEAD requests are routed to replicas, everything else goes to the primary
+READ_METHODS = ("GET", "HEAD")
+
+
+def _pool_options():
+    return dict(
+        size=_env_int("DB_POOL_SIZE", 5),
+        max_overflow=_env_int("DB_POOL_MAX_OVERFLOW", 10),
+        timeout=_env_int("DB_POOL_TIMEOUT", 30),
+        pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        recycle=_env_int("DB_POOL_RECYCLE", 3600),
+    )
+
+
+def get_pool():
+    """Returns the process-wide primary pool, creating it from .env on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    {
+                        "host": os.getenv("DB_HOST"),
+                        "user": os.getenv("DB_USER"),
+                        "password": os.getenv("DB_PASSWORD"),
+                        "database": os.getenv("DB_NAME"),
+                    },
+                    **_pool_options(),
+                )
+    return _pool
+
+
+class ReplicaRouter:
+    """
+    Chooses which read replica serves a query.
+
+    - round_robin:   replicas take turns
+    - least_latency: replica with the lowest recent round-trip time, measured with a
+                     timed SELECT 1 on every checkout (moving average)
+    A replica that fails to hand out a connection is skipped for `retry_after` seconds.
+    """
+
+    def __init__(self, pools, strategy="round_robin", retry_after=30):
+        self.pools = pools
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._next = 0
+        self._latency = [0.0] * len(pools)
+        self._down_until = [0.0] * len(pools)
+
+    def candidates(self):
+        """Replica indexes in the order they should be tried (healthy ones only)."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [i for i in range(len(self.pools)) if self._down_until[i] <= now]
+            if not healthy:
+                return []
+            if self.strategy == "least_latency":
+                return sorted(healthy, key=lambda i: self._latency[i])
+            start = self._next % len(healthy)
+            self._next += 1
+            return healthy[start:] + healthy[:start]
+
+    @staticmethod
+    def round_trip(conn):
+        """Seconds a SELECT 1 takes on conn (network + server, not pool waiting)."""
+        start = time.monotonic()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return time.monotonic() - start
+
+    def record(self, index, seconds):
+        with self._lock:
+            previous = self._latency[index]
+            self._latency[index] = seconds if previous == 0.0 else previous * 0.8 + seconds * 0.2
+
+    def mark_down(self, index):
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_after
+
+    def acquire(self):
+        """Borrows a replica connection, or returns None when no replica is available."""
+        for index in self.candidates():
+            conn = None
+            try:
+                conn = self.pools[index].acquire()
+                if self.strategy == "least_latency":
+                    self.record(index, self.round_trip(conn))
+            except Error as e:
+                print(f"[DB] Replica {self.pools[index].connect_args.get('host')} unavailable: {e}")
+                if conn is not None:
+                    conn.close()
+                self.mark_down(index)
+                continue
+            return conn
+        return None
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            latency = list(self._latency)
+            down = [until > now for until in self._down_until]
+        return [
+            dict(
+                pool.stats(),
+                host=pool.connect_args.get("host"),
+                port=pool.connect_args.get("port"),
+                latency_ms=round(latency[i] * 1000, 3),
+                down=down[i],
+            )
+            for i, pool in enumerate(self.pools)
+        ]
+
+
+def get_replica_router():
+    """
+    Returns the router over the read replicas listed in DB_REPLICAS
+    (comma separated host[:port]), or None when no replicas are configured.
+    """
+    global _replica_router
+    if _replica_router is None:
+        hosts = [h.strip() for h in (os.getenv("DB_REPLICAS") or "").split(",") if h.strip()]
+        if not hosts:
+            return None
+        with _pool_lock:
+            if _replica_router is None:
+                pools = []
+                for entry in hosts:
+                    host, _, port = entry.partition(":")
+                    connect_args = {
+                        "host": host,
+                        "user": os.getenv("DB_REPLICA_USER") or os.getenv("DB_USER"),
+                        "password": os.getenv("DB_REPLICA_PASSWORD") or os.getenv("DB_PASSWORD"),
+                        "database": os.getenv("DB_NAME"),
+                    }
+                    if port:
+                        connect_args["port"] = int(port)
+                    pools.append(ConnectionPool(connect_args, **_pool_options()))
+                _replica_router = ReplicaRouter(
+                    pools,
+                    strategy=os.getenv("DB_REPLICA_STRATEGY", "round_robin").strip().lower(),
+                    retry_after=_env_int("DB_REPLICA_RETRY_AFTER", 30),
+                )
+    return _replica_router
+
+
+def pool_stats():
+    """
+    Current pool statistics (in use, idle, waiters, acquire latency) for primary and replicas,
+    plus the query cache counters (hits, misses, evictions, ...).
+    """
+    stats = get_pool().stats()
+    router = get_replica_router()
+    stats["replicas"] = router.stats() if router else []
+    stats["query_cache"] = get_query_cache().stats()
+    return stats
+
+
+# -----------------------------
+# Query result cache
+# -----------------------------
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?([A-Za-z_][A-Za-z0-9_]*)`?", re.IGNORECASE)
+
+# tables with a version in TableVersions; a query whose parsed FROM / JOIN targets are
+# not all among them (EXTRACT(YEAR FROM col), derived tables...) is not cached
+VERSIONED_TABLES = {
+    "clubs", "competitions", "players", "games", "transfers",
+    "clubfinance", "clubseasonfinance", "clubpairstats",
+}
+
+
+def normalize_sql(sql):
+    """SQL text with its whitespace collapsed, so differently indented copies share entries."""
+    return " ".join(sql.split())
+
+
+def tables_in(sql):
+    """FROM / JOIN targets of a SELECT, lowercased (may include non-tables, see VERSIONED_TABLES)."""
+    return tuple(sorted({name.lower() for name in _TABLE_RE.findall(sql)}))
+
+
+def _size_of(rows):
+    """Rough memory footprint of a result set in bytes."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            size += sys.getsizeof(value)
+    return size
+
+
+class QueryCache:
+    """
+    Results of read queries keyed by normalized SQL + params. Every entry keeps the
+    version token of the tables its query reads (app/table_versions), so any write
+    to one of them (in this worker, another one or the loader) makes it a miss.
+    Least recently used entries are evicted beyond max_entries or max_bytes.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                rows, entry_version, _, created = entry
+                if entry_version == version and now - created < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return rows
+                self._drop(key)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, version, rows):
+        size = _size_of(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (rows, version, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_query_cache = None
+
+
+def get_query_cache():
+    global _query_cache
+    if _query_cache is None:
+        with _pool_lock:
+            if _query_cache is None:
+                _query_cache = QueryCache(
+                    max_entries=_env_int("QUERY_CACHE_MAX_ENTRIES", 2048),
+                    max_bytes=_env_int("QUERY_CACHE_MAX_MB", 32) * 1024 * 1024,
+                    ttl=_env_int("QUERY_CACHE_TTL", 300),
+                )
+    return _query_cache
+
+
+def cached_query(cursor, sql, params=(), tables=None, dictionary=False):
+    """
+    cursor.execute(sql, params) + fetchall(), served from the query cache while the
+    tables the query reads are unchanged. tables defaults to the FROM / JOIN targets
+    of sql; when those are not all VERSIONED_TABLES the query is not cached.
+    dictionary: cursor is a dictionary cursor (part of the key, the rows differ).
+    Misses run on cursor, so they are routed like the rest of the request; with read
+    replicas, results are not stored for DB_READ_YOUR_WRITES_WINDOW seconds after a
+    change to one of the tables, while a replica may still return older rows.
+    Returns a new list of (copied) rows, callers may modify them.
+    """
+    # imported here: table_versions imports this module
+    from app.table_versions import versions
+
+    params = tuple(params)
+    if not tables:
+        tables = tables_in(sql)
+        if not tables or not set(tables) <= VERSIONED_TABLES:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+    version, last_modified = versions(tables)
+    key = (normalize_sql(sql), repr(params), bool(dictionary))
+    cache = get_query_cache()
+    rows = cache.get(key, version)
+    if rows is None:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        # the client that wrote reads from the primary (_wants_replica), the others may
+        # get a lagging replica for a moment: do not keep what they read meanwhile
+        lagging = (get_replica_router() is not None
+                   and time.time() - last_modified < _env_int("DB_READ_YOUR_WRITES_WINDOW", 5))
+        if not lagging:
+            cache.put(key, version, rows)
+    return [dict(row) if isinstance(row, dict) else row for row in rows]
+
+
+def _recently_wrote():
+    # Read-your-writes: the client wrote through the primary a moment ago
+    # (e.g. the redirect to transfers.index after add_transfer), so replicas may lag behind.
+    last_write = session.get("db_last_write") if current_app.secret_key else None
+    window = _env_int("DB_READ_YOUR_WRITES_WINDOW", 5)
+    return last_write is not None and time.time() - last_write < window
+
+
+def _wants_replica():
+    return (
+        has_request_context()
+        and request.method in READ_METHODS
+        and not _recently_wrote()
+    )
+
+
+def _acquire(readonly):
+    if readonly:
+        router = get_replica_router()
+        if router is not None:
+            conn = router.acquire()
+            if conn is not None:
+                return conn, "replica"
+    return get_pool().acquire(), "primary"
+
+
+def get_db_connection(readonly=None):
+    """
+    Returns a pooled connection to the MySQL database.
+    Inside a request the same connection is reused and is given back
+    to the pool automatically on app context teardown.
+
+    readonly=None routes by request: GET/HEAD go to a read replica (if any are
+    configured and the client has not just written), everything else to the primary.
+    Pass readonly=False to force the primary.
+    """
+    try:
+        if readonly is None:
+            readonly = _wants_replica()
+        if has_app_context():
+            conns = g.setdefault("db_conns", {})
+            key = "replica" if readonly else "primary"
+            conn = conns.get(key)
+            if conn is None or conn.closed:
+                conn, role = _acquire(readonly)
+                conns[key] = conn
+                if role == "primary":
+                    conns["primary"] = conn
+            return conn
+        return _acquire(readonly)[0]
     except Error as e:
         print(f"[DB] Connection error: {e}")
         return None
+
+
+def remember_write(response):
+    """After-request hook: stamps the session when a write request used the primary."""
+    conns = g.get("db_conns") or {}
+    if (
+        "primary" in conns
+        and request.method not in READ_METHODS
+        and current_app.secret_key
+        and get_replica_router() is not None
+    ):
+        session["db_last_write"] = time.time()
+    return response
+
+
+def close_db_connection(exception=None):
+    """Teardown handler: returns the request's connections to their pools."""
+    conns = g.pop("db_conns", None) or {}
+    for conn in set(conns.values()):
+        conn.close()
+
+
+def init_app(app):
+    app.after_request(remember_write)
+    app.teardown_appcontext(close_db_connection)
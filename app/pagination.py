@@ -0,0 +1,209 @@
+"""
+Keyset (seek) pagination for the list endpoints.
+
+LIMIT/OFFSET makes MySQL read and throw away every row before the page, so deep
+pages get slower the further you go. With a keyset the next page starts right after
+the last row of the current one:
+
+    WHERE (sort_col < last_value OR (sort_col = last_value AND id < last_id))
+    ORDER BY sort_col DESC, id DESC LIMIT n
+
+The position travels as an opaque cursor token (url-safe base64 JSON with the sort
+value, the tiebreaker id and the page number). Previous pages are read with the
+order reversed and the rows flipped back; the last page is the start of the
+reversed order. Page numbers (OFFSET) stay available for direct jumps.
+
+Sort columns may be NULL: MySQL puts NULLs first in ASC and last in DESC order,
+and the seek conditions follow that.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+# position: page number, reverse = read backwards (previous/last page),
+# value/tiebreak = sort key of the row to continue after (has_key False: start of the order)
+Position = namedtuple("Position", "page reverse value tiebreak has_key")
+
+
+def _encode_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["n", str(value)]
+    if isinstance(value, bool):
+        return ["i", int(value)]
+    if isinstance(value, int):
+        return ["i", value]
+    if isinstance(value, float):
+        return ["f", value]
+    return ["s", str(value)]
+
+
+def _decode_value(encoded):
+    if encoded is None:
+        return None
+    kind, value = encoded
+    if kind == "dt":
+        return datetime.fromisoformat(value)
+    if kind == "d":
+        return date.fromisoformat(value)
+    if kind == "n":
+        return Decimal(value)
+    if kind == "i":
+        return int(value)
+    if kind == "f":
+        return float(value)
+    return str(value)
+
+
+def _pack(payload):
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _flip(direction):
+    return "DESC" if direction == "ASC" else "ASC"
+
+
+class Keyset:
+    """
+    One sort order of a listing: sort column + a unique tiebreaker column.
+    key / tiebreak_key are the result row keys holding those values
+    (key may also be a function row -> value for computed sort expressions).
+    """
+
+    def __init__(self, column, direction, key, tiebreak, tiebreak_direction, tiebreak_key, nullable=True):
+        self.column = column
+        self.direction = direction.upper()
+        self.key = key
+        self.tiebreak = tiebreak
+        self.tiebreak_direction = tiebreak_direction.upper()
+        self.tiebreak_key = tiebreak_key
+        self.nullable = nullable
+        # tokens made for another sort order are ignored
+        self.signature = f"{column} {self.direction},{tiebreak} {self.tiebreak_direction}"
+
+    def order_by(self, reverse=False):
+        direction = _flip(self.direction) if reverse else self.direction
+        tiebreak_direction = _flip(self.tiebreak_direction) if reverse else self.tiebreak_direction
+        return f"{self.column} {direction}, {self.tiebreak} {tiebreak_direction}"
+
+    def seek(self, position):
+        """(SQL condition, params) for the rows after position, or ("", []) from the start."""
+        if not position.has_key:
+            return "", []
+        direction = _flip(self.direction) if position.reverse else self.direction
+        tiebreak_direction = _flip(self.tiebreak_direction) if position.reverse else self.tiebreak_direction
+        col, tb = self.column, self.tiebreak
+        op = ">" if direction == "ASC" else "<"
+        tb_op = ">" if tiebreak_direction == "ASC" else "<"
+        value, tiebreak = position.value, position.tiebreak
+
+        if value is None:
+            if direction == "ASC":
+                # NULLs come first: the rest of the NULLs, then every non-NULL value
+                return f"(({col} IS NULL AND {tb} {tb_op} %s) OR {col} IS NOT NULL)", [tiebreak]
+            # NULLs come last: only the rest of the NULLs
+            return f"({col} IS NULL AND {tb} {tb_op} %s)", [tiebreak]
+
+        condition = f"{col} {op} %s OR ({col} = %s AND {tb} {tb_op} %s)"
+        if self.nullable and direction == "DESC":
+            condition += f" OR {col} IS NULL"
+        return f"({condition})", [value, value, tiebreak]
+
+    def row_key(self, row):
+        value = self.key(row) if callable(self.key) else row.get(self.key)
+        return value, row.get(self.tiebreak_key)
+
+    def token(self, row, page, reverse=False):
+        value, tiebreak = self.row_key(row)
+        payload = {
+            "s": self.signature,
+            "p": page,
+            "r": 1 if reverse else 0,
+            "v": _encode_value(value),
+            "t": _encode_value(tiebreak),
+        }
+        return _pack(payload)
+
+    def last_token(self, page):
+        """Token of the last page: the first rows of the reversed order."""
+        return _pack({"s": self.signature, "p": page, "r": 1})
+
+    def decode(self, token):
+        """Position from a cursor token, None if it is missing, broken or for another sort order."""
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw.decode("utf-8"))
+            if payload.get("s") != self.signature:
+                return None
+            has_key = "t" in payload
+            return Position(
+                page=max(1, int(payload["p"])),
+                reverse=bool(payload.get("r")),
+                value=_decode_value(payload.get("v")) if has_key else None,
+                tiebreak=_decode_value(payload.get("t")) if has_key else None,
+                has_key=has_key,
+            )
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+
+def last_page_size(total_count, per_page):
+    """Rows on the last page."""
+    if total_count <= 0:
+        return per_page
+    return total_count - (max(1, -(-total_count // per_page)) - 1) * per_page
+
+
+# how to read one page: extra WHERE condition, ORDER BY, LIMIT clause and its params
+PageRead = namedtuple("PageRead", "seek_sql seek_params order_by limit_sql limit_params page reverse has_key")
+
+
+def plan_page(keyset, position, page, per_page, total_count=None):
+    """
+    PageRead for a page number (OFFSET) or a cursor position (seek).
+    Forward reads fetch one extra row to tell whether a next page exists,
+    so this also works when the total is not counted.
+    """
+    if position is None:
+        return PageRead("", [], keyset.order_by(), "LIMIT %s OFFSET %s",
+                        [per_page + 1, (page - 1) * per_page], page, False, True)
+    seek_sql, seek_params = keyset.seek(position)
+    if position.reverse:
+        if position.has_key or total_count is None:
+            limit, page = per_page, position.page
+        else:
+            limit = last_page_size(total_count, per_page)
+            page = max(1, -(-total_count // per_page))
+    else:
+        limit, page = per_page + 1, position.page
+    return PageRead(seek_sql, seek_params, keyset.order_by(position.reverse), "LIMIT %s",
+                    [limit], page, position.reverse, position.has_key)
+
+
+def finish_page(keyset, read, rows, per_page, total_pages=None):
+    """
+    Rows of the page in display order and its (prev, next, last) cursor tokens.
+    total_pages is only passed when the total is exact (it enables the last page cursor).
+    """
+    if read.reverse:
+        rows = list(reversed(rows))
+        # read backwards from a later page, unless this is the last page itself
+        has_next = read.has_key
+    else:
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+    page = read.page
+    prev_token = keyset.token(rows[0], page - 1, reverse=True) if rows and page > 1 else None
+    next_token = keyset.token(rows[-1], page + 1) if rows and has_next else None
+    last_token = keyset.last_token(total_pages) if total_pages and total_pages > 1 and page != total_pages else None
+    return rows, prev_token, next_token, last_token
@@ -0,0 +1,191 @@
+"""
+Head-to-head statistics per club pair, kept up to date with every game write.
+
+    ClubPairStats  one row per pair (club_a < club_b, whatever side was home):
+                   matches, wins of each club, draws, goals of each club, goal and
+                   attendance sums (for the averages), the biggest win and the
+                   last LAST_GAMES game ids
+
+The game views call refresh_pair() in the same transaction as their change; it
+recomputes the pair's row from its games (a few dozen rows at most). The loader
+calls rebuild() after a load. head_to_head then reads one row by primary key and
+the listed games by id instead of scanning Games for both orientations.
+
+Without the table (migration 0004 not applied) the writes skip it and lookup()
+returns None, so head_to_head falls back to querying Games.
+"""
+from mysql.connector import Error, errorcode
+
+LAST_GAMES = 5
+
+CLUB_PAIR_STATS_SQL = """
+    CREATE TABLE IF NOT EXISTS ClubPairStats (
+        club_a INT NOT NULL,
+        club_b INT NOT NULL,
+        matches INT NOT NULL DEFAULT 0,
+        a_wins INT NOT NULL DEFAULT 0,
+        b_wins INT NOT NULL DEFAULT 0,
+        draws INT NOT NULL DEFAULT 0,
+        a_goals INT NOT NULL DEFAULT 0,
+        b_goals INT NOT NULL DEFAULT 0,
+        goal_games INT NOT NULL DEFAULT 0,
+        goals_sum INT NOT NULL DEFAULT 0,
+        attendance_games INT NOT NULL DEFAULT 0,
+        attendance_sum BIGINT NOT NULL DEFAULT 0,
+        biggest_win_game_id INT,
+        last_game_ids VARCHAR(255),
+        PRIMARY KEY (club_a, club_b),
+        KEY idx_club_pair_stats_b (club_b)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# The games (those matching {where}, an extra "AND (...)" predicate or empty) aggregated per pair;
+# club_a is the lower club id.
+# Games with a missing goal count are matches but neither wins nor draws (as in the old queries).
+_PAIR_TOTALS = """
+    INSERT INTO ClubPairStats (club_a, club_b, matches, a_wins, b_wins, draws, a_goals, b_goals,
+                               goal_games, goals_sum, attendance_games, attendance_sum)
+    SELECT club_a, club_b, COUNT(*),
+           SUM(CASE WHEN a_goals > b_goals THEN 1 ELSE 0 END),
+           SUM(CASE WHEN b_goals > a_goals THEN 1 ELSE 0 END),
+           SUM(CASE WHEN a_goals = b_goals THEN 1 ELSE 0 END),
+           COALESCE(SUM(a_goals), 0), COALESCE(SUM(b_goals), 0),
+           COUNT(a_goals + b_goals), COALESCE(SUM(a_goals + b_goals), 0),
+           COUNT(attendance), COALESCE(SUM(attendance), 0)
+    FROM (
+        SELECT LEAST(home_club_id, away_club_id) AS club_a, GREATEST(home_club_id, away_club_id) AS club_b,
+               IF(home_club_id < away_club_id, home_club_goals, away_club_goals) AS a_goals,
+               IF(home_club_id < away_club_id, away_club_goals, home_club_goals) AS b_goals,
+               attendance
+        FROM Games
+        WHERE home_club_id IS NOT NULL AND away_club_id IS NOT NULL AND home_club_id <> away_club_id{where}
+    ) pair_games
+    GROUP BY club_a, club_b
+"""
+
+# Biggest win (largest goal difference, latest first on ties) and the last {last} games per pair
+_PAIR_GAMES = """
+    UPDATE ClubPairStats s
+    JOIN (
+        SELECT club_a, club_b,
+               MAX(CASE WHEN win_rank = 1 THEN game_id END) AS biggest_win_game_id,
+               GROUP_CONCAT(CASE WHEN date_rank <= {last} THEN game_id END ORDER BY date_rank SEPARATOR ',')
+                   AS last_game_ids
+        FROM (
+            SELECT game_id,
+                   LEAST(home_club_id, away_club_id) AS club_a, GREATEST(home_club_id, away_club_id) AS club_b,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY LEAST(home_club_id, away_club_id), GREATEST(home_club_id, away_club_id)
+                       ORDER BY ABS(home_club_goals - away_club_goals) DESC, date DESC, game_id DESC
+                   ) AS win_rank,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY LEAST(home_club_id, away_club_id), GREATEST(home_club_id, away_club_id)
+                       ORDER BY date DESC, game_id DESC
+                   ) AS date_rank
+            FROM Games
+            WHERE home_club_id IS NOT NULL AND away_club_id IS NOT NULL AND home_club_id <> away_club_id{where}
+        ) ranked
+        WHERE win_rank = 1 OR date_rank <= {last}
+        GROUP BY club_a, club_b
+    ) r ON s.club_a = r.club_a AND s.club_b = r.club_b
+    SET s.biggest_win_game_id = r.biggest_win_game_id, s.last_game_ids = r.last_game_ids
+"""
+
+_PAIR_WHERE = "(home_club_id = %s AND away_club_id = %s) OR (home_club_id = %s AND away_club_id = %s)"
+
+
+def _missing_table(e):
+    return getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE
+
+
+def _compute(cursor, where=None, params=()):
+    params = tuple(params)
+    where = f" AND ({where})" if where else ""
+    cursor.execute(_PAIR_TOTALS.format(where=where), params)
+    cursor.execute(_PAIR_GAMES.format(where=where, last=int(LAST_GAMES)), params)
+
+
+def refresh_pair(cursor, home_id, away_id):
+    """Recomputes the row of the pair from its games (no row when they have none). Does not commit."""
+    if home_id is None or away_id is None or home_id == away_id:
+        return
+    club_a, club_b = min(home_id, away_id), max(home_id, away_id)
+    try:
+        cursor.execute("DELETE FROM ClubPairStats WHERE club_a = %s AND club_b = %s", (club_a, club_b))
+        _compute(cursor, _PAIR_WHERE, (club_a, club_b, club_b, club_a))
+    except Error as e:
+        if not _missing_table(e):
+            raise
+        print(f"Head-to-head stats not updated (run migrate.py apply): {e}")
+
+
+def game_pair(cursor, game_id):
+    """(home_club_id, away_club_id) of a game, None if it does not exist."""
+    cursor.execute("SELECT home_club_id, away_club_id FROM Games WHERE game_id = %s", (game_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    row = rows[0]
+    return (row["home_club_id"], row["away_club_id"]) if isinstance(row, dict) else tuple(row)
+
+
+def forget_club(cursor, club_id):
+    """A deleted club takes its games with it (ON DELETE CASCADE)."""
+    try:
+        cursor.execute("DELETE FROM ClubPairStats WHERE club_a = %s OR club_b = %s", (club_id, club_id))
+    except Error as e:
+        if not _missing_table(e):
+            raise
+
+
+def rebuild(cursor):
+    """Recomputes every pair from Games (creates the table if needed). Does not commit."""
+    cursor.execute(CLUB_PAIR_STATS_SQL)
+    cursor.execute("DELETE FROM ClubPairStats")
+    _compute(cursor)
+
+
+def lookup(cursor, home_id, away_id):
+    """
+    Stats of the pair seen from home_id: matches, home_wins, away_wins, draws, home_goals,
+    away_goals, avg_goals, avg_attendance, biggest_win_game_id and last_game_ids (list).
+    All zero for a pair that never played, None without the table. Needs a dictionary cursor.
+    """
+    club_a, club_b = min(home_id, away_id), max(home_id, away_id)
+    try:
+        cursor.execute(
+            """
+            SELECT matches, a_wins, b_wins, draws, a_goals, b_goals,
+                   goals_sum / NULLIF(goal_games, 0) AS avg_goals,
+                   attendance_sum / NULLIF(attendance_games, 0) AS avg_attendance,
+                   biggest_win_game_id, last_game_ids
+            FROM ClubPairStats
+            WHERE club_a = %s AND club_b = %s
+            """,
+            (club_a, club_b),
+        )
+        rows = cursor.fetchall()
+    except Error as e:
+        if not _missing_table(e):
+            raise
+        return None
+
+    if not rows:
+        return {
+            "matches": 0, "home_wins": 0, "away_wins": 0, "draws": 0, "home_goals": 0, "away_goals": 0,
+            "avg_goals": None, "avg_attendance": None, "biggest_win_game_id": None, "last_game_ids": [],
+        }
+    row = rows[0]
+    home_side, away_side = ("a", "b") if home_id == club_a else ("b", "a")
+    return {
+        "matches": row["matches"],
+        "home_wins": row[f"{home_side}_wins"],
+        "away_wins": row[f"{away_side}_wins"],
+        "draws": row["draws"],
+        "home_goals": row[f"{home_side}_goals"],
+        "away_goals": row[f"{away_side}_goals"],
+        "avg_goals": row["avg_goals"],
+        "avg_attendance": row["avg_attendance"],
+        "biggest_win_game_id": row["biggest_win_game_id"],
+        "last_game_ids": [int(i) for i in (row["last_game_ids"] or "").split(",") if i],
+    }
@@ -0,0 +1,245 @@
+"""
+Reference data for the dropdowns and filter lists, served from memory.
+
+The club, competition and player filter lists change rarely but were read from the
+database on every page load, by several endpoints:
+
+    clubs           /api/clubs, /players/api/clubs        club_id, name
+    clubs_list      /api/clubs_list                       clubs with their details
+    competitions    /api/competitions                     competition_id, name, country
+    player_filters  /players/api/filters                  distinct positions, sub positions,
+                                                          countries, feet
+    sub_positions   /players/api/sub-positions            sub positions per position
+
+Each set is loaded once (from the primary) and kept as ready-to-send JSON bytes with
+a version stamp (hash of the bytes, the same in every worker), so serving it needs no
+database work. Writes to a set's tables (invalidate_reference) mark it stale and the
+next request reloads it; writes from other processes are picked up after
+REFERENCE_DATA_TTL seconds.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import Response, current_app, request
+from mysql.connector import Error
+
+from app.db import get_db_connection
+from app.table_versions import on_change
+
+REFERENCE_DATA_TTL = 300
+
+# blobs: {key: JSON bytes} (key None for sets with a single response), versions: {key: stamp},
+# loaded_at: monotonic load time, modified: wall clock load time (Last-Modified),
+# generation: invalidation count of the set when it was loaded
+Entry = namedtuple("Entry", "blobs versions loaded_at modified generation")
+
+
+def _rows(cursor, query):
+    cursor.execute(query)
+    return cursor.fetchall()
+
+
+def _load_clubs(cursor):
+    return {None: _rows(cursor, "SELECT club_id, name FROM Clubs ORDER BY name")}
+
+
+def _load_clubs_list(cursor):
+    return {None: _rows(cursor, """
+        SELECT
+            c.club_id,
+            c.club_code,
+            c.name,
+            c.squad_size,
+            c.average_age,
+            c.stadium_name,
+            c.stadium_seats,
+            c.url,
+            c.competition_id,
+            comp.country_name
+        FROM Clubs c
+        LEFT JOIN Competitions comp ON c.competition_id = comp.competition_id
+        ORDER BY c.name ASC
+    """)}
+
+
+def _load_competitions(cursor):
+    return {None: _rows(cursor, """
+        SELECT competition_id, competition_name, country_name
+        FROM Competitions
+        ORDER BY competition_name
+    """)}
+
+
+def _distinct(cursor, column):
+    rows = _rows(cursor, f"SELECT DISTINCT {column} FROM Players WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}")
+    return [row[column] for row in rows]
+
+
+def _load_player_filters(cursor):
+    return {None: {
+        'positions': _distinct(cursor, "position"),
+        'sub_positions': _distinct(cursor, "sub_position"),
+        'countries': _distinct(cursor, "country_of_citizenship"),
+        'feet': _distinct(cursor, "foot"),
+    }}
+
+
+def _load_sub_positions(cursor):
+    rows = _rows(cursor, """
+        SELECT DISTINCT position, sub_position
+        FROM Players
+        WHERE sub_position IS NOT NULL AND sub_position != ''
+        ORDER BY sub_position
+    """)
+    by_position = {}
+    for row in rows:
+        if row['position']:
+            subs = by_position.setdefault(row['position'].lower(), [])
+            if row['sub_position'] not in subs:
+                subs.append(row['sub_position'])
+    # no position: every sub position
+    payloads = {"": {'sub_positions': _distinct(cursor, "sub_position")}}
+    for position, subs in by_position.items():
+        payloads[position] = {'sub_positions': subs}
+    return payloads
+
+
+# name -> (tables it is read from, loader, response for a key the set does not have)
+DATASETS = {
+    "clubs": (("Clubs",), _load_clubs, None),
+    "clubs_list": (("Clubs", "Competitions"), _load_clubs_list, None),
+    "competitions": (("Competitions",), _load_competitions, None),
+    "player_filters": (("Players",), _load_player_filters, None),
+    "sub_positions": (("Players",), _load_sub_positions, {'sub_positions': []}),
+}
+
+_lock = threading.Lock()
+_load_locks = {name: threading.Lock() for name in DATASETS}
+_entries = {}
+_generations = {}
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def encode(data):
+    """JSON bytes exactly as jsonify() would send them."""
+    provider = current_app.json
+    compact = getattr(provider, "compact", None)
+    if (compact is None and current_app.debug) or compact is False:
+        dump_args = {"indent": 2}
+    else:
+        dump_args = {"separators": (",", ":")}
+    return (provider.dumps(data, **dump_args) + "\n").encode("utf-8")
+
+
+def version_of(blob):
+    return hashlib.md5(blob).hexdigest()[:16]
+
+
+@on_change
+def invalidate_reference(*tables):
+    """Called on every write (tables_changed): the sets read from these tables are reloaded on next use."""
+    tables = {t.lower() for t in tables}
+    with _lock:
+        for name, (dataset_tables, _, _) in DATASETS.items():
+            if tables & {t.lower() for t in dataset_tables}:
+                _generations[name] = _generations.get(name, 0) + 1
+
+
+def _usable(name, entry, now):
+    return (
+        entry is not None
+        and entry.generation == _generations.get(name, 0)
+        and now - entry.loaded_at < _env_int("REFERENCE_DATA_TTL", REFERENCE_DATA_TTL)
+    )
+
+
+def _load(name):
+    _, loader, _ = DATASETS[name]
+    # from the primary: right after a write a replica may not have it yet
+    conn = get_db_connection(readonly=False)
+    if conn is None:
+        raise Error("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        payloads = loader(cursor)
+    finally:
+        cursor.close()
+    blobs = {key: encode(data) for key, data in payloads.items()}
+    return blobs, {key: version_of(blob) for key, blob in blobs.items()}
+
+
+def get_entry(name):
+    """Current Entry of a set, loading it if needed (one loader at a time per set)."""
+    with _lock:
+        entry = _entries.get(name)
+        if _usable(name, entry, time.monotonic()):
+            return entry
+
+    with _load_locks[name]:
+        # another request may have reloaded it while we waited
+        with _lock:
+            entry = _entries.get(name)
+            now = time.monotonic()
+            if _usable(name, entry, now):
+                return entry
+            generation = _generations.get(name, 0)
+        try:
+            blobs, versions = _load(name)
+        except Error as e:
+            if entry is None:
+                raise
+            print(f"Error reloading reference data '{name}', serving the previous copy: {e}")
+            return entry
+        # an invalidation during the load leaves the new copy outdated (older generation)
+        entry = Entry(blobs, versions, now, time.time(), generation)
+        with _lock:
+            _entries[name] = entry
+        return entry
+
+
+def blob(name, key=None):
+    """(JSON bytes, version stamp, load time) of a set (key picks the response of keyed sets)."""
+    entry = get_entry(name)
+    if key in entry.blobs:
+        return entry.blobs[key], entry.versions[key], entry.modified
+    default = DATASETS[name][2]
+    body = encode(default)
+    return body, version_of(body), entry.modified
+
+
+def reference_response(name, key=None):
+    """
+    The set as a JSON response. The version stamp is its ETag, so a client that
+    already has this version gets 304 Not Modified (If-Modified-Since is not used:
+    two loads in the same second share a Last-Modified).
+    """
+    body, version, modified = blob(name, key)
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=current_app.json.mimetype)
+    response.headers["X-Data-Version"] = version
+    response.set_etag(version)
+    response.last_modified = int(modified)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def preload(app):
+    """Loads every set at startup so the first requests are served from memory too."""
+    with app.app_context():
+        for name in DATASETS:
+            try:
+                get_entry(name)
+            except Error as e:
+                print(f"Reference data '{name}' not preloaded: {e}")
@@ -0,0 +1,351 @@
+"""
+Two-level cache for expensive rendered / JSON responses (transfer_stats, head_to_head).
+
+    L1  per worker process: a small LRU dict, no I/O
+    L2  shared by the workers of a host: Redis (RESPONSE_CACHE_URL=redis://...,
+        needs the redis package) or files in a shared-memory directory
+        (RESPONSE_CACHE_URL=file:///dev/shm/..., the default), "none" disables it
+
+Entries carry the version token of the tables the view reads (app/table_versions),
+so a write anywhere makes them outdated in every worker. An entry is
+
+    fresh   same table versions and younger than ttl: served as is
+    stale   otherwise, up to stale seconds older than that: one worker (the one
+            that gets the recompute lock) renders the page again while the
+            others keep serving the stale copy (stale-while-revalidate)
+    gone    older than that: one worker renders it, the others wait up to
+            RESPONSE_CACHE_WAIT seconds for its result instead of all
+            running the same queries at once (request coalescing)
+
+Responses are only cached with status 200, and the cache is bypassed for clients
+with pending flash messages (the page would carry them).
+"""
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlparse
+
+from flask import Response, make_response, request, session
+
+from app.table_versions import versions
+
+RESPONSE_CACHE_L1_SIZE = 256
+RESPONSE_CACHE_WAIT = 5
+# a recompute lock is given up after this many seconds (worker died while rendering)
+LOCK_TIMEOUT = 30
+# keep entries in L2 this much longer than their stale window, then drop them
+L2_GRACE = 60
+# in-process recompute locks, shared by the keys with the same hash % KEY_LOCK_STRIPES
+# (keys contain arbitrary query strings, one lock per key would grow without bound)
+KEY_LOCK_STRIPES = 64
+
+# headers that belong to one client, not to the page
+_SKIP_HEADERS = {"set-cookie", "content-length", "etag", "last-modified", "x-cache"}
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+# -----------------------------
+# L2 stores
+# -----------------------------
+
+class FileStore:
+    """Entries as files in a directory shared by the workers (ideally on tmpfs, e.g. /dev/shm)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._writes = 0
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, hashlib.md5(key.encode("utf-8")).hexdigest() + suffix)
+
+    def get(self, key):
+        try:
+            with open(self._path(key, ".json"), "rb") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if data.get("expires", 0) < time.time():
+            return None
+        return data
+
+    def set(self, key, data, ttl):
+        data = dict(data, expires=time.time() + ttl)
+        path = self._path(key, ".json")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(data).encode("utf-8"))
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.cleanup()
+
+    def acquire(self, key, timeout):
+        path = self._path(key, ".lock")
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    # the holder died: take the lock over
+                    os.unlink(path)
+                    return self.acquire(key, timeout)
+            except OSError:
+                pass
+            return False
+
+    def release(self, key):
+        try:
+            os.unlink(self._path(key, ".lock"))
+        except OSError:
+            pass
+
+    def cleanup(self):
+        """Removes expired entries."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    if json.loads(f.read()).get("expires", 0) < now:
+                        os.unlink(path)
+            except (OSError, ValueError):
+                pass
+
+
+class RedisStore:
+    """Entries in Redis (or anything speaking its protocol: Valkey, KeyDB, ...)."""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = "transfermarkt:response:"
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, data, ttl):
+        self.client.set(self.prefix + key, json.dumps(data), ex=max(1, int(ttl)))
+
+    def acquire(self, key, timeout):
+        return bool(self.client.set(self.prefix + "lock:" + key, "1", nx=True, ex=max(1, int(timeout))))
+
+    def release(self, key):
+        self.client.delete(self.prefix + "lock:" + key)
+
+
+def _make_store():
+    url = os.getenv("RESPONSE_CACHE_URL", "").strip()
+    if url.lower() == "none":
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisStore(url)
+        except ImportError:
+            print("RESPONSE_CACHE_URL is a Redis URL but the redis package is not installed, using files")
+            url = ""
+    if url.startswith("file://"):
+        directory = urlparse(url).path
+    else:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        directory = os.path.join(base, "transfermarkt-response-cache")
+    try:
+        return FileStore(directory)
+    except OSError as e:
+        print(f"Response cache directory {directory} not usable, L1 only: {e}")
+        return None
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+
+class ResponseCache:
+    def __init__(self, store, l1_size=RESPONSE_CACHE_L1_SIZE):
+        self.store = store
+        self.l1_size = l1_size
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        # one renderer per key inside this process
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+
+    def _l1_get(self, key):
+        with self._lock:
+            data = self._l1.get(key)
+            if data is not None:
+                self._l1.move_to_end(key)
+            return data
+
+    def _l1_set(self, key, data):
+        with self._lock:
+            self._l1[key] = data
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def _l2(self, method, *args):
+        if self.store is None:
+            return None
+        try:
+            return getattr(self.store, method)(*args)
+        except Exception as e:
+            # the shared store is an optimization: run without it when it fails
+            print(f"Response cache L2 {method} failed: {e}")
+            return None
+
+    def local(self, key):
+        """Entry of key in L1 only (no I/O)."""
+        return self._l1_get(key)
+
+    def get(self, key):
+        """Newest entry of key from L1 or L2 (None if neither has one)."""
+        data = self._l1_get(key)
+        shared = self._l2("get", key)
+        if shared is not None and (data is None or shared["created"] > data["created"]):
+            self._l1_set(key, shared)
+            data = shared
+        return data
+
+    def put(self, key, data, ttl):
+        self._l1_set(key, data)
+        self._l2("set", key, data, ttl)
+
+    def key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def acquire(self, key, wait=0):
+        """
+        Recompute lock of key, for this process and (through L2) the other workers.
+        wait: seconds to wait for the in-process lock (its stripe may be held for another key).
+        """
+        lock = self.key_lock(key)
+        if not (lock.acquire(timeout=wait) if wait > 0 else lock.acquire(blocking=False)):
+            return False
+        if self.store is not None and self._l2("acquire", key, LOCK_TIMEOUT) is False:
+            lock.release()
+            return False
+        return True
+
+    def release(self, key):
+        self._l2("release", key)
+        self.key_lock(key).release()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(_make_store())
+        return _cache
+
+
+def _pack(response, version):
+    headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS]
+    return {
+        "status": response.status_code,
+        "headers": headers,
+        "body": base64.b64encode(response.get_data()).decode("ascii"),
+        "version": version,
+        "created": time.time(),
+    }
+
+
+def _unpack(data, state):
+    response = Response(base64.b64decode(data["body"]), status=data["status"], headers=data["headers"])
+    response.headers["X-Cache"] = state
+    return response
+
+
+def cached_response(*tables, ttl=60, stale=30):
+    """
+    Decorator for GET views whose response only depends on the URL and on tables:
+    caches it in L1/L2 for ttl seconds and serves it stale for up to stale more
+    seconds while one worker renders the new one.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            cache = get_cache()
+            key = f"{request.endpoint}|{request.query_string.decode('latin-1')}"
+            version, _ = versions(tables)
+
+            def render():
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    cache.put(key, _pack(response, version), ttl + stale + L2_GRACE)
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            def state_of(data):
+                if data is None:
+                    return "gone"
+                age = time.time() - data["created"]
+                if data["version"] == version and age < ttl:
+                    return "fresh"
+                return "stale" if age < ttl + stale else "gone"
+
+            data = cache.local(key)
+            if state_of(data) != "fresh":
+                data = cache.get(key)
+            state = state_of(data)
+            if state == "fresh":
+                return _unpack(data, "HIT")
+
+            # a stale copy can be served right away, otherwise wait for the in-process
+            # lock: it is held for this key or for another one on the same stripe
+            wait = 0 if state == "stale" else _env_float("RESPONSE_CACHE_WAIT", RESPONSE_CACHE_WAIT)
+            if cache.acquire(key, wait):
+                try:
+                    # it may have been rendered while we were getting the lock
+                    data = cache.get(key)
+                    if state_of(data) == "fresh":
+                        return _unpack(data, "HIT")
+                    return render()
+                finally:
+                    cache.release(key)
+
+            if state == "stale":
+                return _unpack(data, "STALE")
+
+            # someone else is rendering it: wait for their result
+            deadline = time.monotonic() + _env_float("RESPONSE_CACHE_WAIT", RESPONSE_CACHE_WAIT)
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                data = cache.get(key)
+                if state_of(data) == "fresh":
+                    return _unpack(data, "HIT")
+            return render()
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+"""
+Name search for the views.
+
+contains_clause() builds the "name contains term" condition the views used to write
+as `col LIKE '%term%'`. When the column has a FULLTEXT ngram index (migration 0002)
+the condition becomes
+
+    MATCH(col) AGAINST ('"word"' IN BOOLEAN MODE) AND col LIKE '%term%'
+
+where word is the longest run of letters/digits in the term. Every row containing
+the term contains that word's ngrams in sequence, so MATCH finds all candidate rows
+through the index and the LIKE keeps the result exactly what the old substring
+filter returned. Without the index (migration not applied, or the term is too short
+for the ngram size) the plain LIKE is used.
+"""
+import re
+import threading
+import time
+
+from mysql.connector import Error
+
+# How long the list of FULLTEXT columns is trusted before it is read again (seconds),
+# so applying or rolling back the migration is picked up without a restart
+FULLTEXT_REFRESH = 60
+
+_lock = threading.Lock()
+_fulltext = {"columns": None, "ngram_size": 2, "loaded_at": 0.0}
+
+
+def _value(row):
+    if row is None:
+        return None
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def _load_fulltext(cursor):
+    """(set of (table, column) with a FULLTEXT index, ngram_token_size) of the current database."""
+    cursor.execute(
+        "SELECT table_name AS table_name, column_name AS column_name FROM information_schema.STATISTICS "
+        "WHERE table_schema = DATABASE() AND index_type = 'FULLTEXT'"
+    )
+    columns = set()
+    for row in cursor.fetchall():
+        table, column = (row["table_name"], row["column_name"]) if isinstance(row, dict) else row
+        columns.add((table.lower(), column.lower()))
+    try:
+        cursor.execute("SELECT @@ngram_token_size")
+        ngram_size = int(_value(cursor.fetchone()) or 2)
+    except Error:
+        ngram_size = 2
+    return columns, ngram_size
+
+
+def fulltext_info(cursor):
+    now = time.monotonic()
+    with _lock:
+        if _fulltext["columns"] is not None and now - _fulltext["loaded_at"] < FULLTEXT_REFRESH:
+            return _fulltext["columns"], _fulltext["ngram_size"]
+    try:
+        columns, ngram_size = _load_fulltext(cursor)
+    except Error as e:
+        print(f"Error reading FULLTEXT indexes, falling back to LIKE: {e}")
+        columns, ngram_size = set(), 2
+    with _lock:
+        _fulltext.update(columns=columns, ngram_size=ngram_size, loaded_at=now)
+    return columns, ngram_size
+
+
+def reset_fulltext_cache():
+    with _lock:
+        _fulltext.update(columns=None, loaded_at=0.0)
+
+
+def boolean_phrase(word):
+    """Word as a quoted BOOLEAN MODE phrase."""
+    return f'"{word}"'
+
+
+def contains_clause(cursor, table, column, term, alias=None):
+    """
+    SQL condition and params for "column contains term" (case-insensitive, like LIKE).
+    table/column name the indexed column, alias is what the query calls the table.
+    """
+    ref = f"{alias or table}.{column}"
+    pattern = f"%{term}%"
+    columns, ngram_size = fulltext_info(cursor)
+    word = max(re.findall(r"\w+", term), key=len, default="")
+    usable = (
+        (table.lower(), column.lower()) in columns
+        # shorter words produce no ngram token, LIKE wildcards have no FULLTEXT equivalent
+        and len(word) >= ngram_size
+        and "%" not in term and "_" not in term
+    )
+    if not usable:
+        return f"{ref} LIKE %s", [pattern]
+    return f"(MATCH({ref}) AGAINST (%s IN BOOLEAN MODE) AND {ref} LIKE %s)", [boolean_phrase(word), pattern]
@@ -0,0 +1,204 @@
+"""
+Table version counters and conditional GET for the JSON APIs.
+
+Every write path reports the tables it changed with tables_changed() after its
+commit (the loader with bump() at the end of a load). The versions live in the
+TableVersions table (migration 0005) so all app workers and the loader share them;
+a worker reads that table at most every TABLE_VERSION_POLL seconds and right after
+its own writes, so most requests check their validators without a query. Versions
+changed by someone else also reach the on_change listeners (the in-process caches).
+
+@conditional(*tables) on a GET view sends an ETag (built from the versions of the
+tables the view reads, plus the query string) and a Last-Modified, and answers a
+matching If-None-Match with 304 Not Modified without running the view.
+If-Modified-Since is not used for 304s: Last-Modified has whole-second resolution, so
+a second write in the same second would look unchanged to it while the ETag differs.
+
+Without the TableVersions table the versions are counted per process only and the
+ETags carry a per-process id, so a client never gets a 304 for a write another
+worker made.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from mysql.connector import Error, errorcode
+
+from app.db import get_pool
+
+TABLE_VERSION_POLL = 2
+
+TABLE_VERSIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS TableVersions (
+        table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+_BUMP_SQL = """
+    INSERT INTO TableVersions (table_name, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+_BOOT_ID = uuid.uuid4().hex[:8]
+_BOOT_TIME = time.time()
+
+_lock = threading.Lock()
+# shared: {table: (version, updated_at epoch)} from TableVersions, None while unknown/missing
+_state = {"shared": None, "polled_at": 0.0}
+# per-process: {table: (version, epoch)}, used when TableVersions does not exist
+_local = {}
+_listeners = []
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _missing_table(e):
+    return getattr(e, "errno", None) == errorcode.ER_NO_SUCH_TABLE
+
+
+@contextmanager
+def _primary():
+    # from the primary (a lagging replica would hand out old versions), borrowed for the
+    # one statement only: nothing returns request-less connections (the loader, scripts)
+    # to the pool, and a read-only request should not hold a primary connection
+    conn = get_pool().acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def on_change(listener):
+    """Registers listener(*tables), called by tables_changed() (cache invalidation)."""
+    _listeners.append(listener)
+    return listener
+
+
+def bump(cursor, tables):
+    """Increments the shared versions of tables. Returns False when TableVersions does not exist."""
+    try:
+        for table in tables:
+            cursor.execute(_BUMP_SQL, (table.lower(),))
+    except Error as e:
+        if not _missing_table(e):
+            raise
+        return False
+    return True
+
+
+def tables_changed(*tables):
+    """
+    Called by the write views after their commit: bumps the versions of tables
+    (in TableVersions, committed on its own) and notifies the listeners.
+    """
+    for listener in _listeners:
+        listener(*tables)
+
+    shared = False
+    try:
+        with _primary() as conn:
+            cursor = conn.cursor()
+            try:
+                shared = bump(cursor, tables)
+                conn.commit()
+            finally:
+                cursor.close()
+    except Error as e:
+        print(f"Error bumping table versions: {e}")
+    now = time.time()
+    with _lock:
+        if not shared:
+            for table in tables:
+                version, _ = _local.get(table.lower(), (0, _BOOT_TIME))
+                _local[table.lower()] = (version + 1, now)
+        # read the shared versions again on the next conditional request
+        _state["polled_at"] = 0.0
+
+
+def _poll():
+    try:
+        with _primary() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT table_name, version, UNIX_TIMESTAMP(updated_at) FROM TableVersions")
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    except Error as e:
+        if not _missing_table(e):
+            print(f"Error reading table versions: {e}")
+        return None
+    return {name.lower(): (int(version), float(updated_at)) for name, version, updated_at in rows}
+
+
+def versions(tables):
+    """(version token, last modified epoch) of a set of tables."""
+    now = time.monotonic()
+    with _lock:
+        fresh = now - _state["polled_at"] < _env_float("TABLE_VERSION_POLL", TABLE_VERSION_POLL)
+    if not fresh:
+        shared = _poll()
+        with _lock:
+            previous = _state["shared"]
+            _state.update(shared=shared, polled_at=now)
+        # writes by other workers or the loader: drop what the caches hold for those tables
+        if previous is not None and shared is not None:
+            changed = [t for t, (version, _) in shared.items() if previous.get(t, (0, 0))[0] != version]
+            if changed:
+                for listener in _listeners:
+                    listener(*changed)
+
+    with _lock:
+        shared = _state["shared"]
+        parts, last_modified = [], 0.0
+        for table in sorted(t.lower() for t in tables):
+            if shared is not None:
+                version, updated_at = shared.get(table, (0, _BOOT_TIME))
+            else:
+                version, updated_at = _local.get(table, (0, _BOOT_TIME))
+            parts.append(f"{table}:{version}")
+            last_modified = max(last_modified, updated_at)
+        if shared is None:
+            parts.append(_BOOT_ID)
+    return ",".join(parts), last_modified
+
+
+def conditional(*tables):
+    """Decorator for GET JSON views: ETag / Last-Modified from the table versions, 304 when the ETag matches."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            token, last_modified = versions(tables)
+            # the date too: age filters depend on it
+            raw = f"{request.endpoint}|{request.query_string.decode('latin-1')}|{token}|{date.today()}"
+            etag = hashlib.md5(raw.encode("utf-8")).hexdigest()[:20]
+            modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+
+            # the ETag only: see the module docstring about If-Modified-Since
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = modified
+            # cacheable, but always revalidated
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
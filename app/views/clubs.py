@@ -1,5 +1,9 @@
 from flask import Blueprint, render_template, jsonify, request, abort
-from app.db import get_db_connection
+from app.db import cached_query, get_db_connection
+from app import club_finance, pair_stats
+from app.competition_stats import competition_stats, invalidate_clubs, invalidate_competitions
+from app.reference_data import reference_response
+from app.table_versions import tables_changed
 from mysql.connector import Error
 
 clubs_bp = Blueprint('clubs', __name__)
@@ -10,66 +14,10 @@ def manage_clubs_page():
     return render_template("clubs.html")
 
 
-@clubs_bp.route("/api/competitions", methods=["GET"])
-def get_competitions():
-    """Get all competitions for dropdown selection"""
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({"error": "Database connection failed"}), 500
-            
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT 
-                competition_id, 
-                competition_name, 
-                country_name 
-            FROM Competitions 
-            ORDER BY country_name ASC, competition_name ASC
-        """
-        cursor.execute(query)
-        competitions = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-        return jsonify(competitions)
-    except Error as e:
-        print(f"Error fetching competitions: {e}")
-        return jsonify({"error": "Failed to retrieve competitions"}), 500
-
-
 @clubs_bp.route("/api/clubs_list", methods=["GET"])
 def get_all_clubs():
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({"error": "Database connection failed"}), 500
-            
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT 
-                c.club_id, 
-                c.club_code, 
-                c.name, 
-                c.squad_size, 
-                c.average_age, 
-                c.stadium_name, 
-                c.stadium_seats, 
-                c.url,
-                c.competition_id,
-                comp.country_name
-            FROM Clubs c
-            LEFT JOIN Competitions comp ON c.competition_id = comp.competition_id
-            ORDER BY c.name ASC
-        """
-        cursor.execute(query)
-        clubs = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-        return jsonify(clubs)
+        return reference_response("clubs_list")
     except Error as e:
         print(f"Error fetching clubs: {e}")
         return jsonify({"error": "Failed to retrieve clubs"}), 500
@@ -104,6 +52,8 @@ def add_club():
         cursor.execute(query, (club_id, club_code, name, competition_id, squad_size, average_age, stadium_name, stadium_seats, url))
 
         conn.commit()
+        tables_changed("Clubs")
+        invalidate_competitions(competition_id)
         cursor.close()
         conn.close()
         return jsonify({"success": True, "message": "Club added successfully"})
@@ -142,6 +92,10 @@ def update_club(club_id):
         
         cursor.execute(query, (name, club_code, competition_id, squad_size, average_age, stadium_name, stadium_seats, url, club_id))
         conn.commit()
+        tables_changed("Clubs")
+        # its old competition (if it moved) and the new one
+        invalidate_clubs(club_id)
+        invalidate_competitions(competition_id)
 
         cursor.close()
         conn.close()
@@ -161,8 +115,12 @@ def delete_club(club_id):
 
         query = "DELETE FROM Clubs WHERE club_id = %s"
         cursor.execute(query, (club_id,))
+        club_finance.forget_club(cursor, club_id)
+        pair_stats.forget_club(cursor, club_id)
         
         conn.commit()
+        tables_changed("Clubs", "Players", "Games", "Transfers", "ClubFinance", "ClubSeasonFinance", "ClubPairStats")
+        invalidate_clubs(club_id)
         cursor.close()
         conn.close()
         
@@ -217,22 +175,10 @@ def club_details(club_id):
         if not club_data:
             abort(404, description=f"Club with ID {club_id} not found")
         
-        # Get other clubs in the same league (competition)
+        # Other clubs in the same league (competition), from the cached competition aggregates
         if club_data['competition_id']:
-            other_clubs_query = """
-                SELECT 
-                    c2.club_id,
-                    c2.name AS club_name,
-                    c2.club_code,
-                    c2.average_age,
-                    c2.squad_size
-                FROM Clubs c2
-                WHERE c2.competition_id = %s
-                AND c2.club_id != %s
-                ORDER BY c2.name ASC
-            """
-            cursor.execute(other_clubs_query, (club_data['competition_id'], club_id))
-            other_clubs = cursor.fetchall()
+            competition = competition_stats(cursor, club_data['competition_id'])
+            other_clubs = [c for c in competition['clubs'] if c['club_id'] != club_id]
         else:
             other_clubs = []
         
@@ -262,8 +208,8 @@ def club_details(club_id):
             ORDER BY t.transfer_season DESC, t.transfer_date DESC
             LIMIT 50
         """
-        cursor.execute(transfers_query, (club_id, club_id))
-        transfers = cursor.fetchall()
+        # cached until Transfers, Players or Clubs change
+        transfers = cached_query(cursor, transfers_query, (club_id, club_id), dictionary=True)
         
         # Parse transfers by season JSON (if MySQL version supports JSON_ARRAYAGG)
         # Otherwise, we'll group transfers by season in Python
@@ -290,7 +236,19 @@ def club_details(club_id):
                 transfers_by_season[season]['transfers_out_count'] += 1
                 if transfer['transfer_fee']:
                     transfers_by_season[season]['total_earned'] += transfer['transfer_fee']
-        
+
+        # Season totals from the ClubSeasonFinance summary cover every transfer of the
+        # season, not just the 50 listed above (the Python sums stay as the fallback)
+        season_totals = club_finance.season_totals(cursor, club_id)
+        if season_totals is not None:
+            for season, entry in transfers_by_season.items():
+                totals = season_totals.get(season)
+                if totals:
+                    entry['total_spent'] = totals['spent']
+                    entry['total_earned'] = totals['earned']
+                    entry['transfers_in_count'] = totals['transfers_in']
+                    entry['transfers_out_count'] = totals['transfers_out']
+
         # Convert to list and sort by season (descending)
         transfers_by_season_list = sorted(
             transfers_by_season.values(),
@@ -1,5 +1,12 @@
 from flask import Blueprint, render_template, jsonify, request
-from app.db import get_db_connection
+from app.db import cached_query, get_db_connection
+from app import pair_stats
+from app.counts import count_mode, count_total
+from app.pagination import Keyset, finish_page, plan_page
+from app.reference_data import reference_response
+from app.response_cache import cached_response
+from app.search import contains_clause
+from app.table_versions import conditional, tables_changed
 from mysql.connector import Error
 
 games_bp = Blueprint('games', __name__)
@@ -11,36 +18,22 @@ def manage_games_page():
 @games_bp.route("/api/clubs", methods=["GET"])
 def get_clubs():
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({"error": "Database connection failed"}), 500
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT club_id, name FROM Clubs ORDER BY name") 
-        clubs = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(clubs)
+        return reference_response("clubs")
     except Error as e:
         print(f"Error fetching clubs: {e}")
         return jsonify({"error": "Failed to retrieve clubs"}), 500
 
 @games_bp.route("/api/competitions", methods=["GET"])
 def get_competitions():
+    # Shared by the games and clubs pages (competition_id, competition_name, country_name)
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({"error": "Database connection failed"}), 500
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT competition_id, competition_name FROM Competitions ORDER BY competition_name")
-        competitions = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(competitions)
+        return reference_response("competitions")
     except Error as e:
         print(f"Error fetching competitions: {e}")
         return jsonify({"error": "Failed to retrieve competitions"}), 500
 
 @games_bp.route("/api/games", methods=["GET"])
+@conditional("Games", "Clubs", "Competitions")
 def get_games():
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
@@ -48,7 +41,6 @@ def get_games():
         page = 1
     if per_page < 1:
         per_page = 10
-    offset = (page - 1) * per_page
 
     # Filters
     home_filter = request.args.get("home", type=str)
@@ -71,11 +63,13 @@ def get_games():
         params = []
 
         if home_filter:
-            where_clauses.append("hc.name LIKE %s")
-            params.append(f"%{home_filter}%")
+            contains_sql, contains_params = contains_clause(cursor, "Clubs", "name", home_filter, alias="hc")
+            where_clauses.append(contains_sql)
+            params.extend(contains_params)
         if away_filter:
-            where_clauses.append("ac.name LIKE %s")
-            params.append(f"%{away_filter}%")
+            contains_sql, contains_params = contains_clause(cursor, "Clubs", "name", away_filter, alias="ac")
+            where_clauses.append(contains_sql)
+            params.extend(contains_params)
         if season_filter:
             where_clauses.append("g.season = %s")
             params.append(season_filter)
@@ -104,9 +98,25 @@ def get_games():
             "attendance": "g.attendance",
         }
         sort_col = sort_map.get(sort, "g.date")
+        # Result key of the sort column (the goals sort is computed like the SQL expression)
+        sort_keys = {
+            "g.date": "date",
+            "g.season": "season",
+            "hc.name": "home_club",
+            "ac.name": "away_club",
+            "g.competition_id": "competition_id",
+            "g.away_club_goals": "away_club_goals",
+            "g.stadium": "stadium",
+            "g.attendance": "attendance",
+        }
+        sort_key = sort_keys.get(sort_col)
         if sort_col == "g.home_club_goals":
             sort_col = "(g.home_club_goals + g.away_club_goals)"
+            sort_key = lambda row: (None if row["home_club_goals"] is None or row["away_club_goals"] is None
+                                    else row["home_club_goals"] + row["away_club_goals"])
         sort_dir = "ASC" if order == "asc" else "DESC"
+        keyset = Keyset(sort_col, sort_dir, sort_key, "g.game_id", "DESC", "game_id")
+        position = keyset.decode(request.args.get("cursor", type=str))
 
         # Total count for pagination
         count_query = f"""
@@ -116,9 +126,20 @@ def get_games():
             JOIN Clubs ac ON g.away_club_id = ac.club_id
             {where_sql}
         """
-        cursor.execute(count_query, tuple(params))
-        total_count_row = cursor.fetchone() or {"total": 0}
-        total_count = total_count_row["total"]
+        # cached / estimated / skipped, see app/counts.py
+        count_filters = {
+            "home": home_filter, "away": away_filter, "season": season_filter,
+            "competition": competition_filter, "date_from": date_from, "date_to": date_to,
+        }
+        total_count, total_is_estimate = count_total(
+            cursor, "games", ("Games", "Clubs"), count_filters, count_query, params, count_mode(request.args)
+        )
+        total_pages = (total_count + per_page - 1) // per_page if total_count is not None else None
+
+        # A cursor seeks past the previous page's last row, page numbers use OFFSET
+        read = plan_page(keyset, position, page, per_page, total_count)
+        if read.seek_sql:
+            where_sql = f"{where_sql} AND {read.seek_sql}" if where_sql else f"WHERE {read.seek_sql}"
 
         query = f"""
             SELECT 
@@ -131,27 +152,128 @@ def get_games():
             JOIN Clubs hc ON g.home_club_id = hc.club_id
             JOIN Clubs ac ON g.away_club_id = ac.club_id
             {where_sql}
-            ORDER BY {sort_col} {sort_dir}, g.game_id DESC
-            LIMIT %s OFFSET %s
+            ORDER BY {read.order_by}
+            {read.limit_sql}
         """
 
-        cursor.execute(query, tuple(params + [per_page, offset]))
-        games = cursor.fetchall()
+        # the same filter page is served from the query cache until Games/Clubs change
+        rows = cached_query(cursor, query, params + read.seek_params + read.limit_params, dictionary=True)
+        games, prev_cursor, next_cursor, last_cursor = finish_page(
+            keyset, read, rows, per_page, None if total_is_estimate else total_pages
+        )
+        page = read.page
         cursor.close()
         conn.close()
-        total_pages = (total_count + per_page - 1) // per_page if per_page else 1
         return jsonify({
             "games": games,
             "current_page": page,
             "total_pages": total_pages,
-            "total_count": total_count
+            "total_count": total_count,
+            "total_is_estimate": total_is_estimate,
+            "prev_cursor": prev_cursor,
+            "next_cursor": next_cursor,
+            "last_cursor": last_cursor
         })
     except Error as e:
         print(f"Error fetching games: {e}")
         return jsonify({"error": "Failed to retrieve games"}), 500
 
 
+def _scan_head_to_head(cursor, home_id, away_id):
+    """Last games, summary and biggest win of a pair straight from Games (without ClubPairStats)."""
+    # Last 5 head-to-head games
+    cursor.execute(
+        """
+        SELECT 
+            g.game_id, g.date, g.season,
+            g.home_club_id, g.away_club_id,
+            hc.name AS home_club, ac.name AS away_club,
+            g.home_club_goals, g.away_club_goals,
+            ABS(g.home_club_goals - g.away_club_goals) AS goal_diff
+        FROM Games g
+        JOIN Clubs hc ON g.home_club_id = hc.club_id
+        JOIN Clubs ac ON g.away_club_id = ac.club_id
+        WHERE (g.home_club_id = %s AND g.away_club_id = %s)
+           OR (g.home_club_id = %s AND g.away_club_id = %s)
+        ORDER BY g.date DESC
+        LIMIT 5
+        """,
+        (home_id, away_id, away_id, home_id),
+    )
+    last_games = cursor.fetchall() or []
+
+    # Summary stats
+    cursor.execute(
+        """
+        SELECT
+            COUNT(*) AS matches,
+            SUM(
+                CASE 
+                    WHEN (g.home_club_id = %s AND g.home_club_goals > g.away_club_goals)
+                      OR (g.away_club_id = %s AND g.away_club_goals > g.home_club_goals)
+                    THEN 1 ELSE 0 END
+            ) AS home_wins,
+            SUM(
+                CASE 
+                    WHEN (g.home_club_id = %s AND g.home_club_goals > g.away_club_goals)
+                      OR (g.away_club_id = %s AND g.away_club_goals > g.home_club_goals)
+                    THEN 1 ELSE 0 END
+            ) AS away_wins,
+            SUM(CASE WHEN g.home_club_goals = g.away_club_goals THEN 1 ELSE 0 END) AS draws,
+            SUM(
+                CASE 
+                    WHEN g.home_club_id = %s THEN g.home_club_goals
+                    WHEN g.away_club_id = %s THEN g.away_club_goals
+                    ELSE 0 END
+            ) AS home_goals,
+            SUM(
+                CASE 
+                    WHEN g.home_club_id = %s THEN g.home_club_goals
+                    WHEN g.away_club_id = %s THEN g.away_club_goals
+                    ELSE 0 END
+            ) AS away_goals,
+            AVG(g.home_club_goals + g.away_club_goals) AS avg_goals,
+            AVG(g.attendance) AS avg_attendance
+        FROM Games g
+        WHERE (g.home_club_id = %s AND g.away_club_id = %s)
+           OR (g.home_club_id = %s AND g.away_club_id = %s)
+        """,
+        (
+            home_id, home_id,  # home wins
+            away_id, away_id,  # away wins
+            home_id, home_id,  # home goals
+            away_id, away_id,  # away goals
+            home_id, away_id, away_id, home_id,  # filter
+        ),
+    )
+    summary_row = cursor.fetchone() or {}
+
+    # Biggest win (highest goal difference)
+    cursor.execute(
+        """
+        SELECT 
+            g.game_id, g.date, g.season,
+            g.home_club_id, g.away_club_id,
+            hc.name AS home_club, ac.name AS away_club,
+            g.home_club_goals, g.away_club_goals,
+            (g.home_club_goals - g.away_club_goals) AS diff
+        FROM Games g
+        JOIN Clubs hc ON g.home_club_id = hc.club_id
+        JOIN Clubs ac ON g.away_club_id = ac.club_id
+        WHERE (g.home_club_id = %s AND g.away_club_id = %s)
+           OR (g.home_club_id = %s AND g.away_club_id = %s)
+        ORDER BY ABS(g.home_club_goals - g.away_club_goals) DESC, g.date DESC
+        LIMIT 1
+        """,
+        (home_id, away_id, away_id, home_id),
+    )
+    biggest_win = cursor.fetchone()
+    return last_games, summary_row, biggest_win
+
+
 @games_bp.route("/api/games/head2head", methods=["GET"])
+@conditional("Games", "Clubs", "Players", "Transfers", "ClubPairStats")
+@cached_response("Games", "Clubs", "Players", "Transfers", "ClubPairStats", ttl=120, stale=30)
 def head_to_head():
     home_id = request.args.get("home_id", type=int)
     away_id = request.args.get("away_id", type=int)
@@ -171,104 +293,65 @@ def head_to_head():
             """
             SELECT 
                 c.club_id, c.name, c.squad_size, c.average_age,
-                (SELECT COUNT(*) FROM Players p WHERE p.current_club_id = c.club_id) AS player_count,
-                (SELECT COALESCE(SUM(p.market_value), 0) FROM Players p WHERE p.current_club_id = c.club_id) AS total_value,
-                (SELECT AVG(p.market_value) FROM Players p WHERE p.current_club_id = c.club_id) AS avg_value
+                COALESCE(ps.player_count, 0) AS player_count,
+                COALESCE(ps.total_value, 0) AS total_value,
+                ps.avg_value
             FROM Clubs c
+            -- one pass over the two squads instead of three subqueries per club
+            LEFT JOIN (
+                SELECT p.current_club_id, COUNT(*) AS player_count,
+                       SUM(p.market_value) AS total_value, AVG(p.market_value) AS avg_value
+                FROM Players p
+                WHERE p.current_club_id IN (%s, %s)
+                GROUP BY p.current_club_id
+            ) ps ON ps.current_club_id = c.club_id
             WHERE c.club_id IN (%s, %s)
             """,
-            (home_id, away_id),
+            (home_id, away_id, home_id, away_id),
         )
         clubs_raw = cursor.fetchall() or []
         club_info = {row["club_id"]: row for row in clubs_raw}
 
-        # Last 5 head-to-head games
-        cursor.execute(
-            """
-            SELECT 
-                g.game_id, g.date, g.season,
-                g.home_club_id, g.away_club_id,
-                hc.name AS home_club, ac.name AS away_club,
-                g.home_club_goals, g.away_club_goals,
-                ABS(g.home_club_goals - g.away_club_goals) AS goal_diff
-            FROM Games g
-            JOIN Clubs hc ON g.home_club_id = hc.club_id
-            JOIN Clubs ac ON g.away_club_id = ac.club_id
-            WHERE (g.home_club_id = %s AND g.away_club_id = %s)
-               OR (g.home_club_id = %s AND g.away_club_id = %s)
-            ORDER BY g.date DESC
-            LIMIT 5
-            """,
-            (home_id, away_id, away_id, home_id),
-        )
-        last_games = cursor.fetchall() or []
-
-        # Summary stats
-        cursor.execute(
-            """
-            SELECT
-                COUNT(*) AS matches,
-                SUM(
-                    CASE 
-                        WHEN (g.home_club_id = %s AND g.home_club_goals > g.away_club_goals)
-                          OR (g.away_club_id = %s AND g.away_club_goals > g.home_club_goals)
-                        THEN 1 ELSE 0 END
-                ) AS home_wins,
-                SUM(
-                    CASE 
-                        WHEN (g.home_club_id = %s AND g.home_club_goals > g.away_club_goals)
-                          OR (g.away_club_id = %s AND g.away_club_goals > g.home_club_goals)
-                        THEN 1 ELSE 0 END
-                ) AS away_wins,
-                SUM(CASE WHEN g.home_club_goals = g.away_club_goals THEN 1 ELSE 0 END) AS draws,
-                SUM(
-                    CASE 
-                        WHEN g.home_club_id = %s THEN g.home_club_goals
-                        WHEN g.away_club_id = %s THEN g.away_club_goals
-                        ELSE 0 END
-                ) AS home_goals,
-                SUM(
-                    CASE 
-                        WHEN g.home_club_id = %s THEN g.home_club_goals
-                        WHEN g.away_club_id = %s THEN g.away_club_goals
-                        ELSE 0 END
-                ) AS away_goals,
-                AVG(g.home_club_goals + g.away_club_goals) AS avg_goals,
-                AVG(g.attendance) AS avg_attendance
-            FROM Games g
-            WHERE (g.home_club_id = %s AND g.away_club_id = %s)
-               OR (g.home_club_id = %s AND g.away_club_id = %s)
-            """,
-            (
-                home_id, home_id,  # home wins
-                away_id, away_id,  # away wins
-                home_id, home_id,  # home goals
-                away_id, away_id,  # away goals
-                home_id, away_id, away_id, home_id,  # filter
-            ),
-        )
-        summary_row = cursor.fetchone() or {}
-
-        # Biggest win (highest goal difference)
-        cursor.execute(
-            """
-            SELECT 
-                g.game_id, g.date, g.season,
-                g.home_club_id, g.away_club_id,
-                hc.name AS home_club, ac.name AS away_club,
-                g.home_club_goals, g.away_club_goals,
-                (g.home_club_goals - g.away_club_goals) AS diff
-            FROM Games g
-            JOIN Clubs hc ON g.home_club_id = hc.club_id
-            JOIN Clubs ac ON g.away_club_id = ac.club_id
-            WHERE (g.home_club_id = %s AND g.away_club_id = %s)
-               OR (g.home_club_id = %s AND g.away_club_id = %s)
-            ORDER BY ABS(g.home_club_goals - g.away_club_goals) DESC, g.date DESC
-            LIMIT 1
-            """,
-            (home_id, away_id, away_id, home_id),
-        )
-        biggest_win = cursor.fetchone()
+        # Pair summary from ClubPairStats (one keyed row), the listed games by id
+        stats = pair_stats.lookup(cursor, home_id, away_id)
+        if stats is None:
+            last_games, summary_row, biggest_win = _scan_head_to_head(cursor, home_id, away_id)
+        else:
+            summary_row = stats
+            game_ids = list(stats["last_game_ids"])
+            if stats["biggest_win_game_id"] is not None:
+                game_ids.append(stats["biggest_win_game_id"])
+            games_by_id = {}
+            if game_ids:
+                placeholders = ", ".join(["%s"] * len(game_ids))
+                cursor.execute(
+                    f"""
+                    SELECT 
+                        g.game_id, g.date, g.season,
+                        g.home_club_id, g.away_club_id,
+                        hc.name AS home_club, ac.name AS away_club,
+                        g.home_club_goals, g.away_club_goals
+                    FROM Games g
+                    JOIN Clubs hc ON g.home_club_id = hc.club_id
+                    JOIN Clubs ac ON g.away_club_id = ac.club_id
+                    WHERE g.game_id IN ({placeholders})
+                    """,
+                    tuple(game_ids),
+                )
+                games_by_id = {row["game_id"]: row for row in cursor.fetchall()}
+
+            def with_diff(game, key, diff):
+                game = dict(game)
+                if game["home_club_goals"] is None or game["away_club_goals"] is None:
+                    game[key] = None
+                else:
+                    game[key] = diff(game["home_club_goals"] - game["away_club_goals"])
+                return game
+
+            last_games = [with_diff(games_by_id[i], "goal_diff", abs)
+                          for i in stats["last_game_ids"] if i in games_by_id]
+            biggest = games_by_id.get(stats["biggest_win_game_id"])
+            biggest_win = with_diff(biggest, "diff", lambda d: d) if biggest else None
 
         # Most expensive transfer between the two clubs (any direction)
         cursor.execute(
@@ -333,6 +416,7 @@ def head_to_head():
         return jsonify({"error": "Failed to retrieve head-to-head stats"}), 500
 
 @games_bp.route("/api/games/<int:game_id>", methods=["GET"])
+@conditional("Games")
 def get_game_details(game_id):
     try:
         conn = get_db_connection()
@@ -370,7 +454,9 @@ def add_game():
             data['home_club_id'], data['away_club_id'], data['season'], data['date'], 
             data['home_club_goals'], data['away_club_goals'], data.get('stadium'), data.get('attendance'), data['competition_id']
         ))
+        pair_stats.refresh_pair(cursor, data['home_club_id'], data['away_club_id'])
         conn.commit()
+        tables_changed("Games", "ClubPairStats")
         cursor.close()
         conn.close()
         return jsonify({"success": True, "message": "Game added successfully"})
@@ -397,9 +483,13 @@ def update_game(game_id):
             data['date'], data['season'], data['home_club_goals'], data['away_club_goals'],
             data.get('stadium'), data.get('attendance'), data.get('competition_id'), game_id
         ))
+        updated_rows = cursor.rowcount
+        pair = pair_stats.game_pair(cursor, game_id)
+        if pair:
+            pair_stats.refresh_pair(cursor, *pair)
         conn.commit()
+        tables_changed("Games", "ClubPairStats")
         
-        updated_rows = cursor.rowcount
         cursor.close()
         conn.close()
 
@@ -418,10 +508,14 @@ def delete_game(game_id):
         if conn is None:
             return jsonify({"error": "Database connection failed"}), 500
         cursor = conn.cursor()
+        pair = pair_stats.game_pair(cursor, game_id)
         cursor.execute("DELETE FROM Games WHERE game_id = %s", (game_id,))
+        deleted_rows = cursor.rowcount
+        if pair:
+            pair_stats.refresh_pair(cursor, *pair)
         conn.commit()
+        tables_changed("Games", "ClubPairStats")
         
-        deleted_rows = cursor.rowcount
         cursor.close()
         conn.close()
 
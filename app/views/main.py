@@ -1,6 +1,6 @@
-from flask import Blueprint, jsonify, render_template
+from flask import Blueprint, abort, current_app, jsonify, render_template
 from mysql.connector import Error
-from app.db import get_db_connection
+from app.db import get_db_connection, pool_stats
 
 bp = Blueprint('main', __name__)
 
@@ -12,3 +12,12 @@ def home():
 def manage_clups_page():
     return render_template("clups.html")
 
+@bp.route("/api/db/pool")
+def db_pool_stats():
+    """
+    Connection pool and query cache statistics, used to size the pool for the worker count.
+    Only served with DB_POOL_STATS=true (it lists the replica hosts).
+    """
+    if not current_app.config.get('DB_POOL_STATS'):
+        abort(404)
+    return jsonify(pool_stats())
@@ -1,6 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from app.db import get_db_connection
+from app import club_finance
+from app.competition_stats import competition_stats, invalidate_clubs, player_club
+from app.counts import count_mode, count_total
+from app.pagination import Keyset, finish_page, plan_page
+from app.reference_data import reference_response
+from app.table_versions import conditional, tables_changed
 from mysql.connector import Error
+from datetime import date
 
 # Blueprint Definition
 players_bp = Blueprint('players', __name__, url_prefix='/players')
@@ -14,6 +21,7 @@ def index():
 
 # API: Get all players
 @players_bp.route('/api/players', methods=['GET'])
+@conditional('Players', 'Clubs')
 def get_players():
     try:
         conn = get_db_connection()
@@ -44,22 +52,27 @@ def get_players():
         if order_direction not in ['ASC', 'DESC']:
             order_direction = 'ASC'
         
-        # Map order_by to actual column names or expressions
+        # Map order_by to actual column names
         order_by_map = {
             'name': 'p.name',
             'market_value': 'p.market_value',
             'date_of_birth': 'p.date_of_birth',
-            'age': 'TIMESTAMPDIFF(YEAR, p.date_of_birth, CURDATE())',  # Calculate age
+            'age': 'p.date_of_birth',  # age order = reversed birth date order (uses the date_of_birth index)
             'position': 'p.position',
             'country_of_citizenship': 'p.country_of_citizenship',
             'club_name': 'c.name'
         }
         order_by_column = order_by_map.get(order_by, 'p.name')
+        if order_by == 'age':
+            order_direction = 'DESC' if order_direction == 'ASC' else 'ASC'
+        # Result key of the sort column, player_id breaks ties (keyset pagination needs a unique order)
+        order_by_key = 'date_of_birth' if order_by == 'age' else order_by
+        keyset = Keyset(order_by_column, order_direction, order_by_key, 'p.player_id', order_direction, 'player_id')
+        position = keyset.decode(request.args.get('cursor', '').strip())
         
         # Get pagination parameters
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))  # 50 players per page
-        offset = (page - 1) * per_page
         
         # Base query
         base_query = """
@@ -123,11 +136,13 @@ def get_players():
             where_conditions.append("p.foot = %s")
             params.append(filter_foot)
         
-        # Age range filters
+        # Age range filters, as birth date ranges so the date_of_birth index can be used:
+        # age >= n  <=>  born on or before today - n years
+        # age <= n  <=>  born after today - (n + 1) years
         if filter_min_age:
             try:
                 min_age_int = int(filter_min_age)
-                where_conditions.append("TIMESTAMPDIFF(YEAR, p.date_of_birth, CURDATE()) >= %s")
+                where_conditions.append("p.date_of_birth <= DATE_SUB(CURDATE(), INTERVAL %s YEAR)")
                 params.append(min_age_int)
             except ValueError:
                 pass
@@ -135,8 +150,8 @@ def get_players():
         if filter_max_age:
             try:
                 max_age_int = int(filter_max_age)
-                where_conditions.append("TIMESTAMPDIFF(YEAR, p.date_of_birth, CURDATE()) <= %s")
-                params.append(max_age_int)
+                where_conditions.append("p.date_of_birth > DATE_SUB(CURDATE(), INTERVAL %s YEAR)")
+                params.append(max_age_int + 1)
             except ValueError:
                 pass
         
@@ -145,21 +160,33 @@ def get_players():
         if where_conditions:
             where_clause = " WHERE " + " AND ".join(where_conditions)
         
-        # Get total count
-        count_query_with_where = count_query + where_clause
-        if where_clause:
-            cursor.execute(count_query_with_where, params)
-        else:
-            cursor.execute(count_query)
-        total_count = cursor.fetchone()['total']
-        total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
+        # Get total count (cached / estimated / skipped, see app/counts.py)
+        count_filters = {
+            'search': search_query, 'position': filter_position, 'sub_position': filter_sub_position,
+            'country': filter_country, 'club_id': filter_club_id, 'foot': filter_foot,
+            'min_age': filter_min_age, 'max_age': filter_max_age,
+        }
+        if filter_min_age or filter_max_age:
+            # age filters are relative to today
+            count_filters['today'] = date.today().isoformat()
+        total_count, total_is_estimate = count_total(
+            cursor, 'players', ('Players', 'Clubs'), count_filters,
+            count_query + where_clause, params, count_mode(request.args)
+        )
+        total_pages = (total_count + per_page - 1) // per_page if total_count is not None else None  # Ceiling division
         
-        # Get paginated data with sorting
+        # Get paginated data with sorting: page numbers use OFFSET, a cursor seeks
+        # past the last row of the previous page
         # Note: order_by_column is already validated against whitelist, so safe to use in f-string
-        query = base_query + where_clause + f" ORDER BY {order_by_column} {order_direction} LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        cursor.execute(query, params)
-        players = cursor.fetchall()
+        read = plan_page(keyset, position, page, per_page, total_count)
+        if read.seek_sql:
+            where_clause += (" AND " if where_clause else " WHERE ") + read.seek_sql
+        query = base_query + where_clause + f" ORDER BY {read.order_by} {read.limit_sql}"
+        cursor.execute(query, params + read.seek_params + read.limit_params)
+        players, prev_cursor, next_cursor, last_cursor = finish_page(
+            keyset, read, cursor.fetchall(), per_page, None if total_is_estimate else total_pages
+        )
+        page = read.page
         
         cursor.close()
         conn.close()
@@ -170,7 +197,11 @@ def get_players():
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
-                'total_pages': total_pages
+                'total_pages': total_pages,
+                'total_is_estimate': total_is_estimate,
+                'prev_cursor': prev_cursor,
+                'next_cursor': next_cursor,
+                'last_cursor': last_cursor
             }
         })
     except Error as e:
@@ -182,13 +213,7 @@ def get_players():
 @players_bp.route('/api/clubs', methods=['GET'])
 def get_clubs():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT club_id, name FROM Clubs ORDER BY name")
-        clubs = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(clubs)
+        return reference_response("clubs")
     except Error as e:
         print(f"Error fetching clubs: {e}")
         return jsonify({"error": "Failed to retrieve clubs"}), 500
@@ -198,34 +223,8 @@ def get_clubs():
 @players_bp.route('/api/filters', methods=['GET'])
 def get_filter_values():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get distinct positions
-        cursor.execute("SELECT DISTINCT position FROM Players WHERE position IS NOT NULL AND position != '' ORDER BY position")
-        positions = [row['position'] for row in cursor.fetchall()]
-        
-        # Get distinct sub_positions
-        cursor.execute("SELECT DISTINCT sub_position FROM Players WHERE sub_position IS NOT NULL AND sub_position != '' ORDER BY sub_position")
-        sub_positions = [row['sub_position'] for row in cursor.fetchall()]
-        
-        # Get distinct countries
-        cursor.execute("SELECT DISTINCT country_of_citizenship FROM Players WHERE country_of_citizenship IS NOT NULL AND country_of_citizenship != '' ORDER BY country_of_citizenship")
-        countries = [row['country_of_citizenship'] for row in cursor.fetchall()]
-        
-        # Get distinct foot values
-        cursor.execute("SELECT DISTINCT foot FROM Players WHERE foot IS NOT NULL AND foot != '' ORDER BY foot")
-        feet = [row['foot'] for row in cursor.fetchall()]
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            'positions': positions,
-            'sub_positions': sub_positions,
-            'countries': countries,
-            'feet': feet
-        })
+        # positions, sub_positions, countries and feet, served from memory
+        return reference_response("player_filters")
     except Error as e:
         print(f"Error fetching filter values: {e}")
         return jsonify({"error": "Failed to retrieve filter values"}), 500
@@ -235,26 +234,9 @@ def get_filter_values():
 @players_bp.route('/api/sub-positions', methods=['GET'])
 def get_sub_positions_by_position():
     try:
+        # Sub positions of the selected position, or all of them without one
         position = request.args.get('position', '').strip()
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        if position:
-            # Get distinct sub_positions for the selected position
-            cursor.execute(
-                "SELECT DISTINCT sub_position FROM Players WHERE position = %s AND sub_position IS NOT NULL AND sub_position != '' ORDER BY sub_position",
-                (position,)
-            )
-        else:
-            # If no position selected, return all sub_positions
-            cursor.execute("SELECT DISTINCT sub_position FROM Players WHERE sub_position IS NOT NULL AND sub_position != '' ORDER BY sub_position")
-        
-        sub_positions = [row['sub_position'] for row in cursor.fetchall()]
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify({'sub_positions': sub_positions})
+        return reference_response("sub_positions", position.lower())
     except Error as e:
         print(f"Error fetching sub_positions: {e}")
         return jsonify({"error": "Failed to retrieve sub_positions"}), 500
@@ -279,6 +261,11 @@ def add_player():
     # Basic validation
     if not name:
         return jsonify({"error": "Player name is required"}), 400
+    if current_club_id is not None:
+        try:
+            current_club_id = int(current_club_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "current_club_id must be a number"}), 400
 
     try:
         conn = get_db_connection()
@@ -304,6 +291,8 @@ def add_player():
         )
         cursor.execute(query, values)
         conn.commit()
+        tables_changed('Players')
+        invalidate_clubs(current_club_id)
         cursor.close()
         conn.close()
         return jsonify({"success": True, "message": "Player added successfully"})
@@ -331,6 +320,7 @@ def player_detail(player_id):
                 p.last_season,
                 p.country_of_citizenship,
                 p.date_of_birth,
+                TIMESTAMPDIFF(YEAR, p.date_of_birth, CURDATE()) AS age,
                 p.position,
                 p.sub_position,
                 p.foot,
@@ -348,14 +338,8 @@ def player_detail(player_id):
             conn.close()
             return render_template('player_detail.html', player=None, error="Player not found")
         
-        # Calculate player age
-        player_age = None
-        if player.get('date_of_birth'):
-            age_query = "SELECT TIMESTAMPDIFF(YEAR, %s, CURDATE()) AS age"
-            cursor.execute(age_query, (player['date_of_birth'],))
-            age_result = cursor.fetchone()
-            if age_result:
-                player_age = age_result['age']
+        # Player age (computed by the query above, NULL without a birth date)
+        player_age = player.get('age')
         
         # Check if player is active
         is_active = player.get('last_season') is not None and player.get('last_season') >= 2023
@@ -387,64 +371,51 @@ def player_detail(player_id):
         if player_age is not None and player.get('club_average_age') is not None:
             club_age_stats['club_age_difference'] = round(player_age - player['club_average_age'], 1)
         
-        # Calculate league average age (weighted average)
+        # League averages, club list and club market values of the competition (cached per competition)
+        competition = None
         if player.get('club_competition_id'):
             try:
-                league_age_query = """
-                    SELECT
-                        SUM(c2.average_age * c2.squad_size) / SUM(c2.squad_size) AS league_avg_age
-                    FROM clubs c2
-                    WHERE c2.competition_id = %s
-                        AND c2.average_age IS NOT NULL
-                        AND c2.squad_size > 0
-                """
-                cursor.execute(league_age_query, (player['club_competition_id'],))
-                league_age_result = cursor.fetchone()
-                if league_age_result and league_age_result.get('league_avg_age'):
-                    club_age_stats['league_average_age'] = float(league_age_result['league_avg_age'])
-                    if player_age is not None:
-                        club_age_stats['league_age_difference'] = round(player_age - club_age_stats['league_average_age'], 1)
+                competition = competition_stats(cursor, player['club_competition_id'])
             except Error as e:
-                print(f"Error fetching league average age: {e}")
+                print(f"Error fetching competition aggregates: {e}")
+
+        # League average age (weighted average)
+        if competition and competition['league_average_age']:
+            club_age_stats['league_average_age'] = competition['league_average_age']
+            if player_age is not None:
+                club_age_stats['league_age_difference'] = round(player_age - club_age_stats['league_average_age'], 1)
         
         # Calculate club average market value (active players only)
         if player.get('current_club_id'):
-            try:
-                club_mv_query = """
-                    SELECT AVG(market_value) AS club_avg_mv
-                    FROM players
-                    WHERE current_club_id = %s
-                        AND market_value IS NOT NULL
-                        AND last_season >= 2023
-                """
-                cursor.execute(club_mv_query, (player['current_club_id'],))
-                club_mv_result = cursor.fetchone()
-                if club_mv_result and club_mv_result.get('club_avg_mv'):
-                    club_age_stats['club_average_market_value'] = float(club_mv_result['club_avg_mv'])
-                    if player.get('market_value') is not None:
-                        club_age_stats['club_mv_difference'] = player['market_value'] - club_age_stats['club_average_market_value']
-            except Error as e:
-                print(f"Error fetching club average market value: {e}")
-        
-        # Calculate league average market value (active players only)
-        if player.get('club_competition_id'):
-            try:
-                league_mv_query = """
-                    SELECT AVG(p2.market_value) AS league_avg_mv
-                    FROM players p2
-                    INNER JOIN clubs c2 ON p2.current_club_id = c2.club_id
-                    WHERE c2.competition_id = %s
-                        AND p2.market_value IS NOT NULL
-                        AND p2.last_season >= 2023
-                """
-                cursor.execute(league_mv_query, (player['club_competition_id'],))
-                league_mv_result = cursor.fetchone()
-                if league_mv_result and league_mv_result.get('league_avg_mv'):
-                    club_age_stats['league_average_market_value'] = float(league_mv_result['league_avg_mv'])
-                    if player.get('market_value') is not None:
-                        club_age_stats['league_mv_difference'] = player['market_value'] - club_age_stats['league_average_market_value']
-            except Error as e:
-                print(f"Error fetching league average market value: {e}")
+            club_avg_mv = None
+            if competition and player['current_club_id'] in competition['club_ids']:
+                club_avg_mv = competition['club_average_market_value'].get(player['current_club_id'])
+            else:
+                # club without a competition
+                try:
+                    club_mv_query = """
+                        SELECT AVG(market_value) AS club_avg_mv
+                        FROM players
+                        WHERE current_club_id = %s
+                            AND market_value IS NOT NULL
+                            AND last_season >= 2023
+                    """
+                    cursor.execute(club_mv_query, (player['current_club_id'],))
+                    club_mv_result = cursor.fetchone()
+                    if club_mv_result and club_mv_result.get('club_avg_mv'):
+                        club_avg_mv = float(club_mv_result['club_avg_mv'])
+                except Error as e:
+                    print(f"Error fetching club average market value: {e}")
+            if club_avg_mv:
+                club_age_stats['club_average_market_value'] = club_avg_mv
+                if player.get('market_value') is not None:
+                    club_age_stats['club_mv_difference'] = player['market_value'] - club_age_stats['club_average_market_value']
+        
+        # League average market value (active players only)
+        if competition and competition['league_average_market_value']:
+            club_age_stats['league_average_market_value'] = competition['league_average_market_value']
+            if player.get('market_value') is not None:
+                club_age_stats['league_mv_difference'] = player['market_value'] - club_age_stats['league_average_market_value']
         
         # Transfer History Query
         try:
@@ -494,6 +465,7 @@ def player_detail(player_id):
 
 # API: Get single player (for edit form)
 @players_bp.route('/api/players/<int:player_id>', methods=['GET'])
+@conditional('Players')
 def get_player(player_id):
     try:
         conn = get_db_connection()
@@ -546,8 +518,11 @@ def update_player(player_id):
             image_url if image_url else None,
             player_id
         )
+        club_id = player_club(cursor, player_id)
         cursor.execute(query, values)
         conn.commit()
+        tables_changed('Players')
+        invalidate_clubs(club_id)
         cursor.close()
         conn.close()
         return jsonify({"success": True, "message": "Player updated successfully"})
@@ -562,8 +537,13 @@ def delete_player(player_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        # the player's transfers go with it (ON DELETE CASCADE)
+        club_id = player_club(cursor, player_id)
+        club_finance.apply_transfers(cursor, "player_id = %s", (player_id,), sign=-1)
         cursor.execute("DELETE FROM Players WHERE player_id = %s", (player_id,))
         conn.commit()
+        tables_changed('Players', 'Transfers', 'ClubFinance', 'ClubSeasonFinance')
+        invalidate_clubs(club_id)
         cursor.close()
         conn.close()
         return jsonify({"success": True, "message": "Player deleted successfully"})
@@ -1,5 +1,12 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from app.db import get_db_connection 
+from app import club_finance
+from app.competition_stats import invalidate_clubs
+from app.counts import count_mode, count_total
+from app.pagination import Keyset, finish_page, plan_page
+from app.response_cache import cached_response
+from app.search import contains_clause
+from app.table_versions import tables_changed
 from datetime import datetime
 from flask import jsonify
 import math 
@@ -13,7 +20,7 @@ def find_entity(cursor, table, name_input):
     """
     Safely searches for an entity in the database.
     1. Checks for Exact Match.
-    2. Counts total partial matches (LIKE) to report accurate numbers.
+    2. Counts total partial matches (FULLTEXT narrowed LIKE, see app/search.py) to report accurate numbers.
     3. Returns Error if multiple partial matches found (Ambiguity) or none found.
     """
     # Exact Match 
@@ -26,8 +33,9 @@ def find_entity(cursor, table, name_input):
         return exact_match[id_col], exact_match['name'], exact_match.get('market_value', 0), None
 
     # Smart Search - Get Real Count 
-    count_query = f"SELECT COUNT(*) as total FROM {table} WHERE name LIKE %s"
-    cursor.execute(count_query, (f"%{name_input}%",))
+    contains_sql, contains_params = contains_clause(cursor, table, 'name', name_input)
+    count_query = f"SELECT COUNT(*) as total FROM {table} WHERE {contains_sql}"
+    cursor.execute(count_query, tuple(contains_params))
     count_result = cursor.fetchone()
     total_matches = count_result['total'] if count_result else 0
 
@@ -36,8 +44,8 @@ def find_entity(cursor, table, name_input):
     
     elif total_matches == 1:
         # If exactly one match, fetch it
-        fetch_query = f"SELECT * FROM {table} WHERE name LIKE %s"
-        cursor.execute(fetch_query, (f"%{name_input}%",))
+        fetch_query = f"SELECT * FROM {table} WHERE {contains_sql}"
+        cursor.execute(fetch_query, tuple(contains_params))
         match = cursor.fetchone()
         
         id_col = 'player_id' if table == 'players' else 'club_id'
@@ -45,8 +53,8 @@ def find_entity(cursor, table, name_input):
     
     else:
         #If Ambiguous (>1), fetch 3 examples for display.
-        example_query = f"SELECT name FROM {table} WHERE name LIKE %s LIMIT 3"
-        cursor.execute(example_query, (f"%{name_input}%",))
+        example_query = f"SELECT name FROM {table} WHERE {contains_sql} LIMIT 3"
+        cursor.execute(example_query, tuple(contains_params))
         examples = cursor.fetchall()
         
         example_str = ", ".join([m['name'] for m in examples])
@@ -106,7 +114,10 @@ def index():
     search_query = request.args.get('search', '').strip()
     
     per_page = 20
-    offset = (page - 1) * per_page
+
+    # Newest first, transfer_id breaks ties; ?cursor= continues from a previous page (keyset)
+    keyset = Keyset('t.transfer_date', 'DESC', 'transfer_date', 't.transfer_id', 'DESC', 'transfer_id')
+    position = keyset.decode(request.args.get('cursor', '').strip())
 
     conn = get_db_connection()
     if conn is None:
@@ -120,18 +131,26 @@ def index():
     params = []
     
     if search_query:
-        where_clause = " WHERE t.player_name LIKE %s"
-        params.append(f"%{search_query}%")
+        contains_sql, contains_params = contains_clause(cursor, 'transfers', 'player_name', search_query, alias='t')
+        where_clause = f" WHERE {contains_sql}"
+        params.extend(contains_params)
 
-    # Count query
+    # Count query (cached / estimated, see app/counts.py); this page always shows
+    # the page count, so include_total=false is treated as exact here
     count_query = f"SELECT COUNT(*) as total FROM transfers t {where_clause}"
-    cursor.execute(count_query, tuple(params))
-    
-    result = cursor.fetchone()
-    total_count = result['total'] if result else 0
+    mode = count_mode(request.args)
+    total_count, total_is_estimate = count_total(
+        cursor, 'transfers', ('Transfers',), {'search': search_query}, count_query, params,
+        'exact' if mode == 'none' else mode
+    )
     
     total_pages = (total_count + per_page - 1) // per_page
 
+    # Page numbers use OFFSET, a cursor seeks past the last row of the previous page
+    read = plan_page(keyset, position, page, per_page, total_count)
+    if read.seek_sql:
+        where_clause += (" AND " if where_clause else " WHERE ") + read.seek_sql
+
     # Data Query
     query = f"""
         SELECT t.*, 
@@ -143,15 +162,15 @@ def index():
         FROM transfers t
         LEFT JOIN players p ON t.player_id = p.player_id
         {where_clause}
-        ORDER BY t.transfer_date DESC
-        LIMIT %s OFFSET %s
+        ORDER BY {read.order_by}
+        {read.limit_sql}
     """
     
-    data_params = params.copy()
-    data_params.extend([per_page, offset])
-    
-    cursor.execute(query, tuple(data_params))
-    transfers = cursor.fetchall()
+    cursor.execute(query, tuple(params + read.seek_params + read.limit_params))
+    transfers, prev_cursor, next_cursor, last_cursor = finish_page(
+        keyset, read, cursor.fetchall(), per_page, None if total_is_estimate else total_pages
+    )
+    page = read.page
     
     # Fetch Dropdown Data
     cursor.execute("SELECT player_id, name FROM players ORDER BY name")
@@ -193,7 +212,10 @@ def index():
                            current_page=page,
                            total_count=total_count,
                            search_query=search_query,
-                           iter_pages=iter_pages)
+                           iter_pages=iter_pages,
+                           prev_cursor=prev_cursor,
+                           next_cursor=next_cursor,
+                           last_cursor=last_cursor)
 
 # ADD TRANSFER (INSERT operation)
 @transfers_bp.route('/add', methods=['POST'])
@@ -297,6 +319,7 @@ def add_transfer():
 
         cursor.execute(insert_query, values)
         new_transfer_id = cursor.lastrowid
+        club_finance.apply_transfers(cursor, "transfer_id = %s", (new_transfer_id,))
 
         # Sync: Auto-Update Player's club
         if final_player_id and final_to_id:
@@ -312,6 +335,9 @@ def add_transfer():
             except ValueError:
                 pass
         conn.commit()
+        tables_changed('Transfers', 'Players', 'ClubFinance', 'ClubSeasonFinance')
+        # the player may have moved between these clubs
+        invalidate_clubs(final_from_id, final_to_id)
         flash('Transfer added successfully!', 'success')
 
     except Exception as e:
@@ -340,9 +366,11 @@ def delete_transfer(transfer_id):
         
     try:
         cursor = conn.cursor()
+        club_finance.apply_transfers(cursor, "transfer_id = %s", (transfer_id,), sign=-1)
         query = "DELETE FROM transfers WHERE transfer_id = %s"
         cursor.execute(query, (transfer_id,))
         conn.commit()
+        tables_changed('Transfers', 'ClubFinance', 'ClubSeasonFinance')
         
         flash('Transfer deleted successfully.', 'success')
         
@@ -457,7 +485,10 @@ def edit_transfer(transfer_id):
                 transfer_id
             )
             
+            # club finance summaries: take the old row out, put the updated one in
+            club_finance.apply_transfers(cursor, "transfer_id = %s", (transfer_id,), sign=-1)
             cursor.execute(update_query, values)
+            club_finance.apply_transfers(cursor, "transfer_id = %s", (transfer_id,))
 
             #Syncronization
             #find which player belongs to this transfer
@@ -484,6 +515,9 @@ def edit_transfer(transfer_id):
                     print(f"ERROR: Date parsing failed for {date}")
 
             conn.commit()
+            tables_changed('Transfers', 'Players', 'ClubFinance', 'ClubSeasonFinance')
+            # the player may have moved between these clubs
+            invalidate_clubs(final_from_id, final_to_id)
             
             flash('Transfer updated successfully!', 'success')
             return redirect(url_for('transfers.index'))
@@ -535,6 +569,7 @@ def autocomplete():
 
 #This func for financial statistics about transfers
 @transfers_bp.route('/stats')
+@cached_response('Transfers', 'Players', 'Clubs', 'ClubFinance', ttl=60, stale=30)
 def transfer_stats():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -596,11 +631,16 @@ def transfer_stats():
         ORDER BY total_spent DESC
         LIMIT 5
     """
-    cursor.execute(complex_stats_query)
-    high_rollers = cursor.fetchall()
-
-    cursor.execute(spenders_query)
-    top_spenders = cursor.fetchall()
+    # Read from the ClubFinance summary; aggregate Transfers when it does not exist yet
+    high_rollers = club_finance.high_rollers(cursor, share=0.2, limit=5)
+    if high_rollers is None:
+        cursor.execute(complex_stats_query)
+        high_rollers = cursor.fetchall()
+
+    top_spenders = club_finance.top_spenders(cursor, limit=10)
+    if top_spenders is None:
+        cursor.execute(spenders_query)
+        top_spenders = cursor.fetchall()
 
     conn.close()
     
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: per-row helpers (csv.DictReader + parse_column) vs ColumnarDecoder.
+
+Usage (from the project root):
+    python -m benchmarks.decoder_benchmark                       # synthetic transfers-like rows
+    python -m benchmarks.decoder_benchmark --csv transfers.csv --table Transfers
+"""
+import argparse
+import csv
+import io
+import random
+import time
+
+from load_tables_from_csv import (
+    PIPELINE_CHUNK,
+    TABLE_SPECS,
+    ColumnarDecoder,
+    get_load_columns,
+    iter_chunks,
+    parse_column,
+)
+
+
+def synthetic_transfers_csv(rows, seed=42):
+    """Transfers-like CSV text: few thousand dates and clubs repeated over many rows."""
+    rng = random.Random(seed)
+    clubs = [(club_id, f"Club {club_id}") for club_id in range(1, 3001)]
+    dates = [f"{2000 + d // 365}-{d % 12 + 1:02d}-{d % 28 + 1:02d}" for d in range(4000)]
+
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["player_id", "transfer_date", "transfer_season", "from_club_id", "to_club_id",
+                     "from_club_name", "to_club_name", "transfer_fee", "market_value_in_eur", "player_name"])
+    for i in range(rows):
+        from_club = clubs[int(rng.paretovariate(1.2)) % len(clubs)]
+        to_club = clubs[int(rng.paretovariate(1.2) * 7) % len(clubs)]
+        date = rng.choice(dates)
+        writer.writerow([
+            rng.randint(1, 200000), date, f"{date[2:4]}/{int(date[2:4]) + 1:02d}",
+            from_club[0], to_club[0], from_club[1], to_club[1],
+            rng.choice(["", "0", "500000.0", "1000000.0", "25000000.0"]),
+            rng.choice(["", "1000000.0", "5000000.0"]), f"Player {i}",
+        ])
+    return out.getvalue()
+
+
+def run_per_row(text, columns):
+    count = 0
+    for row in csv.DictReader(io.StringIO(text)):
+        tuple(parse_column(c, row) for c in columns)
+        count += 1
+    return count
+
+
+def run_columnar(text, columns, fieldnames):
+    reader = csv.reader(io.StringIO(text))
+    next(reader)
+    decoder = ColumnarDecoder(columns, fieldnames)
+    count = 0
+    for chunk in iter_chunks(reader, PIPELINE_CHUNK):
+        count += len(decoder.decode(chunk))
+    return count
+
+
+def best_of(repeat, func, *args):
+    best, count = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="CSV file to decode (default: synthetic transfers)")
+    parser.add_argument("--table", default="Transfers", choices=sorted(TABLE_SPECS))
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.csv:
+        with open(args.csv, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+    else:
+        text = synthetic_transfers_csv(args.rows)
+
+    fieldnames = next(csv.reader(io.StringIO(text)))
+    columns = get_load_columns(TABLE_SPECS[args.table], fieldnames)
+
+    per_row, count = best_of(args.repeat, run_per_row, text, columns)
+    columnar, _ = best_of(args.repeat, run_columnar, text, columns, fieldnames)
+
+    print(f"Rows decoded:     {count}")
+    print(f"Per-row helpers:  {per_row:.3f}s ({count / per_row:,.0f} rows/s)")
+    print(f"Columnar decoder: {columnar:.3f}s ({count / columnar:,.0f} rows/s)")
+    print(f"Speedup:          {per_row / columnar:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
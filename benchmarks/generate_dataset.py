@@ -0,0 +1,207 @@
+"""
+Synthetic Transfermarkt-like CSVs for load benchmarks.
+
+Writes clubs.csv, competitions.csv, players.csv, games.csv and transfers.csv with the
+Kaggle headers. Every reference points to a generated row, so the files load cleanly
+in FK order (use --bad-refs to mix in unknown clubs/players on purpose).
+
+Skew: a few clubs appear in most games and transfers (power law over club ids) and
+dates are concentrated in recent seasons, like the real dataset.
+
+Usage (from the project root):
+    python -m benchmarks.generate_dataset --rows 1000000 --out bench_data
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+CLUBS_HEADER = [
+    "club_id", "club_code", "name", "domestic_competition_id", "total_market_value", "squad_size",
+    "average_age", "foreigners_number", "foreigners_percentage", "national_team_players",
+    "stadium_name", "stadium_seats", "net_transfer_record", "coach_name", "last_season", "filename", "url",
+]
+COMPETITIONS_HEADER = [
+    "competition_id", "competition_code", "name", "sub_type", "type", "country_id",
+    "country_name", "domestic_league_code", "confederation", "url", "is_major_national_league",
+]
+PLAYERS_HEADER = [
+    "player_id", "first_name", "last_name", "name", "last_season", "current_club_id", "player_code",
+    "country_of_birth", "city_of_birth", "country_of_citizenship", "date_of_birth", "sub_position",
+    "position", "foot", "height_in_cm", "contract_expiration_date", "agent_name", "image_url", "url",
+    "current_club_domestic_competition_id", "current_club_name", "market_value_in_eur",
+    "highest_market_value_in_eur",
+]
+GAMES_HEADER = [
+    "game_id", "competition_id", "season", "round", "date", "home_club_id", "away_club_id",
+    "home_club_goals", "away_club_goals", "home_club_position", "away_club_position",
+    "home_club_manager_name", "away_club_manager_name", "stadium", "attendance", "referee",
+    "url", "home_club_formation", "away_club_formation", "home_club_name", "away_club_name",
+    "aggregate", "competition_type",
+]
+TRANSFERS_HEADER = [
+    "player_id", "transfer_date", "transfer_season", "from_club_id", "to_club_id",
+    "from_club_name", "to_club_name", "transfer_fee", "market_value_in_eur", "player_name",
+]
+
+COUNTRIES = ["England", "Spain", "Italy", "Germany", "France", "Türkiye", "Portugal",
+             "Netherlands", "Brazil", "Argentina", "Belgium", "Scotland"]
+POSITIONS = [("Attack", "Centre-Forward"), ("Attack", "Left Winger"), ("Midfield", "Central Midfield"),
+             ("Midfield", "Attacking Midfield"), ("Defender", "Centre-Back"), ("Defender", "Right-Back"),
+             ("Goalkeeper", "Goalkeeper")]
+FEES = ["", "", "0.0", "250000.0", "1000000.0", "5000000.0", "12500000.0", "40000000.0"]
+
+FIRST_SEASON = 2000
+LAST_SEASON = 2024
+
+
+def table_sizes(rows):
+    """Splits a total row count over the five tables (roughly the Kaggle proportions)."""
+    competitions = min(500, max(5, rows // 5000))
+    clubs = max(20, rows // 400)
+    players = max(10, int(rows * 0.17))
+    games = max(10, int(rows * 0.40))
+    transfers = max(10, rows - competitions - clubs - players - games)
+    return {
+        "Clubs": clubs,
+        "Competitions": competitions,
+        "Players": players,
+        "Games": games,
+        "Transfers": transfers,
+    }
+
+
+class Skew:
+    """Random picks with the dataset's skew."""
+
+    def __init__(self, rng, clubs, competitions):
+        self.rng = rng
+        self.clubs = clubs
+        self.competitions = competitions
+
+    def club_index(self):
+        # power law: the first ~10% of clubs get most of the rows
+        return int(self.clubs * self.rng.random() ** 3)
+
+    def season(self):
+        return LAST_SEASON - int((LAST_SEASON - FIRST_SEASON + 1) * self.rng.random() ** 2)
+
+    def day_in_season(self, season):
+        return date(season, 7, 1) + timedelta(days=self.rng.randrange(330))
+
+
+def club_id(index):
+    # sparse like the real ids
+    return 3 + index * 13
+
+
+def competition_id(index):
+    return f"C{index}"
+
+
+def generate(out_dir, rows, seed=42, bad_refs=0.0):
+    """Writes the five CSVs into out_dir and returns {table: (path, rows)}."""
+    os.makedirs(out_dir, exist_ok=True)
+    sizes = table_sizes(rows)
+    rng = random.Random(seed)
+    skew = Skew(rng, sizes["Clubs"], sizes["Competitions"])
+    paths = {table: os.path.join(out_dir, f"{table.lower()}.csv") for table in sizes}
+
+    def bad(value):
+        # unknown reference (ids past the generated range) for FK validation benchmarks
+        return value + 10 ** 8 if bad_refs and rng.random() < bad_refs else value
+
+    with open(paths["Competitions"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(COMPETITIONS_HEADER)
+        for i in range(sizes["Competitions"]):
+            country = COUNTRIES[i % len(COUNTRIES)]
+            writer.writerow([
+                competition_id(i), f"league-{i}", f"League {i}", "first_tier" if i % 3 else "domestic_cup",
+                "domestic_league" if i % 3 else "domestic_cup", i % len(COUNTRIES), country[:10],
+                competition_id(i), "europa", f"https://example.org/competition/{i}", "true",
+            ])
+
+    with open(paths["Clubs"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(CLUBS_HEADER)
+        for i in range(sizes["Clubs"]):
+            writer.writerow([
+                club_id(i), f"club-{i}", f"Club {i}", competition_id(i % sizes["Competitions"]), "",
+                rng.randint(18, 40), round(rng.uniform(22.0, 29.5), 1), rng.randint(0, 20),
+                round(rng.uniform(0, 80), 1), rng.randint(0, 10), f"Stadium {i}",
+                rng.randint(3000, 80000), "+0", f"Coach {i}", LAST_SEASON,
+                f"clubs-{i % 10}.json", f"https://example.org/club/{i}",
+            ])
+
+    with open(paths["Players"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(PLAYERS_HEADER)
+        for player_id in range(1, sizes["Players"] + 1):
+            club = skew.club_index()
+            position, sub_position = rng.choice(POSITIONS)
+            country = rng.choice(COUNTRIES)
+            born = date(1975, 1, 1) + timedelta(days=rng.randrange(365 * 32))
+            value = rng.choice(["", "100000.0", "500000.0", "2000000.0", "15000000.0"])
+            writer.writerow([
+                player_id, f"First{player_id % 5000}", f"Last{player_id}", f"Player {player_id}",
+                skew.season(), bad(club_id(club)), f"player-{player_id}", country, f"City {player_id % 900}",
+                country, born.isoformat() + " 00:00:00", sub_position, position,
+                rng.choice(["right", "left", "both", ""]), rng.randint(165, 200), "", "",
+                f"https://example.org/portrait/{player_id}.jpg", f"https://example.org/player/{player_id}",
+                competition_id(club % sizes["Competitions"]), f"Club {club}", value, value,
+            ])
+
+    with open(paths["Games"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(GAMES_HEADER)
+        for game_id in range(1, sizes["Games"] + 1):
+            home = skew.club_index()
+            away = skew.club_index()
+            if away == home:
+                away = (home + 1) % sizes["Clubs"]
+            season = skew.season()
+            competition = int(sizes["Competitions"] * rng.random() ** 2)
+            writer.writerow([
+                game_id, competition_id(competition), season, f"{rng.randint(1, 38)}. Matchday",
+                skew.day_in_season(season).isoformat(), bad(club_id(home)), club_id(away),
+                rng.randint(0, 5), rng.randint(0, 4), "", "", f"Manager {home}", f"Manager {away}",
+                f"Stadium {home}", rng.choice(["", str(rng.randint(1000, 75000))]), f"Referee {game_id % 700}",
+                f"https://example.org/game/{game_id}", "4-3-3", "4-4-2", f"Club {home}", f"Club {away}",
+                f"{rng.randint(0, 5)}:{rng.randint(0, 4)}", "domestic_league",
+            ])
+
+    with open(paths["Transfers"], "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(TRANSFERS_HEADER)
+        for _ in range(sizes["Transfers"]):
+            player_id = rng.randint(1, sizes["Players"])
+            source = skew.club_index()
+            target = skew.club_index()
+            season = skew.season()
+            writer.writerow([
+                bad(player_id), skew.day_in_season(season).isoformat(),
+                f"{season % 100:02d}/{(season + 1) % 100:02d}", club_id(source), club_id(target),
+                f"Club {source}", f"Club {target}", rng.choice(FEES),
+                rng.choice(["", "1000000.0", "5000000.0"]), f"Player {player_id}",
+            ])
+
+    return {table: (paths[table], sizes[table]) for table in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Total rows over all five files (10k to 50M)")
+    parser.add_argument("--out", default="bench_data", help="Output folder")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bad-refs", type=float, default=0.0,
+                        help="Share of player/game/transfer rows with an unknown reference")
+    args = parser.parse_args()
+
+    for table, (path, count) in generate(args.out, args.rows, args.seed, args.bad_refs).items():
+        print(f"{table:<13} {count:>10} rows  {path}")
+
+
+if __name__ == "__main__":
+    main()
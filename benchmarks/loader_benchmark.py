@@ -0,0 +1,220 @@
+"""
+Loader throughput benchmark: runs load_tables_from_csv.py in each mode against a local
+MySQL and writes rows/s, peak RSS and commit counts per table to a JSON report.
+
+Every table load runs in its own subprocess so peak RSS is measured per table.
+The benchmark database is dropped and recreated from db/transfermarkt_schema.sql
+before every mode (it refuses to use DB_NAME from .env). infile mode needs
+local_infile=1 on the server.
+
+Usage (from the project root):
+    python -m benchmarks.generate_dataset --rows 1000000 --out bench_data
+    python -m benchmarks.loader_benchmark --csv-dir bench_data --output bench_report.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import mysql.connector
+from dotenv import load_dotenv
+
+base_dir = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=base_dir / ".env")
+
+TABLES = ("Clubs", "Competitions", "Players", "Games", "Transfers")
+
+# name -> (load_all_from_csv mode, pipeline, low_memory, recreate the database first)
+MODES = {
+    "rows": ("rows", False, False, True),
+    "rows-pipeline": ("rows", True, False, True),
+    "rows-low-memory": ("rows", False, True, True),
+    "infile": ("infile", False, False, True),
+    "delta": ("delta", False, False, True),
+    # second delta run over the same files: nothing changed, measures the fingerprint scan
+    "delta-rerun": ("delta", False, False, False),
+}
+
+
+def connect_args():
+    return {
+        "host": os.getenv("DB_HOST", "127.0.0.1"),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD"),
+    }
+
+
+def schema_statements():
+    """Statements of db/transfermarkt_schema.sql without its CREATE DATABASE / USE."""
+    lines = []
+    with open(base_dir / "db" / "transfermarkt_schema.sql", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip().startswith("--"):
+                lines.append(line)
+    statements = [s.strip() for s in "".join(lines).split(";")]
+    return [s for s in statements if s and not s.upper().startswith(("CREATE DATABASE", "USE "))]
+
+
+def reset_database(database):
+    conn = mysql.connector.connect(**connect_args())
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}`")
+        cursor.execute(f"USE `{database}`")
+        for statement in schema_statements():
+            cursor.execute(statement)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_child(args):
+    """Loads one table in this process and prints the measurements as the last line."""
+    os.environ["DB_NAME"] = args.database
+    sys.path.insert(0, str(base_dir))
+    import load_tables_from_csv as loader
+
+    spec = loader.TABLE_SPECS[args.table]
+    mode, pipeline, low_memory, _ = MODES[args.mode]
+    dead_letter_dir = tempfile.mkdtemp(prefix="bench_dead_letter_")
+
+    started = time.perf_counter()
+    if mode == "infile":
+        inserted, _ = loader.load_table_with_infile(spec, args.csv)
+        commits = 1
+    elif mode == "delta":
+        result = loader.load_table_delta(args.table, args.csv, batch_size=args.batch_size,
+                                         commit_size=args.commit_size, dead_letter_dir=dead_letter_dir,
+                                         low_memory=low_memory) or {}
+        inserted = result.get("new", 0) + result.get("changed", 0)
+        commits = result.get("commits", 0)
+    else:
+        result = loader.load_table_from_csv(spec, args.csv, args.batch_size, args.commit_size, pipeline,
+                                            dead_letter_dir=dead_letter_dir, low_memory=low_memory) or {}
+        inserted = result.get("inserted", 0)
+        commits = result.get("commits", 0)
+    seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "seconds": round(seconds, 3),
+        "inserted": inserted,
+        "commits": commits,
+        "peak_rss_mb": loader.peak_rss_mb(),
+    }))
+
+
+def run_table(args, mode, table, csv_path):
+    command = [
+        sys.executable, "-m", "benchmarks.loader_benchmark", "--child",
+        "--mode", mode, "--table", table, "--csv", csv_path, "--database", args.database,
+        "--batch-size", str(args.batch_size), "--commit-size", str(args.commit_size),
+    ]
+    proc = subprocess.run(command, cwd=base_dir, capture_output=True, text=True)
+    if args.verbose:
+        print(proc.stdout, end="")
+    if proc.returncode != 0:
+        print(proc.stderr, end="")
+        return {"error": f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def count_rows(path):
+    with open(path, "rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=base_dir,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv-dir", default="bench_data", help="Folder with the generated CSVs")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma separated, from: " + ", ".join(MODES))
+    parser.add_argument("--database", default="TRANSFERMARKT_BENCH", help="Scratch database (dropped!)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--commit-size", type=int, default=5000)
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--verbose", action="store_true", help="Show the loader output")
+    # internal: one table load inside the subprocess
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--table", help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    if args.database == os.getenv("DB_NAME", "TRANSFERMARKT"):
+        parser.error(f"--database {args.database} is the application database, pick a scratch one")
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+
+    csv_paths = {table: os.path.abspath(os.path.join(args.csv_dir, f"{table.lower()}.csv")) for table in TABLES}
+    dataset = {
+        table: {"rows": count_rows(path), "bytes": os.path.getsize(path)}
+        for table, path in csv_paths.items()
+    }
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "batch_size": args.batch_size,
+        "commit_size": args.commit_size,
+        "dataset": dataset,
+        "results": {},
+    }
+
+    for mode in modes:
+        if MODES[mode][3]:
+            reset_database(args.database)
+        print(f"\n=== {mode} ===")
+        results = {}
+        for table in TABLES:
+            result = run_table(args, mode, table, csv_paths[table])
+            if "seconds" in result:
+                rows = dataset[table]["rows"]
+                result["rows_per_s"] = round(rows / result["seconds"]) if result["seconds"] else None
+                print(f"{table:<13} {result['seconds']:>9.2f}s {result['rows_per_s'] or 0:>10} rows/s "
+                      f"{result['commits']:>6} commits  peak {result['peak_rss_mb']} MB")
+            else:
+                print(f"{table:<13} failed ({result['error']})")
+            results[table] = result
+
+        measured = [r for r in results.values() if "seconds" in r]
+        seconds = sum(r["seconds"] for r in measured)
+        rows = sum(dataset[t]["rows"] for t, r in results.items() if "seconds" in r)
+        results["total"] = {
+            "seconds": round(seconds, 3),
+            "rows_per_s": round(rows / seconds) if seconds else None,
+            "commits": sum(r["commits"] for r in measured),
+            "peak_rss_mb": max((r["peak_rss_mb"] or 0 for r in measured), default=None),
+        }
+        report["results"][mode] = results
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
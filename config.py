@@ -4,6 +4,8 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     DEBUG = False
     TESTING = False
+    # /api/db/pool shows pool internals and the replica hosts: off unless asked for
+    DB_POOL_STATS = os.environ.get('DB_POOL_STATS', '').strip().lower() in ('1', 'true', 'yes', 'on')
 
 class DevelopmentConfig(Config):
     """Development configuration."""
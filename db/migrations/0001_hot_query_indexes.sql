@@ -0,0 +1,61 @@
+-- Secondary indexes for the filters and sort orders the list pages use.
+-- None of them starts with a foreign key column, so InnoDB keeps the FK indexes
+-- it created itself and the down section can simply drop them again.
+
+-- migrate:up
+
+-- transfers.index: ORDER BY t.transfer_date DESC LIMIT/OFFSET
+-- transfer_stats:  WHERE t.transfer_fee > 0 ORDER BY t.transfer_date DESC LIMIT 50
+--                  (backward scan of the date order, fee checked inside the index)
+CREATE INDEX idx_transfers_date_fee ON Transfers (transfer_date, transfer_fee);
+
+-- transfer_stats: WHERE transfer_fee > 0 GROUP BY to_club_name SUM(transfer_fee)
+-- (covering: the spenders / high roller groups are read from the index only)
+CREATE INDEX idx_transfers_to_club_name_fee ON Transfers (to_club_name, transfer_fee);
+
+-- transfers.index search count: WHERE t.player_name LIKE ... scans this index instead of the rows
+CREATE INDEX idx_transfers_player_name ON Transfers (player_name);
+
+-- get_games: ORDER BY g.date DESC, g.game_id DESC (the PK is the implicit second column)
+-- and the date_from / date_to range
+CREATE INDEX idx_games_date ON Games (date);
+
+-- get_games: WHERE g.season = ... ORDER BY g.date DESC
+CREATE INDEX idx_games_season_date ON Games (season, date);
+
+-- get_games: WHERE g.season = ... AND g.competition_id = ... ORDER BY g.date DESC
+CREATE INDEX idx_games_season_competition_date ON Games (season, competition_id, date);
+
+-- get_players: default ORDER BY p.name, find_entity exact name match
+CREATE INDEX idx_players_name ON Players (name);
+
+-- get_players: ORDER BY p.market_value
+CREATE INDEX idx_players_market_value ON Players (market_value);
+
+-- get_players: ORDER BY p.date_of_birth (sort by date_of_birth / age)
+CREATE INDEX idx_players_date_of_birth ON Players (date_of_birth);
+
+-- get_players: WHERE p.position = ... [AND p.sub_position = ...] ORDER BY p.name,
+-- and the sub position dropdown (covering)
+CREATE INDEX idx_players_position_sub_name ON Players (position, sub_position, name);
+
+-- get_players: WHERE p.country_of_citizenship = ... ORDER BY p.name, and the country dropdown (covering)
+CREATE INDEX idx_players_country_name ON Players (country_of_citizenship, name);
+
+-- club lists and dropdowns: ORDER BY name, find_entity exact name match
+CREATE INDEX idx_clubs_name ON Clubs (name);
+
+-- migrate:down
+
+DROP INDEX idx_clubs_name ON Clubs;
+DROP INDEX idx_players_country_name ON Players;
+DROP INDEX idx_players_position_sub_name ON Players;
+DROP INDEX idx_players_date_of_birth ON Players;
+DROP INDEX idx_players_market_value ON Players;
+DROP INDEX idx_players_name ON Players;
+DROP INDEX idx_games_season_competition_date ON Games;
+DROP INDEX idx_games_season_date ON Games;
+DROP INDEX idx_games_date ON Games;
+DROP INDEX idx_transfers_player_name ON Transfers;
+DROP INDEX idx_transfers_to_club_name_fee ON Transfers;
+DROP INDEX idx_transfers_date_fee ON Transfers;
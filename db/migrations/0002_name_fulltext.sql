@@ -0,0 +1,22 @@
+-- FULLTEXT ngram indexes for the "name contains" searches (app/search.py):
+-- transfers.index search, find_entity and the get_games home/away club filters.
+-- Stopwords are switched off for this session: with the ngram parser any token that
+-- contains a stopword ("on", "in", "de", ...) would be left out of the index,
+-- and names like "Anderson" could no longer be found.
+-- The default ngram_token_size=2 is assumed; terms shorter than it use plain LIKE.
+
+-- migrate:up
+
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+CREATE FULLTEXT INDEX ft_players_name ON Players (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_clubs_name ON Clubs (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_transfers_player_name ON Transfers (player_name) WITH PARSER ngram;
+
+-- migrate:down
+
+DROP INDEX ft_transfers_player_name ON Transfers;
+DROP INDEX ft_clubs_name ON Clubs;
+DROP INDEX ft_players_name ON Players;
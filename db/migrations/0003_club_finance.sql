@@ -0,0 +1,57 @@
+-- Club finance summaries (app/club_finance.py) for transfer_stats and club_details.
+-- The transfer write views keep them up to date, the loader rebuilds them after a load.
+-- ClubFinance is keyed by the club names written in Transfers (the stats page groups
+-- by to_club_name), ClubSeasonFinance by club id and transfer season.
+
+-- migrate:up
+
+CREATE TABLE IF NOT EXISTS ClubFinance (
+    club_name VARCHAR(100) NOT NULL PRIMARY KEY,
+    spent DOUBLE NOT NULL DEFAULT 0,
+    earned DOUBLE NOT NULL DEFAULT 0,
+    paid_in INT NOT NULL DEFAULT 0,
+    paid_out INT NOT NULL DEFAULT 0,
+    transfers_in INT NOT NULL DEFAULT 0,
+    transfers_out INT NOT NULL DEFAULT 0,
+    KEY idx_club_finance_spent (spent)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS ClubSeasonFinance (
+    club_id INT NOT NULL,
+    season VARCHAR(50) NOT NULL,
+    spent DOUBLE NOT NULL DEFAULT 0,
+    earned DOUBLE NOT NULL DEFAULT 0,
+    transfers_in INT NOT NULL DEFAULT 0,
+    transfers_out INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (club_id, season)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO ClubFinance (club_name, spent, earned, paid_in, paid_out, transfers_in, transfers_out)
+SELECT f_name, SUM(f_spent), SUM(f_earned), SUM(f_paid_in), SUM(f_paid_out), SUM(f_in), SUM(f_out)
+FROM (
+    SELECT to_club_name AS f_name, IF(transfer_fee > 0, transfer_fee, 0) AS f_spent, 0 AS f_earned,
+           IF(transfer_fee > 0, 1, 0) AS f_paid_in, 0 AS f_paid_out, 1 AS f_in, 0 AS f_out
+    FROM Transfers WHERE to_club_name IS NOT NULL
+    UNION ALL
+    SELECT from_club_name, 0, IF(transfer_fee > 0, transfer_fee, 0), 0, IF(transfer_fee > 0, 1, 0), 0, 1
+    FROM Transfers WHERE from_club_name IS NOT NULL
+) changes
+GROUP BY f_name;
+
+INSERT INTO ClubSeasonFinance (club_id, season, spent, earned, transfers_in, transfers_out)
+SELECT f_club, f_season, SUM(f_spent), SUM(f_earned), SUM(f_in), SUM(f_out)
+FROM (
+    SELECT to_club_id AS f_club, transfer_season AS f_season,
+           IF(transfer_fee > 0, transfer_fee, 0) AS f_spent, 0 AS f_earned, 1 AS f_in, 0 AS f_out
+    FROM Transfers WHERE to_club_id IS NOT NULL
+    UNION ALL
+    SELECT from_club_id, transfer_season, 0, IF(transfer_fee > 0, transfer_fee, 0), 0, 1
+    FROM Transfers
+    WHERE from_club_id IS NOT NULL AND (to_club_id IS NULL OR to_club_id <> from_club_id)
+) changes
+GROUP BY f_club, f_season;
+
+-- migrate:down
+
+DROP TABLE IF EXISTS ClubSeasonFinance;
+DROP TABLE IF EXISTS ClubFinance;
@@ -0,0 +1,74 @@
+-- Head-to-head stats per club pair (app/pair_stats.py) for /api/games/head2head.
+-- One row per pair with club_a < club_b; the game views recompute the pair they touch,
+-- the loader rebuilds the table after a load. Needs MySQL 8.0 (window functions).
+-- The two statements filling the table are pair_stats.rebuild()'s SQL (_PAIR_TOTALS and
+-- _PAIR_GAMES without a filter); pair_stats.py is the source, change it there first.
+
+-- migrate:up
+
+CREATE TABLE IF NOT EXISTS ClubPairStats (
+    club_a INT NOT NULL,
+    club_b INT NOT NULL,
+    matches INT NOT NULL DEFAULT 0,
+    a_wins INT NOT NULL DEFAULT 0,
+    b_wins INT NOT NULL DEFAULT 0,
+    draws INT NOT NULL DEFAULT 0,
+    a_goals INT NOT NULL DEFAULT 0,
+    b_goals INT NOT NULL DEFAULT 0,
+    goal_games INT NOT NULL DEFAULT 0,
+    goals_sum INT NOT NULL DEFAULT 0,
+    attendance_games INT NOT NULL DEFAULT 0,
+    attendance_sum BIGINT NOT NULL DEFAULT 0,
+    biggest_win_game_id INT,
+    last_game_ids VARCHAR(255),
+    PRIMARY KEY (club_a, club_b),
+    KEY idx_club_pair_stats_b (club_b)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO ClubPairStats (club_a, club_b, matches, a_wins, b_wins, draws, a_goals, b_goals,
+                           goal_games, goals_sum, attendance_games, attendance_sum)
+SELECT club_a, club_b, COUNT(*),
+       SUM(CASE WHEN a_goals > b_goals THEN 1 ELSE 0 END),
+       SUM(CASE WHEN b_goals > a_goals THEN 1 ELSE 0 END),
+       SUM(CASE WHEN a_goals = b_goals THEN 1 ELSE 0 END),
+       COALESCE(SUM(a_goals), 0), COALESCE(SUM(b_goals), 0),
+       COUNT(a_goals + b_goals), COALESCE(SUM(a_goals + b_goals), 0),
+       COUNT(attendance), COALESCE(SUM(attendance), 0)
+FROM (
+    SELECT LEAST(home_club_id, away_club_id) AS club_a, GREATEST(home_club_id, away_club_id) AS club_b,
+           IF(home_club_id < away_club_id, home_club_goals, away_club_goals) AS a_goals,
+           IF(home_club_id < away_club_id, away_club_goals, home_club_goals) AS b_goals,
+           attendance
+    FROM Games
+    WHERE home_club_id IS NOT NULL AND away_club_id IS NOT NULL AND home_club_id <> away_club_id
+) pair_games
+GROUP BY club_a, club_b;
+
+UPDATE ClubPairStats s
+JOIN (
+    SELECT club_a, club_b,
+           MAX(CASE WHEN win_rank = 1 THEN game_id END) AS biggest_win_game_id,
+           GROUP_CONCAT(CASE WHEN date_rank <= 5 THEN game_id END ORDER BY date_rank SEPARATOR ',')
+               AS last_game_ids
+    FROM (
+        SELECT game_id,
+               LEAST(home_club_id, away_club_id) AS club_a, GREATEST(home_club_id, away_club_id) AS club_b,
+               ROW_NUMBER() OVER (
+                   PARTITION BY LEAST(home_club_id, away_club_id), GREATEST(home_club_id, away_club_id)
+                   ORDER BY ABS(home_club_goals - away_club_goals) DESC, date DESC, game_id DESC
+               ) AS win_rank,
+               ROW_NUMBER() OVER (
+                   PARTITION BY LEAST(home_club_id, away_club_id), GREATEST(home_club_id, away_club_id)
+                   ORDER BY date DESC, game_id DESC
+               ) AS date_rank
+        FROM Games
+        WHERE home_club_id IS NOT NULL AND away_club_id IS NOT NULL AND home_club_id <> away_club_id
+    ) ranked
+    WHERE win_rank = 1 OR date_rank <= 5
+    GROUP BY club_a, club_b
+) r ON s.club_a = r.club_a AND s.club_b = r.club_b
+SET s.biggest_win_game_id = r.biggest_win_game_id, s.last_game_ids = r.last_game_ids;
+
+-- migrate:down
+
+DROP TABLE IF EXISTS ClubPairStats;
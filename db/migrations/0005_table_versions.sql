@@ -0,0 +1,15 @@
+-- Shared table version counters (app/table_versions.py): bumped by every write view
+-- and by the loader, read by the app workers for the ETag / Last-Modified headers
+-- of the JSON APIs and their 304 Not Modified answers.
+
+-- migrate:up
+
+CREATE TABLE IF NOT EXISTS TableVersions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- migrate:down
+
+DROP TABLE IF EXISTS TableVersions;
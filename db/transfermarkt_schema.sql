@@ -114,3 +114,81 @@ ADD CONSTRAINT fk_clubs_competition
     REFERENCES Competitions(competition_id)
     ON DELETE SET NULL 
     ON UPDATE CASCADE;
+
+-- Row fingerprints used by the loader's delta mode (python load_tables_from_csv.py --mode delta)
+-- The loader also creates this table on demand.
+CREATE TABLE IF NOT EXISTS LoadFingerprints (
+    table_name VARCHAR(32) NOT NULL,
+    row_key VARCHAR(64) NOT NULL,
+    row_id VARCHAR(32) NOT NULL,
+    fingerprint CHAR(32) NOT NULL,
+    PRIMARY KEY (table_name, row_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Progress of row mode loads, saved with every commit (python load_tables_from_csv.py --resume)
+-- The loader also creates this table on demand.
+CREATE TABLE IF NOT EXISTS LoadCheckpoints (
+    table_name VARCHAR(32) NOT NULL,
+    shard VARCHAR(64) NOT NULL,
+    csv_size BIGINT NOT NULL,
+    byte_offset BIGINT NOT NULL,
+    rows_read BIGINT NOT NULL,
+    max_id BIGINT,
+    batches INT NOT NULL,
+    inserted BIGINT NOT NULL,
+    finished TINYINT(1) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, shard)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Club finance summaries kept up to date by the transfer views (app/club_finance.py)
+-- Created and filled by migration 0003 (python migrate.py apply); the loader rebuilds them.
+CREATE TABLE IF NOT EXISTS ClubFinance (
+    club_name VARCHAR(100) NOT NULL PRIMARY KEY,
+    spent DOUBLE NOT NULL DEFAULT 0,
+    earned DOUBLE NOT NULL DEFAULT 0,
+    paid_in INT NOT NULL DEFAULT 0,
+    paid_out INT NOT NULL DEFAULT 0,
+    transfers_in INT NOT NULL DEFAULT 0,
+    transfers_out INT NOT NULL DEFAULT 0,
+    KEY idx_club_finance_spent (spent)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS ClubSeasonFinance (
+    club_id INT NOT NULL,
+    season VARCHAR(50) NOT NULL,
+    spent DOUBLE NOT NULL DEFAULT 0,
+    earned DOUBLE NOT NULL DEFAULT 0,
+    transfers_in INT NOT NULL DEFAULT 0,
+    transfers_out INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (club_id, season)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Head-to-head stats per club pair kept up to date by the game views (app/pair_stats.py)
+-- Created and filled by migration 0004 (python migrate.py apply); the loader rebuilds it.
+CREATE TABLE IF NOT EXISTS ClubPairStats (
+    club_a INT NOT NULL,
+    club_b INT NOT NULL,
+    matches INT NOT NULL DEFAULT 0,
+    a_wins INT NOT NULL DEFAULT 0,
+    b_wins INT NOT NULL DEFAULT 0,
+    draws INT NOT NULL DEFAULT 0,
+    a_goals INT NOT NULL DEFAULT 0,
+    b_goals INT NOT NULL DEFAULT 0,
+    goal_games INT NOT NULL DEFAULT 0,
+    goals_sum INT NOT NULL DEFAULT 0,
+    attendance_games INT NOT NULL DEFAULT 0,
+    attendance_sum BIGINT NOT NULL DEFAULT 0,
+    biggest_win_game_id INT,
+    last_game_ids VARCHAR(255),
+    PRIMARY KEY (club_a, club_b),
+    KEY idx_club_pair_stats_b (club_b)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Table version counters bumped by the write views and the loader (app/table_versions.py)
+-- Created by migration 0005; the loader also creates it on demand.
+CREATE TABLE IF NOT EXISTS TableVersions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -1,11 +1,26 @@
 
+import argparse
+import bz2
 import csv
+import gzip
+import hashlib
+import io
 import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
 from dotenv import load_dotenv
 
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+
+from app import club_finance, pair_stats, table_versions
+from app.db import ConnectionPool
 
 load_dotenv()
 
@@ -13,14 +28,49 @@ load_dotenv()
 # Helpers
 # -----------------------------
 
+_pool = None
+
+# Upper bound of connections the loader opens at once (one per parallel worker)
+POOL_SIZE = 8
+
+def get_connect_args():
+    return {
+        "host": os.getenv("DB_HOST", "127.0.0.1"),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD"),
+        "database": os.getenv("DB_NAME", "TRANSFERMARKT"),
+    }
+
 def get_conn():
-    """Create a DB connection using .env (same style as your load_players.py)."""
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "127.0.0.1"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME", "TRANSFERMARKT"),
-    )
+    """
+    Borrow a DB connection using .env (same style as your load_players.py).
+    Connections come from a small pool so consecutive tables reuse the same
+    session instead of reconnecting; conn.close() hands it back to the pool.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(
+            get_connect_args(),
+            size=POOL_SIZE,
+            max_overflow=0,
+        )
+    return _pool.acquire()
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None when it cannot be measured)."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: only with the optional psutil package
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
 
 def parse_int(v):
     if v is None:
@@ -79,270 +129,1336 @@ def parse_date(date_string):
     print(f"Warning: Could not parse date: {s}")
     return None
 
-def commit_every(conn, inserted_count, batch=100):
-    if inserted_count > 0 and inserted_count % batch == 0:
-        conn.commit()
-        print(f"Inserted {inserted_count} rows so far...")
+# Tunable batch sizes (rows per multi-row INSERT / rows per COMMIT)
+BATCH_SIZE = 1000
+COMMIT_SIZE = 5000
 
 def get_max_id(cursor, table, id_col):
     cursor.execute(f"SELECT MAX({id_col}) FROM {table}")
     res = cursor.fetchone()
     return res[0] if res and res[0] is not None else 0
 
-# -----------------------------
-# Loaders (FK order)
-#   1) Clubs
-#   2) Competitions
-#   3) Players
-#   4) Games
-#   5) Transfers
-# -----------------------------
+def get_max_allowed_packet(cursor, default=4 * 1024 * 1024):
+    try:
+        cursor.execute("SELECT @@max_allowed_packet")
+        res = cursor.fetchone()
+        return int(res[0]) if res and res[0] else default
+    except Error:
+        return default
 
-def load_clubs_from_csv(csv_file_path):
+
+class IdBitmap:
     """
-    Clubs(club_id PK, club_code, name, squad_size, average_age, stadium_name, stadium_seats, url)
-    club_id is REQUIRED.
+    Set of integer ids stored as bits, in chunks of 65536 ids (8 KB each) that are only
+    allocated for id ranges that actually occur, so sparse ids stay cheap too.
+    1.5M player ids take ~190 KB instead of tens of MB as a Python set.
+    Used for the FK key sets and, in low-memory mode, for IdAllocator.used_ids.
     """
-    try:
-        conn = get_conn()
-        cursor = conn.cursor()
 
-        insert_query = """
-            INSERT INTO Clubs (
-                club_id, club_code, name, squad_size, average_age,
-                stadium_name, stadium_seats, url
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
+    def __init__(self):
+        self.chunks = {}
+        self.count = 0
+
+    def add(self, value):
+        chunk = self.chunks.get(value >> 16)
+        if chunk is None:
+            chunk = self.chunks[value >> 16] = bytearray(8192)
+        offset = value & 0xFFFF
+        mask = 1 << (offset & 7)
+        if not chunk[offset >> 3] & mask:
+            chunk[offset >> 3] |= mask
+            self.count += 1
+
+    def __contains__(self, value):
+        chunk = self.chunks.get(value >> 16)
+        return chunk is not None and bool(chunk[(value & 0xFFFF) >> 3] & (1 << (value & 7)))
 
-        inserted, skipped, errors = 0, 0, 0
+    def __len__(self):
+        return self.count
 
-        with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
+    @property
+    def nbytes(self):
+        return len(self.chunks) * 8192
 
-            for row in reader:
+
+class IdAllocator:
+    """
+    Keeps the duplicate-ID logic shared by Players/Games/Transfers:
+    - CSV id is used when present and not seen before in this file
+    - otherwise a fresh id is allocated after MAX(id)
+
+    When a file is split into shards, shard k of n only hands out fresh ids
+    with id % n == k, so shards never allocate the same id without talking
+    to each other (collisions with CSV ids go through the duplicate retry).
+    """
+
+    def __init__(self, max_id, stride=1, offset=0, compact=False):
+        self.max_id = max_id
+        self.stride = stride
+        self.offset = offset
+        # compact=True (low-memory mode): a bitmap instead of a set of ints
+        self.used_ids = IdBitmap() if compact else set()
+        # assign() runs in the parser stage, fresh() in the writer stage when pipelined
+        self._lock = threading.Lock()
+
+    def _next_free(self):
+        new_id = self.max_id + 1
+        new_id += (self.offset - new_id) % self.stride
+        self.max_id = new_id
+        return new_id
+
+    def assign(self, csv_id):
+        with self._lock:
+            if csv_id is None or csv_id in self.used_ids:
+                new_id = self._next_free()
+            else:
+                new_id = csv_id
+                if new_id > self.max_id:
+                    self.max_id = new_id
+            self.used_ids.add(new_id)
+            return new_id
+
+    def fresh(self):
+        with self._lock:
+            return self._next_free()
+
+
+class BatchInserter:
+    """
+    Accumulates parsed rows and writes them with one multi-row INSERT
+    (cursor.executemany) per batch instead of one round trip per row.
+
+    - A batch is flushed when it reaches batch_size rows or ~75% of max_allowed_packet.
+    - COMMIT happens every commit_size inserted rows.
+    - If a batch fails (duplicate key, FK, bad value...) its rows are replayed
+      one by one so each row gets the same handling as the old row-at-a-time loader:
+      on_duplicate(values) returns new values to retry once (fresh id) or None to skip.
+    - max_bytes caps a batch below the server limit (low-memory mode).
+    - before_commit(marker) runs right before every COMMIT, inside the same transaction
+      (used for checkpoints); marker is the last one passed to add()/mark().
+    - on_success(rows) gets the rows of each flush that were actually written (retried
+      values included), inside the same transaction as them.
+    - A deadlock or lock wait timeout loses the whole uncommitted transaction: it is
+      rolled back, inserted goes back to the rows committed so far and the error is
+      raised (row mode resumes from the last checkpoint with --resume).
+    """
+
+    def __init__(self, conn, cursor, insert_query, table, row_label,
+                 on_duplicate=None, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE, before_commit=None,
+                 max_bytes=None, on_success=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.insert_query = insert_query
+        self.table = table
+        self.row_label = row_label
+        self.on_duplicate = on_duplicate
+        self.batch_size = max(1, batch_size)
+        self.commit_size = max(1, commit_size)
+        self.max_bytes = int(get_max_allowed_packet(cursor) * 0.75)
+        if max_bytes is not None:
+            self.max_bytes = min(self.max_bytes, max_bytes)
+        self.before_commit = before_commit
+        self.on_success = on_success
+        self.marker = None
+
+        self.rows = []
+        self.row_bytes = 0
+        self.inserted, self.skipped, self.errors = 0, 0, 0
+        self.committed = 0
+        self.commits = 0
+        self._uncommitted = 0
+
+    def add(self, values, marker=None):
+        self.rows.append(values)
+        if marker is not None:
+            self.marker = marker
+        # rough size of the row once rendered into the VALUES list
+        self.row_bytes += sum(len(str(v)) + 4 for v in values) + 4
+        if len(self.rows) >= self.batch_size or self.row_bytes >= self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows, self.rows, self.row_bytes = self.rows, [], 0
+
+        try:
+            self.cursor.executemany(self.insert_query, rows)
+            written = rows
+        except Error as e:
+            if _transaction_lost(e):
+                self.rollback()
+                raise
+            # The failed statement is rolled back as a whole, replay row by row
+            written = [w for w in (self._insert_one(values) for values in rows) if w is not None]
+
+        if self.on_success is not None and written:
+            self.on_success(written)
+        self.inserted += len(written)
+        self._uncommitted += len(written)
+        if self._uncommitted >= self.commit_size:
+            self.commit()
+            print(f"Inserted {self.inserted} rows so far...")
+
+    def _insert_one(self, values):
+        # the values written (retry values after a duplicate), None when the row was not
+        try:
+            self.cursor.execute(self.insert_query, values)
+            return values
+        except mysql.connector.IntegrityError as e:
+            if "Duplicate entry" in str(e) and self.on_duplicate is not None:
+                retry_values = self.on_duplicate(values)
+                if retry_values is None:
+                    self.skipped += 1
+                    return None
                 try:
-                    club_id = parse_int(row.get("club_id"))
-                    name = parse_str(row.get("name"), 255)
+                    self.cursor.execute(self.insert_query, retry_values)
+                    return retry_values
+                except Exception as e2:
+                    if _transaction_lost(e2):
+                        self.rollback()
+                        raise
+                    print(f"Retry failed ({self.table}): {e2}")
+                    self.errors += 1
+            else:
+                print(f"Integrity error ({self.table}): {e}")
+                self.errors += 1
+        except Exception as e:
+            if _transaction_lost(e):
+                self.rollback()
+                raise
+            print(f"Error inserting {self.row_label} row: {e}")
+            self.errors += 1
+        return None
 
-                    if club_id is None or not name:
-                        skipped += 1
-                        continue
+    def mark(self, marker):
+        """Records progress that added no row (e.g. skipped rows at the end of a chunk)."""
+        self.marker = marker
 
-                    values = (
-                        club_id,
-                        parse_str(row.get("club_code"), 100),
-                        name,
-                        parse_int(row.get("squad_size")) or 0,
-                        parse_float(row.get("average_age")),
-                        parse_str(row.get("stadium_name"), 255),
-                        parse_int(row.get("stadium_seats")),
-                        parse_str(row.get("url"), 500),
-                    )
-
-                    cursor.execute(insert_query, values)
-                    inserted += 1
-                    commit_every(conn, inserted)
-
-                except mysql.connector.IntegrityError as e:
-                    # Duplicate PK or FK issues
-                    if "Duplicate entry" in str(e):
-                        # If you prefer to ignore duplicates:
-                        skipped += 1
-                    else:
-                        print(f"Integrity error (Clubs): {e}")
-                        errors += 1
-                except Exception as e:
-                    print(f"Error inserting club row: {e}")
-                    errors += 1
+    def commit(self):
+        if self.before_commit is not None and self.marker is not None:
+            self.before_commit(self.marker)
+        self.conn.commit()
+        self.commits += 1
+        self.committed = self.inserted
+        self._uncommitted = 0
 
-        conn.commit()
-        print("\n=== Clubs Import Summary ===")
-        print(f"Inserted: {inserted}")
-        print(f"Skipped:  {skipped}")
-        print(f"Errors:   {errors}")
+    def rollback(self):
+        """Drops the uncommitted rows, and their count."""
+        self.rows, self.row_bytes = [], 0
+        self.conn.rollback()
+        self.inserted = self.committed
+        self._uncommitted = 0
 
-        cursor.close()
-        conn.close()
+    def finish(self):
+        self.flush()
+        self.commit()
+
+    def print_summary(self):
+        print(f"\n=== {self.table} Import Summary ===")
+        print(f"Inserted: {self.inserted}")
+        print(f"Skipped:  {self.skipped}")
+        print(f"Errors:   {self.errors}")
 
-    except Error as e:
-        print(f"Database error (Clubs): {e}")
-    except FileNotFoundError:
-        print(f"CSV file not found: {csv_file_path}")
 
+def _transaction_lost(e):
+    # InnoDB rolls back the whole transaction on a deadlock (and on a lock wait
+    # timeout with innodb_rollback_on_timeout), not just the failed statement
+    return getattr(e, "errno", None) in (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
 
-def load_competitions_from_csv(csv_file_path):
+
+def skip_duplicate(values):
+    return None
+
+# -----------------------------
+# Streaming pipeline
+#   reader -> parser -> writer, connected by bounded queues.
+#   The reader and parser run in their own threads so parsing of chunk N+1
+#   overlaps with the INSERT of chunk N; a full queue blocks the stage in
+#   front of it (back-pressure), so memory stays bounded.
+# -----------------------------
+
+PIPELINE_CHUNK = 1000   # rows per chunk passed between stages
+PIPELINE_QUEUE = 8      # chunks buffered between two stages
+
+# Low-memory mode (--low-memory, for reloads on small maintenance boxes):
+# every buffer gets a small fixed cap and used ids are tracked in an IdBitmap
+LOW_MEMORY = {
+    "chunk": 250,                      # rows per chunk
+    "queue": 2,                        # chunks buffered between two pipeline stages
+    "memo": 4096,                      # memoized raw values per column (see make_converter)
+    "batch_bytes": 2 * 1024 * 1024,    # largest multi-row INSERT
+}
+
+_END = object()
+
+
+class StageCounter:
+    """Per-stage throughput: items handled, time spent working and time blocked on a queue."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def as_dict(self):
+        return {
+            "items": self.items,
+            "busy_s": round(self.busy, 3),
+            "blocked_s": round(self.blocked, 3),
+            "rows_per_s": round(self.items / self.busy) if self.busy else None,
+        }
+
+
+def _put(q, item, stop, counter):
+    started = time.monotonic()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            break
+        except queue.Full:
+            pass
+    counter.blocked += time.monotonic() - started
+
+
+def _get(q, stop, counter):
+    started = time.monotonic()
+    while True:
+        try:
+            item = q.get(timeout=0.1)
+            break
+        except queue.Empty:
+            if stop.is_set():
+                item = _END
+                break
+    counter.blocked += time.monotonic() - started
+    return item
+
+
+def run_pipeline(rows, parse_chunk, write_chunk, chunk_size=PIPELINE_CHUNK, queue_size=PIPELINE_QUEUE):
     """
-    Competitions(competition_id PK, competition_name, competition_sub_type, competition_type, country_name)
-    competition_id is REQUIRED.
+    Streams `rows` through parse_chunk (list of CSV rows -> list of values) and
+    write_chunk (list of values -> None). Returns the stage counters.
+    An exception in any stage stops the others and is re-raised here.
+    """
+    reader = StageCounter("reader")
+    parser = StageCounter("parser")
+    writer = StageCounter("writer")
+    raw_queue = queue.Queue(maxsize=queue_size)
+    parsed_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    failures = []
+
+    def read_stage():
+        try:
+            iterator = iter(rows)
+            while not stop.is_set():
+                started = time.monotonic()
+                chunk = [row for _, row in zip(range(chunk_size), iterator)]
+                reader.busy += time.monotonic() - started
+                if not chunk:
+                    break
+                reader.items += len(chunk)
+                _put(raw_queue, chunk, stop, reader)
+        except Exception as e:
+            failures.append(e)
+            stop.set()
+        finally:
+            _put(raw_queue, _END, stop, reader)
+
+    def parse_stage():
+        try:
+            while True:
+                chunk = _get(raw_queue, stop, parser)
+                if chunk is _END:
+                    break
+                started = time.monotonic()
+                parsed = parse_chunk(chunk)
+                parser.busy += time.monotonic() - started
+                parser.items += len(chunk)
+                _put(parsed_queue, parsed, stop, parser)
+        except Exception as e:
+            failures.append(e)
+            stop.set()
+        finally:
+            _put(parsed_queue, _END, stop, parser)
+
+    threads = [threading.Thread(target=read_stage, daemon=True),
+               threading.Thread(target=parse_stage, daemon=True)]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            values = _get(parsed_queue, stop, writer)
+            if values is _END:
+                break
+            started = time.monotonic()
+            write_chunk(values)
+            writer.busy += time.monotonic() - started
+            writer.items += len(values)
+    except Exception:
+        stop.set()
+        raise
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    if failures:
+        raise failures[0]
+    return {c.name: c.as_dict() for c in (reader, parser, writer)}
+
+
+def print_pipeline_stats(table, stages):
+    bottleneck = max(stages, key=lambda name: stages[name]["busy_s"])
+    print(f"Pipeline ({table}):")
+    for name, counter in stages.items():
+        print(f"  {name:<7} {counter['items']} rows, busy {counter['busy_s']}s, "
+              f"blocked {counter['blocked_s']}s, {counter['rows_per_s']} rows/s")
+    print(f"  bottleneck: {bottleneck}")
+
+
+# -----------------------------
+# Column definitions
+#   One source of truth for how a CSV column maps to a DB column.
+#   Used by the Python parsers (row mode) and to generate LOAD DATA statements (infile mode).
+#
+#   name:    DB column
+#   sources: CSV column(s); with several, the first non-empty one wins
+#   kind:    int | float | str | date
+#   max_len: truncate strings to this length
+#   default: value used when the CSV value is empty
+# -----------------------------
+
+Column = namedtuple("Column", "name sources kind max_len default", defaults=(None, None))
+
+# id_mode:
+#   natural  -> id comes from CSV, duplicates are skipped (Clubs, Competitions)
+#   allocate -> CSV id is used when possible, duplicates get a fresh id (Players)
+#   optional -> like allocate if the CSV has the id column, else AUTO_INCREMENT (Games, Transfers)
+# natural_key: columns identifying a row when the CSV has no id column (used by delta mode)
+# foreign_keys: references checked in Python before the rows reach MySQL (see ForeignKeyChecker)
+TableSpec = namedtuple("TableSpec", "table row_label id_mode columns required natural_key foreign_keys",
+                       defaults=((), ()))
+
+# action follows the schema's ON DELETE rule for the constraint:
+#   null   -> unknown reference is set to NULL and the row is still loaded (ON DELETE SET NULL)
+#   reject -> the row is not loaded (ON DELETE CASCADE)
+ForeignKey = namedtuple("ForeignKey", "column ref_table ref_column action")
+
+CLUBS = TableSpec(
+    table="Clubs",
+    row_label="club",
+    id_mode="natural",
+    columns=[
+        Column("club_id", ("club_id",), "int"),
+        Column("club_code", ("club_code",), "str", 100),
+        Column("name", ("name",), "str", 255),
+        Column("squad_size", ("squad_size",), "int", default=0),
+        Column("average_age", ("average_age",), "float"),
+        Column("stadium_name", ("stadium_name",), "str", 255),
+        Column("stadium_seats", ("stadium_seats",), "int"),
+        Column("url", ("url",), "str", 500),
+    ],
+    required=("club_id", "name"),
+)
+
+COMPETITIONS = TableSpec(
+    table="Competitions",
+    row_label="competition",
+    id_mode="natural",
+    columns=[
+        Column("competition_id", ("competition_id",), "str", 10),
+        Column("competition_name", ("name",), "str", 20),
+        Column("competition_sub_type", ("sub_type",), "str", 20),
+        Column("competition_type", ("type",), "str", 20),
+        Column("country_name", ("country_name",), "str", 10),
+    ],
+    required=("competition_id",),
+)
+
+PLAYERS = TableSpec(
+    table="Players",
+    row_label="player",
+    id_mode="allocate",
+    columns=[
+        Column("player_id", ("player_id",), "int"),
+        Column("name", ("name",), "str", 100),
+        Column("current_club_id", ("current_club_id",), "int"),
+        Column("last_season", ("last_season",), "int"),
+        Column("country_of_citizenship", ("country_of_citizenship",), "str", 50),
+        Column("date_of_birth", ("date_of_birth",), "date"),
+        Column("position", ("position",), "str", 50),
+        Column("sub_position", ("sub_position",), "str", 50),
+        Column("foot", ("foot",), "str", 10),
+        # CSV might have market_value_in_eur like in Transfermarkt datasets
+        Column("market_value", ("market_value", "market_value_in_eur"), "float"),
+        Column("image_url", ("image_url",), "str", 500),
+    ],
+    required=("name",),
+    natural_key=("name", "date_of_birth"),
+    foreign_keys=(
+        ForeignKey("current_club_id", "Clubs", "club_id", "null"),
+    ),
+)
+
+# clubs + competition are nullable in the schema, but a non-null value must exist
+GAMES = TableSpec(
+    table="Games",
+    row_label="game",
+    id_mode="optional",
+    columns=[
+        Column("game_id", ("game_id",), "int"),
+        Column("home_club_id", ("home_club_id",), "int"),
+        Column("away_club_id", ("away_club_id",), "int"),
+        Column("season", ("season",), "int"),
+        Column("date", ("date",), "date"),
+        Column("home_club_goals", ("home_club_goals",), "int"),
+        Column("away_club_goals", ("away_club_goals",), "int"),
+        Column("stadium", ("stadium",), "str", 100),
+        Column("attendance", ("attendance",), "int"),
+        Column("competition_id", ("competition_id",), "str", 10),
+    ],
+    required=(),
+    natural_key=("date", "home_club_id", "away_club_id"),
+    foreign_keys=(
+        ForeignKey("home_club_id", "Clubs", "club_id", "reject"),
+        ForeignKey("away_club_id", "Clubs", "club_id", "reject"),
+        ForeignKey("competition_id", "Competitions", "competition_id", "reject"),
+    ),
+)
+
+# transfer_season and player_name are NOT NULL in schema
+TRANSFERS = TableSpec(
+    table="Transfers",
+    row_label="transfer",
+    id_mode="optional",
+    columns=[
+        Column("transfer_id", ("transfer_id",), "int"),
+        Column("player_id", ("player_id",), "int"),
+        Column("transfer_date", ("transfer_date",), "date"),
+        Column("transfer_season", ("transfer_season",), "str", 50),
+        Column("from_club_id", ("from_club_id",), "int"),
+        Column("to_club_id", ("to_club_id",), "int"),
+        Column("from_club_name", ("from_club_name",), "str", 100),
+        Column("to_club_name", ("to_club_name",), "str", 100),
+        Column("transfer_fee", ("transfer_fee",), "float"),
+        Column("market_value_in_eur", ("market_value_in_eur",), "float"),
+        Column("player_name", ("player_name",), "str", 100),
+    ],
+    required=("transfer_season", "player_name"),
+    natural_key=("player_id", "transfer_date", "transfer_season", "from_club_id", "to_club_id"),
+    foreign_keys=(
+        ForeignKey("player_id", "Players", "player_id", "reject"),
+        ForeignKey("from_club_id", "Clubs", "club_id", "null"),
+        ForeignKey("to_club_id", "Clubs", "club_id", "null"),
+    ),
+)
+
+
+TABLE_SPECS = {spec.table: spec for spec in (CLUBS, COMPETITIONS, PLAYERS, GAMES, TRANSFERS)}
+
+# FK dependencies: a table is loaded only after the tables it references
+DEPENDENCIES = {
+    "Clubs": (),
+    "Competitions": (),
+    "Players": ("Clubs",),
+    "Games": ("Clubs", "Competitions"),
+    "Transfers": ("Players", "Clubs"),
+}
+
+
+def parse_column(column, row):
+    """
+    Row-at-a-time conversion of one column from a csv.DictReader row.
+    The loaders use ColumnarDecoder (same result, memoized); this stays as the
+    reference implementation and the baseline in benchmarks/decoder_benchmark.py.
     """
+    raw = None
+    for source in column.sources:
+        raw = row.get(source)
+        if raw:
+            break
+
+    if column.kind == "int":
+        value = parse_int(raw)
+    elif column.kind == "float":
+        value = parse_float(raw)
+    elif column.kind == "date":
+        value = parse_date(raw)
+    else:
+        value = parse_str(raw, column.max_len)
+
+    if value is None and column.default is not None:
+        return column.default
+    return value
+
+
+# -----------------------------
+# CSV input
+#   Files are read once, as a stream: the header comes from the same stream as the rows.
+#   gzip / bz2 / zstd files are decompressed on the fly (detected from the magic bytes,
+#   then the extension), so compressed exports never have to be unpacked to disk.
+#   zstd needs Python 3.14+ or the optional `zstandard` package.
+# -----------------------------
+
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}
+
+READ_BUFFER = 1024 * 1024
+
+
+def detect_compression(csv_file_path):
+    """'gzip', 'bz2', 'zstd' or None for a plain CSV."""
+    with open(csv_file_path, "rb") as f:
+        magic = f.read(4)
+    for prefix, compression in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            return compression
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(csv_file_path)[1].lower())
+
+
+def find_csv(csv_dir, name):
+    """Path of name (e.g. clubs.csv) in csv_dir, preferring a plain file over .gz/.bz2/.zst."""
+    for extension in ("",) + tuple(COMPRESSION_EXTENSIONS):
+        path = os.path.join(csv_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(csv_dir, name)
+
+
+def _decompressor(compression, fileobj):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(fileobj, mode="rb")
     try:
-        conn = get_conn()
-        cursor = conn.cursor()
+        from compression import zstd
+        return zstd.ZstdFile(fileobj, mode="rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Reading .zst files needs Python 3.14+ or `pip install zstandard`")
+    return zstandard.ZstdDecompressor().stream_reader(fileobj)
 
-        insert_query = """
-            INSERT INTO Competitions (
-                competition_id, competition_name, competition_sub_type, competition_type, country_name
-            )
-            VALUES (%s, %s, %s, %s, %s)
-        """
 
-        inserted, skipped, errors = 0, 0, 0
+class _CountingReader(io.RawIOBase):
+    """Counts the bytes read through a binary stream."""
 
-        with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
 
-            for row in reader:
-                try:
-                    competition_id = parse_str(row.get("competition_id"), 10)
-                    if not competition_id:
-                        skipped += 1
-                        continue
+    def readable(self):
+        return True
 
-                    values = (
-                        competition_id,
-                        parse_str(row.get("name"), 20),
-                        parse_str(row.get("sub_type"), 20),
-                        parse_str(row.get("type"), 20),
-                        parse_str(row.get("country_name"), 10),
-                    )
+    def seekable(self):
+        return self.stream.seekable()
 
-                    cursor.execute(insert_query, values)
-                    inserted += 1
-                    commit_every(conn, inserted)
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.stream.seek(offset, whence)
 
-                except mysql.connector.IntegrityError as e:
-                    if "Duplicate entry" in str(e):
-                        skipped += 1
-                    else:
-                        print(f"Integrity error (Competitions): {e}")
-                        errors += 1
-                except Exception as e:
-                    print(f"Error inserting competition row: {e}")
-                    errors += 1
+    def tell(self):
+        return self.stream.tell()
 
-        conn.commit()
-        print("\n=== Competitions Import Summary ===")
-        print(f"Inserted: {inserted}")
-        print(f"Skipped:  {skipped}")
-        print(f"Errors:   {errors}")
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self.count += len(data)
+        return len(data)
 
-        cursor.close()
-        conn.close()
+    def close(self):
+        self.stream.close()
+        super().close()
 
-    except Error as e:
-        print(f"Database error (Competitions): {e}")
-    except FileNotFoundError:
-        print(f"CSV file not found: {csv_file_path}")
 
+class CsvSource:
+    """
+    One pass over a plain or compressed CSV: .fieldnames is available right away and
+    iterating yields the data rows as lists (csv.reader).
+
+    With start/end only rows whose line starts inside [start, end) are read,
+    so consecutive shards together cover every row exactly once.
+    positions=True yields (row, byte offset just after the row) pairs; the offset is a
+    line start, so it can be passed back as `start` to continue after that row.
+    Offsets count decompressed bytes; compressed files cannot be split into shards,
+    and resuming one decompresses (without parsing) everything before `start`.
+    """
 
-def load_players_from_csv(csv_file_path):
+    def __init__(self, csv_file_path, start=None, end=None, positions=False):
+        self.path = csv_file_path
+        self.start = start
+        self.end = end
+        self.positions = positions
+        self.compression = detect_compression(csv_file_path)
+
+        self._compressed = _CountingReader(open(csv_file_path, "rb"))
+        self._decompressed = self._compressed
+        if self.compression is not None:
+            self._decompressed = _CountingReader(_decompressor(self.compression, self._compressed))
+        self._buffer = io.BufferedReader(self._decompressed, READ_BUFFER)
+        self._text = None
+        self.started = time.monotonic()
+
+        header = self._buffer.readline()
+        self.data_start = len(header)
+        self.fieldnames = next(csv.reader([header.decode("utf-8")]), [])
+
+    def __iter__(self):
+        if self.start is None and not self.positions:
+            self._text = io.TextIOWrapper(self._buffer, encoding="utf-8", newline="")
+            yield from csv.reader(self._text)
+            return
+
+        f = self._buffer
+        position = self.data_start
+        if self.start is not None and self.start > position:
+            # stop one byte early: if start is already a line start we only consume the previous newline
+            if self.compression is None:
+                f.seek(self.start - 1)
+                position = self.start - 1
+            else:
+                while position < self.start - 1:
+                    skipped = f.read(min(READ_BUFFER, self.start - 1 - position))
+                    if not skipped:
+                        break
+                    position += len(skipped)
+            position += len(f.readline())
+        end = self.end if self.end is not None else float("inf")
+
+        # csv.reader pulls lines only until the current record is complete,
+        # so after each row next_row[0] is exactly where the next row starts
+        next_row = [position]
+
+        def lines():
+            while next_row[0] < end:
+                line = f.readline()
+                if not line:
+                    break
+                next_row[0] += len(line)
+                yield line.decode("utf-8")
+
+        for row in csv.reader(lines()):
+            yield (row, next_row[0]) if self.positions else row
+
+    def stats(self):
+        """Bytes read so far (compressed and decompressed) and the time spent since opening."""
+        return {
+            "compression": self.compression,
+            "compressed_bytes": self._compressed.count,
+            "bytes": self._decompressed.count,
+            "seconds": time.monotonic() - self.started,
+        }
+
+    def close(self):
+        (self._text or self._buffer).close()
+        # the decompressors leave the underlying file open
+        self._compressed.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(csv_file_path):
+    with CsvSource(csv_file_path) as source:
+        return source.fieldnames
+
+
+def compute_shards(csv_file_path, shard_count):
     """
-    This is a cleaned-up equivalent of your load_players.py:
-    Players(player_id PK AUTO_INCREMENT, name, current_club_id FK->Clubs, last_season, ...)
-    - If CSV contains player_id, we try to use it (and fix duplicates).
-    - Otherwise we allocate new IDs starting from MAX(player_id).
+    Splits the data part of a CSV (after the header) into shard_count byte ranges.
+    Ranges are aligned to line starts when they are read (see CsvSource).
+    Note: a quoted value containing a newline must not straddle a shard boundary,
+    which holds for the Kaggle exports. Compressed files are never split.
     """
-    try:
-        conn = get_conn()
-        cursor = conn.cursor()
+    with CsvSource(csv_file_path) as source:
+        data_start = source.data_start
+        compression = source.compression
+    if compression is not None:
+        return [(None, None)]
+    size = os.path.getsize(csv_file_path)
+
+    shard_count = max(1, shard_count)
+    if size - data_start < shard_count:
+        return [(data_start, size)]
+
+    step = (size - data_start) // shard_count
+    bounds = [data_start + i * step for i in range(shard_count)] + [size]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_records(csv_file_path, start=None, end=None, positions=False):
+    """Yields the data rows of a CSV (see CsvSource for start/end/positions)."""
+    with CsvSource(csv_file_path, start, end, positions) as source:
+        yield from source
+
+
+def format_read_stats(stats):
+    """'12.3 MB gzip (40.1 MB/s) -> 80.2 MB CSV (261.0 MB/s)' for one or more CsvSource.stats()."""
+    stats = [s for s in stats if s]
+    if not stats:
+        return ""
+    seconds = max(s["seconds"] for s in stats) or 1e-9
+    raw = sum(s["bytes"] for s in stats) / 2 ** 20
+    compression = stats[0]["compression"]
+    if compression is None:
+        return f"{raw:.1f} MB CSV ({raw / seconds:.1f} MB/s)"
+    compressed = sum(s["compressed_bytes"] for s in stats) / 2 ** 20
+    return (f"{compressed:.1f} MB {compression} ({compressed / seconds:.1f} MB/s) -> "
+            f"{raw:.1f} MB CSV ({raw / seconds:.1f} MB/s)")
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = [item for _, item in zip(range(size), iterator)]
+        if not chunk:
+            return
+        yield chunk
 
-        max_id = get_max_id(cursor, "Players", "player_id")
-        print(f"Current max player_id in database: {max_id}")
 
-        insert_query = """
-            INSERT INTO Players (
-                player_id, name, current_club_id, last_season, country_of_citizenship,
-                date_of_birth, position, sub_position, foot, market_value, image_url
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+# -----------------------------
+# Columnar decoder
+#   Header positions are resolved once, then a chunk of csv.reader rows is converted
+#   column by column into ready-to-insert tuples. Every column has a memoized
+#   converter: the big files repeat the same dates, seasons and club ids millions
+#   of times, so most cells become a dict lookup instead of strptime/float().
+# -----------------------------
+
+# Distinct raw values remembered per column (bounds memory on high-cardinality columns)
+MEMO_LIMIT = 65536
+
+
+def make_converter(column, memo_limit=MEMO_LIMIT):
+    """Memoized equivalent of parse_column for one column's raw string."""
+    if column.kind == "int":
+        parse = parse_int
+    elif column.kind == "float":
+        parse = parse_float
+    elif column.kind == "date":
+        parse = parse_date
+    else:
+        max_len = column.max_len
+        parse = lambda raw: parse_str(raw, max_len)
+
+    default = column.default
+    memo = {}
+
+    def convert(raw):
+        try:
+            return memo[raw]
+        except KeyError:
+            pass
+        value = parse(raw)
+        if value is None and default is not None:
+            value = default
+        if len(memo) < memo_limit:
+            memo[raw] = value
+        return value
+
+    return convert
+
+
+class ColumnarDecoder:
+    """Turns chunks of csv.reader rows into value tuples ordered like `columns`."""
+
+    def __init__(self, columns, fieldnames, memo_limit=MEMO_LIMIT):
+        index = {name: i for i, name in enumerate(fieldnames)}
+        self.width = len(fieldnames)
+        self.plan = [
+            ([index[source] for source in c.sources if source in index], make_converter(c, memo_limit))
+            for c in columns
+        ]
+
+    def decode(self, rows):
+        width = self.width
+        for row in rows:
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+
+        decoded = []
+        for positions, convert in self.plan:
+            if not positions:
+                decoded.append([convert(None)] * len(rows))
+            elif len(positions) == 1:
+                position = positions[0]
+                decoded.append([convert(row[position]) for row in rows])
+            else:
+                # first non-empty source wins (e.g. market_value / market_value_in_eur)
+                decoded.append([
+                    convert(next((row[p] for p in positions if row[p]), None)) for row in rows
+                ])
+        return list(zip(*decoded))
+
+
+def get_load_columns(spec, fieldnames):
+    """Columns that go into the INSERT (the id column is dropped for 'optional' tables without it)."""
+    id_col = spec.columns[0]
+    if spec.id_mode == "optional" and id_col.name not in fieldnames:
+        return spec.columns[1:]
+    return spec.columns
+
+
+# -----------------------------
+# Foreign key pre-validation
+#   The referenced keys (Clubs, Competitions, Players) are loaded once per load task and
+#   every decoded row is checked in Python, so a bad reference costs a lookup instead of
+#   an IntegrityError round trip (plus a retry) per row. Rows that were rejected or had a
+#   reference set to NULL are written, with the reason, to <dead-letter dir>/<table>.csv.
+# -----------------------------
+
+DEAD_LETTER_DIR = "dead_letter"
+
+
+def load_key_set(cursor, table, column):
+    """All values of table.column: an IdBitmap for int keys, a set otherwise."""
+    kind = next((c.kind for c in TABLE_SPECS[table].columns if c.name == column), "str")
+    keys = IdBitmap() if kind == "int" else set()
+    cursor.execute(f"SELECT {column} FROM {table}")
+    for (value,) in cursor:
+        if value is not None:
+            keys.add(value)
+    return keys
+
+
+class ForeignKeyChecker:
+    """Checks decoded value tuples (ordered like `columns`) against spec.foreign_keys."""
+
+    def __init__(self, cursor, spec, columns):
+        positions = {c.name: i for i, c in enumerate(columns)}
+        key_sets = {}
+        self.checks = []
+        for fk in spec.foreign_keys:
+            if fk.column not in positions:
+                continue
+            ref = (fk.ref_table, fk.ref_column)
+            if ref not in key_sets:
+                key_sets[ref] = load_key_set(cursor, *ref)
+                print(f"{spec.table}: checking references against {len(key_sets[ref])} {fk.ref_table} keys")
+            self.checks.append((positions[fk.column], fk, key_sets[ref]))
+        self.rejected = 0
+        self.nulled = 0
+
+    def check(self, values):
+        """
+        Returns (values, reasons, rejected).
+        References with action "null" are already set to None in the returned values.
         """
+        reasons = []
+        rejected = False
+        for position, fk, keys in self.checks:
+            value = values[position]
+            if value is None or value in keys:
+                continue
+            reasons.append(f"{fk.column}={value} not in {fk.ref_table}")
+            if fk.action == "reject":
+                rejected = True
+            else:
+                values = values[:position] + (None,) + values[position + 1:]
+
+        if rejected:
+            self.rejected += 1
+        elif reasons:
+            self.nulled += 1
+        return values, reasons, rejected
+
+
+class DeadLetterWriter:
+    """
+    Writes problem rows as they appeared in the CSV plus two extra columns
+    (dead_letter_action, dead_letter_reason). The file is only created on the first row;
+    every shard writes its own file. append=True (resumed loads) keeps the earlier rows.
+    """
+
+    def __init__(self, directory, table, fieldnames, shard_index=0, shard_count=1, append=False):
+        name = f"{table}.csv" if shard_count == 1 else f"{table}.shard{shard_index}.csv"
+        self.path = os.path.join(directory, name)
+        self.fieldnames = fieldnames
+        self.append = append
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row, action, reasons):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            new_file = not (self.append and os.path.exists(self.path))
+            self._file = open(self.path, "w" if new_file else "a", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            if new_file:
+                self._writer.writerow(list(self.fieldnames) + ["dead_letter_action", "dead_letter_reason"])
+        self._writer.writerow(row[:len(self.fieldnames)] + [action, "; ".join(reasons)])
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
-        inserted, skipped, errors = 0, 0, 0
-        used_ids = set()
 
-        with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
+# -----------------------------
+# Checkpoints (--resume)
+#   Row mode stores its progress in LoadCheckpoints (one row per table / shard) right before
+#   every COMMIT, in the same transaction as the rows, so the checkpoint can never be ahead
+#   of or behind the data. A resumed load seeks to the saved byte offset and continues with
+#   the saved max_id, so rows that already made it in are neither re-read nor re-inserted.
+# -----------------------------
 
-            for row in reader:
+CHECKPOINT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS LoadCheckpoints (
+        table_name VARCHAR(32) NOT NULL,
+        shard VARCHAR(64) NOT NULL,
+        csv_size BIGINT NOT NULL,
+        byte_offset BIGINT NOT NULL,
+        rows_read BIGINT NOT NULL,
+        max_id BIGINT,
+        batches INT NOT NULL,
+        inserted BIGINT NOT NULL,
+        finished TINYINT(1) NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (table_name, shard)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+class LoadCheckpoint:
+    """Progress of one row-mode load task (a whole CSV or one shard of it)."""
+
+    def __init__(self, cursor, table, csv_file_path, shard_index=0, shard_count=1, start=None):
+        self.cursor = cursor
+        self.table = table
+        # the shard start is part of the key: resuming with another --shards value starts over
+        self.shard = f"{shard_index}/{shard_count}@{start or 0}"
+        self.csv_size = os.path.getsize(csv_file_path)
+        self.batches = 0
+        self.inserted = 0
+        cursor.execute(CHECKPOINT_TABLE_SQL)
+
+    def load(self):
+        """Saved state as a dict, or None when there is nothing to resume."""
+        self.cursor.execute(
+            "SELECT csv_size, byte_offset, rows_read, max_id, batches, inserted, finished "
+            "FROM LoadCheckpoints WHERE table_name = %s AND shard = %s",
+            (self.table, self.shard),
+        )
+        res = self.cursor.fetchone()
+        if not res:
+            return None
+        csv_size, byte_offset, row_number, max_id, batches, inserted, finished = res
+        if csv_size != self.csv_size:
+            print(f"{self.table}: CSV size changed since the checkpoint ({csv_size} -> {self.csv_size}), "
+                  f"not resuming")
+            return None
+        self.batches, self.inserted = batches, inserted
+        return {
+            "byte_offset": byte_offset,
+            "row_number": row_number,
+            "max_id": max_id,
+            "batches": batches,
+            "inserted": inserted,
+            "finished": bool(finished),
+        }
+
+    def save(self, byte_offset, row_number, max_id, inserted, finished=False):
+        """Writes the checkpoint; the caller's COMMIT makes it durable together with the rows."""
+        self.batches += 1
+        self.cursor.execute(
+            """
+            INSERT INTO LoadCheckpoints
+                (table_name, shard, csv_size, byte_offset, rows_read, max_id, batches, inserted, finished)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                csv_size = VALUES(csv_size), byte_offset = VALUES(byte_offset),
+                rows_read = VALUES(rows_read), max_id = VALUES(max_id), batches = VALUES(batches),
+                inserted = VALUES(inserted), finished = VALUES(finished)
+            """,
+            (self.table, self.shard, self.csv_size, byte_offset, row_number, max_id,
+             self.batches, self.inserted + inserted, int(finished)),
+        )
+
+
+# -----------------------------
+# Loaders (FK order)
+#   1) Clubs
+#   2) Competitions
+#   3) Players
+#   4) Games
+#   5) Transfers
+# -----------------------------
+
+def load_rows(table, csv_file_path, max_id=None, start=None, end=None, shard_index=0, shard_count=1,
+              batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE, pipeline=False, dead_letter_dir=DEAD_LETTER_DIR,
+              resume=False, low_memory=False):
+    """
+    Row mode worker: parses CSV rows (the whole file or one byte-range shard) in Python
+    and writes them with batched multi-row INSERTs on its own connection.
+    Rows missing a required column are skipped; duplicate ids are handled per spec.id_mode.
+    max_id is the table's MAX(id) before the load (None when ids are not allocated here).
+    pipeline=True overlaps reading, parsing and INSERTs (see run_pipeline).
+    Foreign keys are checked before insert; affected rows go to dead_letter_dir.
+    Progress is checkpointed with every COMMIT; resume=True continues after the last one.
+    low_memory=True caps every buffer (see LOW_MEMORY) and tracks used ids in a bitmap.
+
+    Returns the counters so sharded loads can be summed up by the caller.
+    """
+    spec = TABLE_SPECS[table]
+    conn = get_conn()
+    cursor = conn.cursor()
+    dead_letter = None
+    source = None
+
+    try:
+        checkpoint = LoadCheckpoint(cursor, spec.table, csv_file_path, shard_index, shard_count, start)
+        saved = checkpoint.load() if resume else None
+
+        if saved is not None and saved["finished"]:
+            print(f"{spec.table}: already loaded according to the checkpoint, skipping")
+            return {"inserted": 0, "skipped": 0, "errors": 0, "max_id": saved["max_id"], "stages": None}
+
+        row_number = 0
+        if saved is not None:
+            start, row_number = saved["byte_offset"], saved["row_number"]
+            if max_id is not None and saved["max_id"] is not None:
+                max_id = max(max_id, saved["max_id"])
+            print(f"{spec.table}: resuming after row {row_number} (byte {start}, "
+                  f"{saved['inserted']} rows already inserted)")
+
+        # header and rows come from the same (possibly compressed) stream
+        source = CsvSource(csv_file_path, start, end, positions=True)
+        fieldnames = source.fieldnames
+        columns = get_load_columns(spec, fieldnames)
+
+        fk_checker = ForeignKeyChecker(cursor, spec, columns)
+        dead_letter = DeadLetterWriter(dead_letter_dir, spec.table, fieldnames, shard_index, shard_count,
+                                       append=saved is not None)
+
+        ids = None
+        if max_id is not None:
+            ids = IdAllocator(max_id, stride=shard_count, offset=shard_index, compact=low_memory)
+
+        insert_query = f"""
+            INSERT INTO {spec.table} (
+                {", ".join(c.name for c in columns)}
+            )
+            VALUES ({", ".join(["%s"] * len(columns))})
+        """
+
+        if spec.id_mode == "natural":
+            # Duplicate PK -> skip (if you prefer to ignore duplicates)
+            on_duplicate = skip_duplicate
+        elif ids is not None:
+            # Duplicate PK in the database -> allocate a fresh ID and retry once
+            on_duplicate = lambda values: (ids.fresh(),) + values[1:]
+        else:
+            on_duplicate = None
+
+        finished = [False]
+
+        def save_checkpoint(marker):
+            position, number = marker
+            checkpoint.save(position, number, ids.max_id if ids is not None else None,
+                            batch.inserted, finished[0])
+
+        batch = BatchInserter(conn, cursor, insert_query, spec.table, spec.row_label,
+                              on_duplicate=on_duplicate,
+                              batch_size=batch_size, commit_size=commit_size,
+                              before_commit=save_checkpoint,
+                              max_bytes=LOW_MEMORY["batch_bytes"] if low_memory else None)
+
+        required = [i for i, c in enumerate(columns) if c.name in spec.required]
+        parse_counts = {"skipped": 0, "errors": 0, "rows": row_number}
+        decoder = ColumnarDecoder(columns, fieldnames, LOW_MEMORY["memo"] if low_memory else MEMO_LIMIT)
+        chunk_size = LOW_MEMORY["chunk"] if low_memory else PIPELINE_CHUNK
+
+        def parse_chunk(records):
+            # records are (row, byte offset after the row); every parsed entry carries
+            # the checkpoint marker (offset, row number) of its row. When the chunk ends
+            # with skipped rows, a (None, marker) entry records that they are done too.
+            rows = [row for row, _ in records]
+            parsed = []
+            for (row, position), values in zip(records, decoder.decode(rows)):
+                parse_counts["rows"] += 1
+                marker = (position, parse_counts["rows"])
                 try:
-                    name = parse_str(row.get("name"), 100)
-                    if not name:
-                        skipped += 1
+                    if any(values[i] is None for i in required):
+                        parse_counts["skipped"] += 1
                         continue
 
-                    csv_player_id = parse_int(row.get("player_id"))
+                    values, reasons, rejected = fk_checker.check(values)
+                    if reasons:
+                        dead_letter.write(row, "rejected" if rejected else "nulled", reasons)
+                        if rejected:
+                            continue
 
-                    if csv_player_id is None or csv_player_id in used_ids:
-                        max_id += 1
-                        player_id = max_id
-                    else:
-                        player_id = csv_player_id
-                        if player_id > max_id:
-                            max_id = player_id
-
-                    used_ids.add(player_id)
-
-                    values = (
-                        player_id,
-                        name,
-                        parse_int(row.get("current_club_id")),
-                        parse_int(row.get("last_season")),
-                        parse_str(row.get("country_of_citizenship"), 50),
-                        parse_date(row.get("date_of_birth")),
-                        parse_str(row.get("position"), 50),
-                        parse_str(row.get("sub_position"), 50),
-                        parse_str(row.get("foot"), 10),
-                        # CSV might have market_value_in_eur like in Transfermarkt datasets
-                        parse_float(row.get("market_value")) if row.get("market_value") else parse_float(row.get("market_value_in_eur")),
-                        parse_str(row.get("image_url"), 500),
-                    )
-
-                    cursor.execute(insert_query, values)
-                    inserted += 1
-                    commit_every(conn, inserted)
-
-                except mysql.connector.IntegrityError as e:
-                    if "Duplicate entry" in str(e):
-                        # Allocate a fresh ID and retry once
-                        max_id += 1
-                        player_id = max_id
-                        values = (player_id,) + values[1:]
-                        try:
-                            cursor.execute(insert_query, values)
-                            inserted += 1
-                        except Exception as e2:
-                            print(f"Retry failed (Players): {e2}")
-                            errors += 1
-                    else:
-                        print(f"Integrity error (Players): {e}")
-                        errors += 1
-                except Exception as e:
-                    print(f"Error inserting player row: {e}")
-                    errors += 1
+                    if ids is not None:
+                        values = (ids.assign(values[0]),) + values[1:]
 
-        conn.commit()
+                    parsed.append((values, marker))
 
-        # Align AUTO_INCREMENT so next insert won't collide
-        cursor.execute(f"ALTER TABLE Players AUTO_INCREMENT = {max_id + 1}")
-        conn.commit()
+                except Exception as e:
+                    print(f"Error inserting {spec.row_label} row: {e}")
+                    parse_counts["errors"] += 1
+            if records and (not parsed or parsed[-1][1] != marker):
+                parsed.append((None, marker))
+            return parsed
+
+        def write_chunk(parsed):
+            for values, marker in parsed:
+                if values is None:
+                    batch.mark(marker)
+                else:
+                    batch.add(values, marker)
+
+        stages = None
+        if pipeline:
+            stages = run_pipeline(source, parse_chunk, write_chunk, chunk_size,
+                                  LOW_MEMORY["queue"] if low_memory else PIPELINE_QUEUE)
+        else:
+            for chunk in iter_chunks(source, chunk_size):
+                write_chunk(parse_chunk(chunk))
+
+        # the last COMMIT also marks the checkpoint as finished
+        finished[0] = True
+        if batch.marker is None:
+            batch.mark((start or 0, row_number))
+        batch.finish()
+
+        return {
+            "inserted": batch.inserted,
+            "skipped": batch.skipped + parse_counts["skipped"],
+            "errors": batch.errors + parse_counts["errors"],
+            "commits": batch.commits,
+            "max_id": ids.max_id if ids is not None else None,
+            "fk_rejected": fk_checker.rejected,
+            "fk_nulled": fk_checker.nulled,
+            "dead_letter": dead_letter.path if dead_letter.count else None,
+            "read": source.stats(),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+        }
+    finally:
+        if source is not None:
+            source.close()
+        if dead_letter is not None:
+            dead_letter.close()
+        cursor.close()
+        conn.close()
 
-        print("\n=== Players Import Summary ===")
-        print(f"Inserted: {inserted}")
-        print(f"Skipped:  {skipped}")
-        print(f"Errors:   {errors}")
-        print(f"Next player_id: {max_id + 1}")
 
+def prepare_table_load(spec, csv_file_path):
+    """Reads MAX(id) when the loader allocates ids for this table/CSV, else returns None."""
+    id_col = spec.columns[0].name
+    if spec.id_mode == "natural" or get_load_columns(spec, read_header(csv_file_path))[0].name != id_col:
+        return None
+
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        max_id = get_max_id(cursor, spec.table, id_col)
+    finally:
         cursor.close()
         conn.close()
+    print(f"Current max {id_col} in database: {max_id}")
+    return max_id
+
+
+def finish_table_load(spec, results):
+    """Sums shard counters, aligns AUTO_INCREMENT and prints the import summary."""
+    totals = {key: sum(r.get(key, 0) for r in results) for key in ("inserted", "skipped", "errors", "commits")}
+    max_ids = [r["max_id"] for r in results if r["max_id"] is not None]
+    next_id = max(max_ids) + 1 if max_ids else None
 
+    if next_id is not None:
+        # Align AUTO_INCREMENT so next insert won't collide
+        conn = get_conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"ALTER TABLE {spec.table} AUTO_INCREMENT = {next_id}")
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    print(f"\n=== {spec.table} Import Summary ===")
+    print(f"Inserted: {totals['inserted']}")
+    print(f"Skipped:  {totals['skipped']}")
+    print(f"Errors:   {totals['errors']}")
+    rejected = sum(r.get("fk_rejected", 0) for r in results)
+    nulled = sum(r.get("fk_nulled", 0) for r in results)
+    if rejected or nulled:
+        print(f"Rejected (unknown FK):     {rejected}")
+        print(f"Loaded with FK set NULL:   {nulled}")
+        for result in results:
+            if result.get("dead_letter"):
+                print(f"Dead-letter rows: {result['dead_letter']}")
+    if next_id is not None:
+        print(f"Next {spec.columns[0].name}: {next_id}")
+    read = format_read_stats([r.get("read") for r in results])
+    if read:
+        print(f"Read:     {read}")
+    peaks = [r["peak_rss_mb"] for r in results if r.get("peak_rss_mb") is not None]
+    if peaks:
+        # per worker process; sequential loads report the whole run so far
+        print(f"Peak memory: {max(peaks)} MB")
+    for result in results:
+        if result.get("stages"):
+            print_pipeline_stats(spec.table, result["stages"])
+    return totals
+
+
+def load_table_from_csv(spec, csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE, pipeline=False,
+                        dead_letter_dir=DEAD_LETTER_DIR, resume=False, low_memory=False):
+    """Loads one table on a single connection (row mode)."""
+    try:
+        max_id = prepare_table_load(spec, csv_file_path)
+        result = load_rows(spec.table, csv_file_path, max_id,
+                           batch_size=batch_size, commit_size=commit_size, pipeline=pipeline,
+                           dead_letter_dir=dead_letter_dir, resume=resume, low_memory=low_memory)
+        return finish_table_load(spec, [result])
     except Error as e:
-        print(f"Database error (Players): {e}")
+        print(f"Database error ({spec.table}): {e}")
     except FileNotFoundError:
         print(f"CSV file not found: {csv_file_path}")
 
 
-def load_games_from_csv(csv_file_path):
+def load_clubs_from_csv(csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE):
+    """
+    Clubs(club_id PK, club_code, name, squad_size, average_age, stadium_name, stadium_seats, url)
+    club_id is REQUIRED.
+    """
+    load_table_from_csv(CLUBS, csv_file_path, batch_size, commit_size)
+
+
+def load_competitions_from_csv(csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE):
+    """
+    Competitions(competition_id PK, competition_name, competition_sub_type, competition_type, country_name)
+    competition_id is REQUIRED.
+    """
+    load_table_from_csv(COMPETITIONS, csv_file_path, batch_size, commit_size)
+
+
+def load_players_from_csv(csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE):
+    """
+    This is a cleaned-up equivalent of your load_players.py:
+    Players(player_id PK AUTO_INCREMENT, name, current_club_id FK->Clubs, last_season, ...)
+    - If CSV contains player_id, we try to use it (and fix duplicates).
+    - Otherwise we allocate new IDs starting from MAX(player_id).
+    """
+    load_table_from_csv(PLAYERS, csv_file_path, batch_size, commit_size)
+
+
+def load_games_from_csv(csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE):
     """
     Games(game_id PK AUTO_INCREMENT, home_club_id FK->Clubs, away_club_id FK->Clubs, ..., competition_id FK->Competitions)
 
@@ -350,267 +1466,515 @@ def load_games_from_csv(csv_file_path):
       - If CSV has game_id: insert with explicit game_id (and fix duplicates like Players)
       - Else: insert without game_id and let AUTO_INCREMENT handle it
     """
-    try:
-        conn = get_conn()
-        cursor = conn.cursor()
+    load_table_from_csv(GAMES, csv_file_path, batch_size, commit_size)
 
-        # detect if CSV has 'game_id'
-        with open(csv_file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames or []
 
-        has_game_id = "game_id" in fieldnames
+def load_transfers_from_csv(csv_file_path, batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE):
+    """
+    Transfers(transfer_id PK AUTO_INCREMENT, player_id FK->Players, from_club_id FK->Clubs, to_club_id FK->Clubs, ...)
 
-        if has_game_id:
-            max_id = get_max_id(cursor, "Games", "game_id")
-            print(f"Current max game_id in database: {max_id}")
-            used_ids = set()
+    Supports two modes:
+      - If CSV has transfer_id: insert with explicit transfer_id (and fix duplicates)
+      - Else: let AUTO_INCREMENT handle it
+    """
+    load_table_from_csv(TRANSFERS, csv_file_path, batch_size, commit_size)
 
-            insert_query = """
-                INSERT INTO Games (
-                    game_id, home_club_id, away_club_id, season, date,
-                    home_club_goals, away_club_goals, stadium, attendance, competition_id
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-        else:
-            insert_query = """
-                INSERT INTO Games (
-                    home_club_id, away_club_id, season, date,
-                    home_club_goals, away_club_goals, stadium, attendance, competition_id
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
 
-        inserted, skipped, errors = 0, 0, 0
+# -----------------------------
+# LOAD DATA LOCAL INFILE (infile mode)
+#   Server-side bulk load generated from the same column definitions.
+#   Differences to row mode: LOCAL implies IGNORE, so duplicate keys are skipped
+#   (no id reallocation) and bad values become warnings instead of errors.
+# -----------------------------
 
-        with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
+def _sql_literal(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _infile_expression(column, variables):
+    """SQL expression converting the raw @variables of one column like parse_column does."""
+    cleaned = [f"NULLIF(TRIM({v}), '')" for v in variables]
+
+    if column.kind == "int":
+        converted = [f"TRUNCATE({c}, 0)" for c in cleaned]
+    elif column.kind == "date":
+        converted = [
+            f"COALESCE(STR_TO_DATE(SUBSTRING_INDEX({c}, ' ', 1), '%Y-%m-%d'), "
+            f"STR_TO_DATE(SUBSTRING_INDEX({c}, ' ', 1), '%d/%m/%Y'))"
+            for c in cleaned
+        ]
+    elif column.kind == "str" and column.max_len:
+        converted = [f"LEFT({c}, {column.max_len})" for c in cleaned]
+    else:
+        converted = cleaned
+
+    expression = converted[0] if len(converted) == 1 else f"COALESCE({', '.join(converted)})"
+    if column.default is not None:
+        expression = f"COALESCE({expression}, {column.default})"
+    return expression
 
-            for row in reader:
-                try:
-                    # minimal FK sanity: clubs + competition can be NULL? In schema: they are nullable,
-                    # but FK constraints will fail if non-null and not found.
-                    home_club_id = parse_int(row.get("home_club_id"))
-                    away_club_id = parse_int(row.get("away_club_id"))
-                    competition_id = parse_str(row.get("competition_id"), 10)
-
-                    if has_game_id:
-                        csv_game_id = parse_int(row.get("game_id"))
-
-                        if csv_game_id is None or csv_game_id in used_ids:
-                            max_id += 1
-                            game_id = max_id
-                        else:
-                            game_id = csv_game_id
-                            if game_id > max_id:
-                                max_id = game_id
-
-                        used_ids.add(game_id)
-
-                        values = (
-                            game_id,
-                            home_club_id,
-                            away_club_id,
-                            parse_int(row.get("season")),
-                            parse_date(row.get("date")),
-                            parse_int(row.get("home_club_goals")),
-                            parse_int(row.get("away_club_goals")),
-                            parse_str(row.get("stadium"), 100),
-                            parse_int(row.get("attendance")),
-                            competition_id,
-                        )
-                    else:
-                        values = (
-                            home_club_id,
-                            away_club_id,
-                            parse_int(row.get("season")),
-                            parse_date(row.get("date")),
-                            parse_int(row.get("home_club_goals")),
-                            parse_int(row.get("away_club_goals")),
-                            parse_str(row.get("stadium"), 100),
-                            parse_int(row.get("attendance")),
-                            competition_id,
-                        )
-
-                    cursor.execute(insert_query, values)
-                    inserted += 1
-                    commit_every(conn, inserted)
-
-                except mysql.connector.IntegrityError as e:
-                    if "Duplicate entry" in str(e) and has_game_id:
-                        max_id += 1
-                        game_id = max_id
-                        values = (game_id,) + values[1:]
-                        try:
-                            cursor.execute(insert_query, values)
-                            inserted += 1
-                        except Exception as e2:
-                            print(f"Retry failed (Games): {e2}")
-                            errors += 1
-                    else:
-                        print(f"Integrity error (Games): {e}")
-                        errors += 1
-                except Exception as e:
-                    print(f"Error inserting game row: {e}")
-                    errors += 1
 
+def build_load_data_sql(spec, csv_file_path, fieldnames, line_terminator="\\n"):
+    """
+    Generates the LOAD DATA LOCAL INFILE statement for a CSV with the given header:
+    used CSV columns are read into @variables, unused ones into @dummy,
+    and every DB column is filled with a SET conversion.
+    """
+    columns = get_load_columns(spec, fieldnames)
+    wanted = {source for c in columns for source in c.sources}
+
+    def variable(header):
+        return "@" + re.sub(r"\W", "_", header)
+
+    column_list = [variable(h) if h in wanted else "@dummy" for h in fieldnames]
+
+    set_list = []
+    for c in columns:
+        variables = [variable(s) for s in c.sources if s in fieldnames]
+        if variables:
+            set_list.append(f"{c.name} = {_infile_expression(c, variables)}")
+
+    path = os.path.abspath(csv_file_path).replace("\\", "/")
+    return (
+        f"LOAD DATA LOCAL INFILE {_sql_literal(path)}\n"
+        f"INTO TABLE {spec.table}\n"
+        f"CHARACTER SET utf8mb4\n"
+        f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"'\n"
+        f"LINES TERMINATED BY '{line_terminator}'\n"
+        f"IGNORE 1 LINES\n"
+        f"({', '.join(column_list)})\n"
+        f"SET {', '.join(set_list)}"
+    )
+
+
+def load_table_with_infile(spec, csv_file_path):
+    """Infile mode: runs the generated LOAD DATA statement and reports rows/warnings."""
+    try:
+        compression = detect_compression(csv_file_path)
+        if compression is not None:
+            # the server reads the file as is, it cannot be streamed through a decompressor
+            print(f"{spec.table}: infile mode needs an uncompressed CSV ({csv_file_path} is {compression}), "
+                  f"use --mode rows or delta")
+            return 0, 0
+
+        with open(csv_file_path, "r", encoding="utf-8", newline="") as f:
+            first_line = f.readline()
+        fieldnames = next(csv.reader([first_line]), [])
+        line_terminator = "\\r\\n" if first_line.endswith("\r\n") else "\\n"
+
+        sql = build_load_data_sql(spec, csv_file_path, fieldnames, line_terminator)
+
+        # Dedicated connection: local infile is only allowed for the CSV's own directory
+        conn = mysql.connector.connect(
+            **get_connect_args(),
+            allow_local_infile_in_path=os.path.dirname(os.path.abspath(csv_file_path)),
+        )
+        cursor = conn.cursor()
+
+        # Same as db/insert_data_from_csv_to_db.sql: FK order is not enforced during bulk import
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute(sql)
+        rows = cursor.rowcount
+        warning_count = cursor.warning_count
         conn.commit()
 
-        if has_game_id:
-            cursor.execute(f"ALTER TABLE Games AUTO_INCREMENT = {max_id + 1}")
-            conn.commit()
-            print(f"Next game_id: {max_id + 1}")
+        sample_warnings = []
+        if warning_count:
+            cursor.execute("SHOW WARNINGS LIMIT 5")
+            sample_warnings = cursor.fetchall()
+
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
 
-        print("\n=== Games Import Summary ===")
-        print(f"Inserted: {inserted}")
-        print(f"Skipped:  {skipped}")
-        print(f"Errors:   {errors}")
+        print(f"\n=== {spec.table} Import Summary (infile) ===")
+        print(f"Rows:     {rows}")
+        print(f"Warnings: {warning_count}")
+        for level, code, message in sample_warnings:
+            print(f"  {level} {code}: {message}")
 
         cursor.close()
         conn.close()
+        return rows, warning_count
 
     except Error as e:
-        print(f"Database error (Games): {e}")
+        print(f"Database error ({spec.table}): {e}")
     except FileNotFoundError:
         print(f"CSV file not found: {csv_file_path}")
+    return 0, 0
 
 
-def load_transfers_from_csv(csv_file_path):
-    """
-    Transfers(transfer_id PK AUTO_INCREMENT, player_id FK->Players, from_club_id FK->Clubs, to_club_id FK->Clubs, ...)
+# -----------------------------
+# Delta mode (weekly refresh)
+#   Every loaded row is fingerprinted (hash of its mapped columns) and the fingerprint is
+#   stored in LoadFingerprints. On the next run only new or changed rows are written with
+#   INSERT ... ON DUPLICATE KEY UPDATE; rows missing from the new CSV can optionally be deleted.
+#
+#   Row key: the CSV id when the file has the id column, otherwise a hash of spec.natural_key.
+#   Rows without a key are skipped, and only the first CSV row of a key is loaded (later ones
+#   go to the dead-letter file). New keyless rows get ids after MAX(id).
+#
+#   The first delta run against a table loaded in rows / infile mode (no fingerprints yet)
+#   fingerprints its existing rows first (seed_fingerprints), so they are matched by key and
+#   updated in place instead of being inserted a second time.
+# -----------------------------
 
-    Supports two modes:
-      - If CSV has transfer_id: insert with explicit transfer_id (and fix duplicates)
-      - Else: let AUTO_INCREMENT handle it
+FINGERPRINT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS LoadFingerprints (
+        table_name VARCHAR(32) NOT NULL,
+        row_key VARCHAR(64) NOT NULL,
+        row_id VARCHAR(32) NOT NULL,
+        fingerprint CHAR(32) NOT NULL,
+        PRIMARY KEY (table_name, row_key)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def _hash_values(values):
+    text = "\x1f".join("\\N" if v is None else str(v) for v in values)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_fingerprints(cursor, table):
+    """Stored fingerprints of a table: {row_key: (row_id, fingerprint)}."""
+    cursor.execute(
+        "SELECT row_key, row_id, fingerprint FROM LoadFingerprints WHERE table_name = %s",
+        (table,),
+    )
+    return {row_key: (row_id, fingerprint) for row_key, row_id, fingerprint in cursor}
+
+
+def seed_fingerprints(cursor, spec, keyed_by_id, batch_size=BATCH_SIZE):
+    """
+    Stores fingerprints for the rows already in the table, keyed like the CSV rows will
+    be (id, or natural key for id-less CSVs: the lowest id wins when the table has the
+    same key twice). Used when a table has no fingerprints yet; the caller commits.
+    Returns them like load_fingerprints().
     """
+    id_col = spec.columns[0].name
+    data_columns = spec.columns[1:]
+    key_positions = [i for i, c in enumerate(data_columns) if c.name in spec.natural_key]
+    cursor.execute(
+        f"SELECT {id_col}, {', '.join(c.name for c in data_columns)} FROM {spec.table} ORDER BY {id_col}"
+    )
+    seeded = {}
+    for row in cursor:
+        row_id, values = row[0], tuple(row[1:])
+        row_key = str(row_id) if keyed_by_id else _hash_values([values[i] for i in key_positions])
+        if row_key not in seeded:
+            seeded[row_key] = (str(row_id), _hash_values(values))
+
+    entries = [(spec.table, key, row_id, fingerprint) for key, (row_id, fingerprint) in seeded.items()]
+    for i in range(0, len(entries), batch_size):
+        cursor.executemany(
+            "INSERT INTO LoadFingerprints (table_name, row_key, row_id, fingerprint) VALUES (%s, %s, %s, %s)",
+            entries[i:i + batch_size],
+        )
+    return seeded
+
+
+def load_table_delta(table, csv_file_path, delete_missing=False,
+                     batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE, dead_letter_dir=DEAD_LETTER_DIR,
+                     low_memory=False):
+    """
+    Delta mode: upserts only new or changed rows compared to the stored fingerprints.
+    delete_missing=True also deletes rows whose key is no longer in the CSV.
+    Foreign keys are checked like in row mode (see ForeignKeyChecker).
+    low_memory=True caps the read/decode buffers; the stored fingerprints are still
+    held in memory (one entry per row of the table).
+    """
+    spec = TABLE_SPECS[table]
+    dead_letter = None
+    source = None
     try:
         conn = get_conn()
         cursor = conn.cursor()
 
-        with open(csv_file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames or []
-
-        has_transfer_id = "transfer_id" in fieldnames
-
-        if has_transfer_id:
-            max_id = get_max_id(cursor, "Transfers", "transfer_id")
-            print(f"Current max transfer_id in database: {max_id}")
-            used_ids = set()
-
-            insert_query = """
-                INSERT INTO Transfers (
-                    transfer_id, player_id, transfer_date, transfer_season,
-                    from_club_id, to_club_id, from_club_name, to_club_name,
-                    transfer_fee, market_value_in_eur, player_name
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+        source = CsvSource(csv_file_path)
+        fieldnames = source.fieldnames
+        id_col = spec.columns[0]
+        data_columns = spec.columns[1:]
+        keyed_by_id = id_col.name in fieldnames or spec.id_mode == "natural"
+        key_positions = [i for i, c in enumerate(data_columns) if c.name in spec.natural_key]
+
+        cursor.execute(FINGERPRINT_TABLE_SQL)
+        stored = load_fingerprints(cursor, spec.table)
+        if stored:
+            print(f"{spec.table}: {len(stored)} stored fingerprints")
         else:
-            insert_query = """
-                INSERT INTO Transfers (
-                    player_id, transfer_date, transfer_season,
-                    from_club_id, to_club_id, from_club_name, to_club_name,
-                    transfer_fee, market_value_in_eur, player_name
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+            stored = seed_fingerprints(cursor, spec, keyed_by_id, batch_size)
+            conn.commit()
+            print(f"{spec.table}: no stored fingerprints, {len(stored)} seeded from the existing rows")
 
-        inserted, skipped, errors = 0, 0, 0
+        ids = None
+        if not keyed_by_id:
+            ids = IdAllocator(get_max_id(cursor, spec.table, id_col.name), compact=low_memory)
 
-        with open(csv_file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
+        upsert_query = f"""
+            INSERT INTO {spec.table} (
+                {id_col.name}, {", ".join(c.name for c in data_columns)}
+            )
+            VALUES ({", ".join(["%s"] * len(spec.columns))})
+            ON DUPLICATE KEY UPDATE {", ".join(f"{c.name} = VALUES({c.name})" for c in data_columns)}
+        """
+        fingerprint_query = """
+            INSERT INTO LoadFingerprints (table_name, row_key, row_id, fingerprint)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE row_id = VALUES(row_id), fingerprint = VALUES(fingerprint)
+        """
 
-            for row in reader:
+        def save_fingerprints(rows):
+            # only for the rows the upsert wrote, in its transaction: a failed row keeps
+            # its old fingerprint and is retried by the next delta run
+            fingerprints = []
+            for row in rows:
+                row_id, values = row[0], row[1:]
+                row_key = str(row_id) if keyed_by_id else _hash_values([values[i] for i in key_positions])
+                fingerprints.append((spec.table, row_key, str(row_id), _hash_values(values)))
+            cursor.executemany(fingerprint_query, fingerprints)
+
+        rows_batch = BatchInserter(conn, cursor, upsert_query, spec.table, spec.row_label,
+                                   batch_size=batch_size, commit_size=commit_size,
+                                   max_bytes=LOW_MEMORY["batch_bytes"] if low_memory else None,
+                                   on_success=save_fingerprints)
+
+        seen = set()
+        new, changed, unchanged, skipped, duplicates, errors = 0, 0, 0, 0, 0, 0
+        required = [i for i, c in enumerate(data_columns) if c.name in spec.required]
+
+        decoder = ColumnarDecoder(spec.columns, fieldnames, LOW_MEMORY["memo"] if low_memory else MEMO_LIMIT)
+        fk_checker = ForeignKeyChecker(cursor, spec, data_columns)
+        dead_letter = DeadLetterWriter(dead_letter_dir, spec.table, fieldnames)
+
+        for chunk in iter_chunks(source, LOW_MEMORY["chunk"] if low_memory else PIPELINE_CHUNK):
+            for row, decoded in zip(chunk, decoder.decode(chunk)):
                 try:
-                    transfer_season = parse_str(row.get("transfer_season"), 50)
-                    player_name = parse_str(row.get("player_name"), 100)
-
-                    # These are NOT NULL in schema (transfer_season, player_name)
-                    if not transfer_season or not player_name:
+                    row_id, values = decoded[0], decoded[1:]
+                    if any(values[i] is None for i in required):
                         skipped += 1
                         continue
 
-                    if has_transfer_id:
-                        csv_transfer_id = parse_int(row.get("transfer_id"))
-                        if csv_transfer_id is None or csv_transfer_id in used_ids:
-                            max_id += 1
-                            transfer_id = max_id
-                        else:
-                            transfer_id = csv_transfer_id
-                            if transfer_id > max_id:
-                                max_id = transfer_id
-                        used_ids.add(transfer_id)
-
-                        values = (
-                            transfer_id,
-                            parse_int(row.get("player_id")),
-                            parse_date(row.get("transfer_date")),
-                            transfer_season,
-                            parse_int(row.get("from_club_id")),
-                            parse_int(row.get("to_club_id")),
-                            parse_str(row.get("from_club_name"), 100),
-                            parse_str(row.get("to_club_name"), 100),
-                            parse_float(row.get("transfer_fee")),
-                            parse_float(row.get("market_value_in_eur")),
-                            player_name,
-                        )
+                    values, reasons, rejected = fk_checker.check(values)
+                    if reasons:
+                        dead_letter.write(row, "rejected" if rejected else "nulled", reasons)
+                        if rejected:
+                            continue
+
+                    if keyed_by_id:
+                        if row_id is None:
+                            skipped += 1
+                            continue
+                        row_key = str(row_id)
                     else:
-                        values = (
-                            parse_int(row.get("player_id")),
-                            parse_date(row.get("transfer_date")),
-                            transfer_season,
-                            parse_int(row.get("from_club_id")),
-                            parse_int(row.get("to_club_id")),
-                            parse_str(row.get("from_club_name"), 100),
-                            parse_str(row.get("to_club_name"), 100),
-                            parse_float(row.get("transfer_fee")),
-                            parse_float(row.get("market_value_in_eur")),
-                            player_name,
-                        )
-
-                    cursor.execute(insert_query, values)
-                    inserted += 1
-                    commit_every(conn, inserted)
-
-                except mysql.connector.IntegrityError as e:
-                    if "Duplicate entry" in str(e) and has_transfer_id:
-                        max_id += 1
-                        transfer_id = max_id
-                        values = (transfer_id,) + values[1:]
-                        try:
-                            cursor.execute(insert_query, values)
-                            inserted += 1
-                        except Exception as e2:
-                            print(f"Retry failed (Transfers): {e2}")
-                            errors += 1
+                        row_key = _hash_values([values[i] for i in key_positions])
+                        row_id = int(stored[row_key][0]) if row_key in stored else None
+
+                    # a second row with the same key would overwrite the first one's
+                    # fingerprint (and, keyless, get another fresh id): keep the first
+                    if row_key in seen:
+                        dead_letter.write(row, "rejected", [f"duplicate key in the CSV ({row_key})"])
+                        duplicates += 1
+                        continue
+                    seen.add(row_key)
+                    fingerprint = _hash_values(values)
+                    previous = stored.get(row_key)
+
+                    if previous is not None and previous[1] == fingerprint:
+                        unchanged += 1
+                        continue
+
+                    if row_id is None:
+                        row_id = ids.fresh()
+
+                    rows_batch.add((row_id,) + values)
+                    if previous is None:
+                        new += 1
                     else:
-                        print(f"Integrity error (Transfers): {e}")
-                        errors += 1
+                        changed += 1
+
                 except Exception as e:
-                    print(f"Error inserting transfer row: {e}")
+                    print(f"Error inserting {spec.row_label} row: {e}")
                     errors += 1
 
-        conn.commit()
+        rows_batch.finish()
+
+        deleted = 0
+        if delete_missing:
+            vanished = [key for key in stored if key not in seen]
+            for i in range(0, len(vanished), batch_size):
+                chunk = vanished[i:i + batch_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"DELETE FROM {spec.table} WHERE {id_col.name} IN ({placeholders})",
+                    [stored[key][0] for key in chunk],
+                )
+                deleted += cursor.rowcount
+                cursor.execute(
+                    f"DELETE FROM LoadFingerprints WHERE table_name = %s AND row_key IN ({placeholders})",
+                    [spec.table] + chunk,
+                )
+                conn.commit()
 
-        if has_transfer_id:
-            cursor.execute(f"ALTER TABLE Transfers AUTO_INCREMENT = {max_id + 1}")
+        if ids is not None:
+            cursor.execute(f"ALTER TABLE {spec.table} AUTO_INCREMENT = {ids.max_id + 1}")
             conn.commit()
-            print(f"Next transfer_id: {max_id + 1}")
-
-        print("\n=== Transfers Import Summary ===")
-        print(f"Inserted: {inserted}")
-        print(f"Skipped:  {skipped}")
-        print(f"Errors:   {errors}")
 
+        print(f"\n=== {spec.table} Delta Summary ===")
+        print(f"New:       {new}")
+        print(f"Changed:   {changed}")
+        print(f"Unchanged: {unchanged}")
+        print(f"Deleted:   {deleted}")
+        print(f"Skipped:   {skipped}")
+        print(f"Duplicate: {duplicates}")
+        print(f"Errors:    {errors + rows_batch.errors}")
+        if fk_checker.rejected or fk_checker.nulled:
+            print(f"Rejected (unknown FK):     {fk_checker.rejected}")
+            print(f"Loaded with FK set NULL:   {fk_checker.nulled}")
+        if dead_letter.count:
+            print(f"Dead-letter rows: {dead_letter.path}")
+        print(f"Read:      {format_read_stats([source.stats()])}")
+        print(f"Peak memory: {peak_rss_mb()} MB")
+
+        dead_letter.close()
         cursor.close()
         conn.close()
+        return {"new": new, "changed": changed, "unchanged": unchanged, "deleted": deleted,
+                "duplicates": duplicates,
+                "commits": rows_batch.commits}
 
     except Error as e:
-        print(f"Database error (Transfers): {e}")
+        print(f"Database error ({spec.table}): {e}")
     except FileNotFoundError:
         print(f"CSV file not found: {csv_file_path}")
+    finally:
+        if source is not None:
+            source.close()
+        if dead_letter is not None:
+            dead_letter.close()
+
+
+# -----------------------------
+# Parallel scheduler
+#   Runs the table loads as a dependency DAG: a table starts as soon as the tables it
+#   references are loaded (Clubs + Competitions together, then Players and Games,
+#   then Transfers). Big CSVs can also be split into byte-range shards that are
+#   loaded in parallel. Every task uses its own connection.
+# -----------------------------
+
+# Files smaller than this are never split into shards
+SHARD_MIN_BYTES = 64 * 1024 * 1024
+
+
+def ensure_pool_size(size):
+    """Makes sure the loader pool can hand out one connection per thread worker."""
+    global POOL_SIZE
+    POOL_SIZE = max(POOL_SIZE, size)
+    if _pool is not None:
+        _pool.size = max(_pool.size, size)
+
+
+def run_load_dag(csv_paths, workers=4, shards=1, executor="process", mode="rows",
+                 batch_size=BATCH_SIZE, commit_size=COMMIT_SIZE, pipeline=False, delete_missing=False,
+                 dead_letter_dir=DEAD_LETTER_DIR, resume=False, low_memory=False):
+    """
+    csv_paths: {table name: csv path}
+    executor:  "process" (parsing runs on all cores) or "thread"
+    shards:    split CSVs bigger than SHARD_MIN_BYTES into this many byte ranges (row mode only)
+    """
+    executor_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    if executor != "process":
+        ensure_pool_size(workers + 1)
+
+    running = {}      # future -> table
+    remaining = {}    # table -> unfinished tasks
+    results = {}      # table -> shard results
+    started, done = set(), set()
+
+    def start_table(pool, table):
+        spec = TABLE_SPECS[table]
+        csv_file_path = csv_paths[table]
+        started.add(table)
+        results[table] = []
+
+        if mode == "infile":
+            tasks = [pool.submit(load_table_with_infile, spec, csv_file_path)]
+        elif mode == "delta":
+            tasks = [pool.submit(load_table_delta, table, csv_file_path, delete_missing, batch_size, commit_size,
+                                 dead_letter_dir, low_memory)]
+        else:
+            try:
+                max_id = prepare_table_load(spec, csv_file_path)
+                ranges = [(None, None)]
+                if shards > 1 and os.path.getsize(csv_file_path) >= SHARD_MIN_BYTES:
+                    ranges = compute_shards(csv_file_path, shards)
+            except (Error, OSError) as e:
+                print(f"Could not start {table}: {e}")
+                done.add(table)
+                return
+            if len(ranges) > 1:
+                print(f"{table}: loading in {len(ranges)} shards")
+            tasks = [
+                pool.submit(load_rows, table, csv_file_path, max_id, start, end, index, len(ranges),
+                            batch_size, commit_size, pipeline, dead_letter_dir, resume, low_memory)
+                for index, (start, end) in enumerate(ranges)
+            ]
+
+        remaining[table] = len(tasks)
+        for task in tasks:
+            running[task] = table
+
+    with executor_class(max_workers=workers) as pool:
+        while len(done) < len(csv_paths):
+            for table in csv_paths:
+                if table not in started and all(dep in done or dep not in csv_paths for dep in DEPENDENCIES[table]):
+                    start_table(pool, table)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for task in finished:
+                table = running.pop(task)
+                try:
+                    results[table].append(task.result())
+                except FileNotFoundError:
+                    print(f"CSV file not found: {csv_paths[table]}")
+                except Exception as e:
+                    print(f"Database error ({table}): {e}")
+
+                remaining[table] -= 1
+                if remaining[table] == 0:
+                    if mode == "rows" and results[table]:
+                        finish_table_load(TABLE_SPECS[table], results[table])
+                    done.add(table)
+
+
+def refresh_summaries(tables=()):
+    """
+    Rebuilds the summary tables the views read (club finance, head-to-head) from the
+    loaded data and bumps the versions of the loaded tables, so the app's caches and
+    ETags see the load.
+    """
+    conn = get_conn()
+    try:
+        cursor = conn.cursor()
+        for name, rebuild in (("Club finance", club_finance.rebuild), ("Head-to-head", pair_stats.rebuild)):
+            start = time.perf_counter()
+            try:
+                rebuild(cursor)
+                conn.commit()
+                print(f"{name} summaries rebuilt in {time.perf_counter() - start:.1f}s")
+            except Error as e:
+                conn.rollback()
+                print(f"Could not rebuild the {name.lower()} summaries: {e}")
+        try:
+            cursor.execute(table_versions.TABLE_VERSIONS_SQL)
+            table_versions.bump(cursor, list(tables) + ["ClubFinance", "ClubSeasonFinance", "ClubPairStats"])
+            conn.commit()
+        except Error as e:
+            conn.rollback()
+            print(f"Could not bump the table versions: {e}")
+        cursor.close()
+    finally:
+        conn.close()
 
 
 def load_all_from_csv(
@@ -619,30 +1983,119 @@ def load_all_from_csv(
     players_csv,
     games_csv,
     transfers_csv,
+    batch_size=BATCH_SIZE,
+    commit_size=COMMIT_SIZE,
+    mode="rows",
+    workers=1,
+    shards=1,
+    executor="process",
+    pipeline=False,
+    delete_missing=False,
+    dead_letter_dir=DEAD_LETTER_DIR,
+    resume=False,
+    low_memory=False,
 ):
     """
     FK-safe load order:
       Clubs -> Competitions -> Players -> Games -> Transfers
+
+    mode="rows":   Python parsing + batched INSERTs
+    mode="infile": server-side LOAD DATA LOCAL INFILE
+    mode="delta":  upsert only new/changed rows (delete_missing=True also removes vanished rows)
+    workers > 1 or shards > 1 runs independent tables / shards in parallel (run_load_dag).
+    pipeline=True overlaps CSV reading/parsing with the INSERTs inside every load.
+    Rows with unknown foreign keys are written to dead_letter_dir (rows and delta modes).
+    resume=True continues row mode loads from their last checkpoint (same --shards as before).
+    low_memory=True keeps every buffer small (see LOW_MEMORY).
+    The summary tables (club finance, head-to-head) are rebuilt at the end (refresh_summaries).
     """
-    load_clubs_from_csv(clubs_csv)
-    load_competitions_from_csv(competitions_csv)
-    load_players_from_csv(players_csv)
-    load_games_from_csv(games_csv)
-    load_transfers_from_csv(transfers_csv)
+    csv_paths = {
+        "Clubs": clubs_csv,
+        "Competitions": competitions_csv,
+        "Players": players_csv,
+        "Games": games_csv,
+        "Transfers": transfers_csv,
+    }
+
+    if workers > 1 or shards > 1:
+        run_load_dag(csv_paths, workers=max(1, workers), shards=shards, executor=executor,
+                     mode=mode, batch_size=batch_size, commit_size=commit_size, pipeline=pipeline,
+                     delete_missing=delete_missing, dead_letter_dir=dead_letter_dir, resume=resume,
+                     low_memory=low_memory)
+        refresh_summaries(csv_paths)
+        return
+
+    for table, csv_file_path in csv_paths.items():
+        if mode == "infile":
+            load_table_with_infile(TABLE_SPECS[table], csv_file_path)
+        elif mode == "delta":
+            load_table_delta(table, csv_file_path, delete_missing, batch_size, commit_size, dead_letter_dir,
+                             low_memory)
+        else:
+            load_table_from_csv(TABLE_SPECS[table], csv_file_path, batch_size, commit_size, pipeline,
+                                dead_letter_dir, resume, low_memory)
+
+    refresh_summaries(csv_paths)
+
+
+def parse_args(argv=None):
+    # Update these paths to your local CSV paths (or pass --csv-dir)
+    parser = argparse.ArgumentParser(description="Load the Transfermarkt CSV files into MySQL.")
+    parser.add_argument("--csv-dir", help="Folder containing clubs.csv, competitions.csv, players.csv, games.csv, transfers.csv")
+    parser.add_argument("--mode", choices=("rows", "infile", "delta"), default="rows",
+                        help="rows: Python parsing + batched INSERTs, infile: LOAD DATA LOCAL INFILE, "
+                             "delta: upsert only new/changed rows")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="Delta mode: delete rows that are no longer in the CSV")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per multi-row INSERT")
+    parser.add_argument("--commit-size", type=int, default=COMMIT_SIZE, help="Rows per COMMIT")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel load tasks (FK order is respected)")
+    parser.add_argument("--shards", type=int, default=1, help="Split big CSVs into this many parallel byte ranges")
+    parser.add_argument("--executor", choices=("process", "thread"), default="process",
+                        help="Run parallel tasks in processes or threads")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap CSV parsing with INSERTs (reader -> parser -> writer threads) and print stage throughput")
+    parser.add_argument("--dead-letter-dir", default=DEAD_LETTER_DIR,
+                        help="Where rows with unknown foreign keys are written (one CSV per table)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Row mode: continue every table from its last checkpoint instead of the start of the CSV")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Small fixed buffers and bitmap id tracking, for machines with little RAM")
+    parser.add_argument("--print-sql", action="store_true", help="Only print the generated LOAD DATA statements")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    # Update these paths to your local CSV paths
-    clubs_csv = r"C:\Users\cagsak\Desktop\clubs.csv"
-    competitions_csv = r"C:\Users\cagsak\Desktop\competitions.csv"
-    players_csv = r"C:\Users\cagsak\Desktop\players.csv"
-    games_csv = r"C:\Users\cagsak\Desktop\games.csv"
-    transfers_csv = r"C:\Users\cagsak\Desktop\transfers.csv"
-
-    load_all_from_csv(
-        clubs_csv=clubs_csv,
-        competitions_csv=competitions_csv,
-        players_csv=players_csv,
-        games_csv=games_csv,
-        transfers_csv=transfers_csv,
-    )
+    args = parse_args()
+
+    csv_dir = args.csv_dir or r"C:\Users\cagsak\Desktop"
+    # clubs.csv, or a compressed clubs.csv.gz / .bz2 / .zst when there is no plain file
+    clubs_csv = find_csv(csv_dir, "clubs.csv")
+    competitions_csv = find_csv(csv_dir, "competitions.csv")
+    players_csv = find_csv(csv_dir, "players.csv")
+    games_csv = find_csv(csv_dir, "games.csv")
+    transfers_csv = find_csv(csv_dir, "transfers.csv")
+
+    if args.print_sql:
+        for spec, path in ((CLUBS, clubs_csv), (COMPETITIONS, competitions_csv), (PLAYERS, players_csv),
+                           (GAMES, games_csv), (TRANSFERS, transfers_csv)):
+            print(build_load_data_sql(spec, path, read_header(path)) + ";\n")
+    else:
+        load_all_from_csv(
+            clubs_csv=clubs_csv,
+            competitions_csv=competitions_csv,
+            players_csv=players_csv,
+            games_csv=games_csv,
+            transfers_csv=transfers_csv,
+            batch_size=args.batch_size,
+            commit_size=args.commit_size,
+            mode=args.mode,
+            workers=args.workers,
+            shards=args.shards,
+            executor=args.executor,
+            pipeline=args.pipeline,
+            delete_missing=args.delete_missing,
+            dead_letter_dir=args.dead_letter_dir,
+            resume=args.resume,
+            low_memory=args.low_memory,
+        )
@@ -0,0 +1,402 @@
+"""
+Versioned schema migrations for the TRANSFERMARKT database.
+
+Migrations live in db/migrations/NNNN_name.sql with a "-- migrate:up" and a
+"-- migrate:down" section. Applied versions are recorded in SchemaMigrations.
+
+Usage:
+    python migrate.py status
+    python migrate.py apply [--to VERSION]
+    python migrate.py rollback [--steps N | --to VERSION]
+    python migrate.py explain
+
+apply runs EXPLAIN on the hot view queries before and after every migration and
+writes both plans to db/migrations/explain/NNNN_name.txt.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import mysql.connector
+from dotenv import load_dotenv
+from mysql.connector import Error
+
+base_dir = Path(__file__).resolve().parent
+load_dotenv(dotenv_path=base_dir / ".env")
+
+MIGRATIONS_DIR = base_dir / "db" / "migrations"
+EXPLAIN_DIR = MIGRATIONS_DIR / "explain"
+
+MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+        version VARCHAR(16) NOT NULL PRIMARY KEY,
+        name VARCHAR(128) NOT NULL,
+        checksum CHAR(32) NOT NULL,
+        execution_ms INT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+Migration = namedtuple("Migration", "version name path checksum up down")
+
+# Queries of the list/stat pages, as the views send them. Values come from SAMPLES
+# so the plans are made against data that exists.
+EXPLAIN_QUERIES = [
+    ("players.get_players (default sort)", """
+        SELECT p.player_id, p.name, p.current_club_id, c.name AS club_name, p.market_value
+        FROM Players p
+        LEFT JOIN Clubs c ON p.current_club_id = c.club_id
+        ORDER BY p.name ASC LIMIT 50 OFFSET 0
+    """),
+    ("players.get_players (position filter)", """
+        SELECT p.player_id, p.name, c.name AS club_name
+        FROM Players p
+        LEFT JOIN Clubs c ON p.current_club_id = c.club_id
+        WHERE p.position = %(position)s
+        ORDER BY p.name ASC LIMIT 50 OFFSET 0
+    """),
+    ("players.get_players (country filter, market value sort)", """
+        SELECT p.player_id, p.name, c.name AS club_name
+        FROM Players p
+        LEFT JOIN Clubs c ON p.current_club_id = c.club_id
+        WHERE p.country_of_citizenship = %(country)s
+        ORDER BY p.market_value DESC LIMIT 50 OFFSET 0
+    """),
+    ("players.get_players (age range, age sort)", """
+        SELECT p.player_id, p.name, c.name AS club_name
+        FROM Players p
+        LEFT JOIN Clubs c ON p.current_club_id = c.club_id
+        WHERE p.date_of_birth <= DATE_SUB(CURDATE(), INTERVAL 30 YEAR)
+          AND p.date_of_birth > DATE_SUB(CURDATE(), INTERVAL 36 YEAR)
+        ORDER BY p.date_of_birth DESC LIMIT 50 OFFSET 0
+    """),
+    ("games.get_games (default sort)", """
+        SELECT g.game_id, g.date, hc.name AS home_club_name, ac.name AS away_club_name
+        FROM Games g
+        JOIN Clubs hc ON g.home_club_id = hc.club_id
+        JOIN Clubs ac ON g.away_club_id = ac.club_id
+        ORDER BY g.date DESC, g.game_id DESC LIMIT 10 OFFSET 0
+    """),
+    ("games.get_games (season + competition filter)", """
+        SELECT g.game_id, g.date, hc.name AS home_club_name, ac.name AS away_club_name
+        FROM Games g
+        JOIN Clubs hc ON g.home_club_id = hc.club_id
+        JOIN Clubs ac ON g.away_club_id = ac.club_id
+        WHERE g.season = %(season)s AND g.competition_id = %(competition_id)s
+        ORDER BY g.date DESC, g.game_id DESC LIMIT 10 OFFSET 0
+    """),
+    ("transfers.index", """
+        SELECT t.*, p.country_of_citizenship, p.date_of_birth, p.position, p.image_url
+        FROM Transfers t
+        LEFT JOIN Players p ON t.player_id = p.player_id
+        ORDER BY t.transfer_date DESC LIMIT 20 OFFSET 0
+    """),
+    ("transfers.index (search count)", """
+        SELECT COUNT(*) AS total FROM Transfers t WHERE t.player_name LIKE %(player_pattern)s
+    """),
+    ("transfers.index (search count, FULLTEXT)", """
+        SELECT COUNT(*) AS total FROM Transfers t
+        WHERE MATCH(t.player_name) AGAINST (%(player_phrase)s IN BOOLEAN MODE) AND t.player_name LIKE %(player_pattern)s
+    """),
+    ("transfers.find_entity (FULLTEXT)", """
+        SELECT COUNT(*) AS total FROM Players
+        WHERE MATCH(Players.name) AGAINST (%(player_phrase)s IN BOOLEAN MODE) AND Players.name LIKE %(player_pattern)s
+    """),
+    ("games.get_games (home club filter, FULLTEXT)", """
+        SELECT g.game_id, g.date, hc.name AS home_club_name, ac.name AS away_club_name
+        FROM Games g
+        JOIN Clubs hc ON g.home_club_id = hc.club_id
+        JOIN Clubs ac ON g.away_club_id = ac.club_id
+        WHERE (MATCH(hc.name) AGAINST (%(club_phrase)s IN BOOLEAN MODE) AND hc.name LIKE %(club_pattern)s)
+        ORDER BY g.date DESC, g.game_id DESC LIMIT 10 OFFSET 0
+    """),
+    ("transfers.transfer_stats (latest)", """
+        SELECT t.transfer_id, t.player_name, t.transfer_fee, p.market_value
+        FROM Transfers t
+        JOIN Players p ON t.player_id = p.player_id
+        WHERE t.transfer_fee > 0 AND p.market_value > 0
+        ORDER BY t.transfer_date DESC LIMIT 50
+    """),
+    ("transfers.transfer_stats (top spenders)", """
+        SELECT to_club_name, SUM(transfer_fee) AS total_spent, COUNT(*) AS transfer_count
+        FROM Transfers
+        WHERE transfer_fee > 0
+        GROUP BY to_club_name
+        ORDER BY total_spent DESC LIMIT 10
+    """),
+    ("clubs.club_details (other clubs)", """
+        SELECT c2.club_id, c2.name AS club_name
+        FROM Clubs c2
+        WHERE c2.competition_id = %(competition_id)s AND c2.club_id != %(club_id)s
+        ORDER BY c2.name ASC
+    """),
+    ("clubs.club_details (transfers)", """
+        SELECT t.transfer_id, t.transfer_season, t.transfer_date, t.player_name, p.market_value
+        FROM Transfers t
+        LEFT JOIN Players p ON t.player_id = p.player_id
+        WHERE (t.from_club_id = %(club_id)s OR t.to_club_id = %(club_id)s)
+        ORDER BY t.transfer_season DESC, t.transfer_date DESC LIMIT 50
+    """),
+]
+
+SAMPLES = {
+    "position": ("SELECT position FROM Players WHERE position IS NOT NULL GROUP BY position "
+                 "ORDER BY COUNT(*) DESC LIMIT 1", "Attack"),
+    "country": ("SELECT country_of_citizenship FROM Players WHERE country_of_citizenship IS NOT NULL "
+                "GROUP BY country_of_citizenship ORDER BY COUNT(*) DESC LIMIT 1", "England"),
+    "season": ("SELECT MAX(season) FROM Games", 2023),
+    "competition_id": ("SELECT competition_id FROM Clubs WHERE competition_id IS NOT NULL LIMIT 1", "GB1"),
+    "club_id": ("SELECT to_club_id FROM Transfers WHERE to_club_id IS NOT NULL LIMIT 1", 1),
+    "player_pattern": (None, "%son%"),
+    "player_phrase": (None, '"son"'),
+    "club_pattern": (None, "%united%"),
+    "club_phrase": (None, '"united"'),
+}
+
+
+def get_connection():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME", "TRANSFERMARKT"),
+    )
+
+
+def split_statements(text):
+    """SQL text -> statements, without the -- comment lines."""
+    lines = [line for line in text.splitlines() if not line.strip().startswith("--")]
+    statements = [s.strip() for s in "\n".join(lines).split(";")]
+    return [s for s in statements if s]
+
+
+def read_migration(path):
+    text = path.read_text(encoding="utf-8")
+    match = re.search(r"^--\s*migrate:up\s*$(.*?)^--\s*migrate:down\s*$(.*)", text, re.M | re.S)
+    if not match:
+        raise ValueError(f"{path.name}: needs a '-- migrate:up' and a '-- migrate:down' section")
+    version, _, name = path.stem.partition("_")
+    return Migration(
+        version=version,
+        name=name,
+        path=path,
+        checksum=hashlib.md5(text.encode("utf-8")).hexdigest(),
+        up=split_statements(match.group(1)),
+        down=split_statements(match.group(2)),
+    )
+
+
+def find_migrations():
+    migrations = [read_migration(p) for p in sorted(MIGRATIONS_DIR.glob("[0-9]*_*.sql"))]
+    versions = [m.version for m in migrations]
+    duplicates = sorted({v for v in versions if versions.count(v) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate migration versions: {', '.join(duplicates)}")
+    return migrations
+
+
+def applied_migrations(cursor):
+    """{version: (name, checksum, applied_at)} from SchemaMigrations."""
+    cursor.execute(MIGRATIONS_TABLE_SQL)
+    cursor.execute("SELECT version, name, checksum, applied_at FROM SchemaMigrations")
+    return {version: (name, checksum, applied_at) for version, name, checksum, applied_at in cursor.fetchall()}
+
+
+def sample_params(cursor):
+    params = {}
+    for key, (query, default) in SAMPLES.items():
+        value = None
+        if query:
+            try:
+                cursor.execute(query)
+                row = cursor.fetchone()
+                value = row[0] if row else None
+            except Error:
+                value = None
+        params[key] = default if value is None else value
+    return params
+
+
+def format_plan(columns, rows):
+    """EXPLAIN rows as a fixed width text table."""
+    table = [list(columns)] + [["NULL" if v is None else str(v) for v in row] for row in rows]
+    widths = [max(len(r[i]) for r in table) for i in range(len(columns))]
+    lines = [" | ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip() for r in table]
+    lines.insert(1, "-+-".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def explain_queries(cursor):
+    """[(name, plan text)] for every query in EXPLAIN_QUERIES."""
+    params = sample_params(cursor)
+    plans = []
+    for name, query in EXPLAIN_QUERIES:
+        try:
+            cursor.execute("EXPLAIN " + query.strip(), params)
+            rows = cursor.fetchall()
+            plans.append((name, format_plan(cursor.column_names, rows)))
+        except Error as e:
+            plans.append((name, f"EXPLAIN failed: {e}"))
+    return plans
+
+
+def write_explain_report(migration, before, after):
+    EXPLAIN_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPLAIN_DIR / f"{migration.version}_{migration.name}.txt"
+    lines = [
+        f"EXPLAIN before/after migration {migration.version} ({migration.name})",
+        f"Recorded {datetime.now().isoformat(timespec='seconds')} on database {os.getenv('DB_NAME', 'TRANSFERMARKT')}",
+        "",
+    ]
+    for (name, plan_before), (_, plan_after) in zip(before, after):
+        lines += [f"=== {name}", "", "-- before", plan_before, "", "-- after", plan_after, "", ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+def run_statements(cursor, migration, statements, direction):
+    for i, statement in enumerate(statements, 1):
+        try:
+            cursor.execute(statement)
+        except Error as e:
+            # MySQL commits DDL implicitly, the statements before this one stay applied
+            print(f"{migration.version} {direction} failed at statement {i}/{len(statements)}: {e}")
+            print(statement)
+            raise
+
+
+def apply(target=None, explain=True):
+    migrations = find_migrations()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        applied = applied_migrations(cursor)
+        pending = [m for m in migrations if m.version not in applied and (target is None or m.version <= target)]
+        if not pending:
+            print("Nothing to apply.")
+            return
+        for migration in pending:
+            before = explain_queries(cursor) if explain else None
+            started = time.perf_counter()
+            print(f"Applying {migration.version} {migration.name} ({len(migration.up)} statements)...")
+            run_statements(cursor, migration, migration.up, "up")
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            cursor.execute(
+                "INSERT INTO SchemaMigrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+                (migration.version, migration.name, migration.checksum, elapsed_ms),
+            )
+            conn.commit()
+            print(f"  done in {elapsed_ms} ms")
+            if explain:
+                cursor.execute("ANALYZE TABLE Clubs, Competitions, Players, Games, Transfers")
+                cursor.fetchall()
+                path = write_explain_report(migration, before, explain_queries(cursor))
+                print(f"  EXPLAIN before/after written to {path.relative_to(base_dir)}")
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rollback(steps=1, target=None):
+    migrations = {m.version: m for m in find_migrations()}
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        applied = sorted(applied_migrations(cursor), reverse=True)
+        if target is not None:
+            versions = [v for v in applied if v > target]
+        else:
+            versions = applied[:steps]
+        if not versions:
+            print("Nothing to roll back.")
+            return
+        for version in versions:
+            migration = migrations.get(version)
+            if migration is None:
+                raise ValueError(f"{version} is applied but its file is missing, stopping")
+            print(f"Rolling back {migration.version} {migration.name} ({len(migration.down)} statements)...")
+            run_statements(cursor, migration, migration.down, "down")
+            cursor.execute("DELETE FROM SchemaMigrations WHERE version = %s", (version,))
+            conn.commit()
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def status():
+    migrations = find_migrations()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        applied = applied_migrations(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    for migration in migrations:
+        if migration.version in applied:
+            _, checksum, applied_at = applied[migration.version]
+            state = f"applied {applied_at}"
+            if checksum != migration.checksum:
+                state += "  (file changed since it was applied!)"
+        else:
+            state = "pending"
+        print(f"{migration.version}  {migration.name:<32} {state}")
+    known = {m.version for m in migrations}
+    for version in sorted(set(applied) - known):
+        print(f"{version}  {applied[version][0]:<32} applied, file missing")
+
+
+def explain():
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for name, plan in explain_queries(cursor):
+            print(f"=== {name}\n{plan}\n")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="List migrations and whether they are applied")
+    apply_parser = commands.add_parser("apply", help="Apply pending migrations")
+    apply_parser.add_argument("--to", help="Stop after this version")
+    apply_parser.add_argument("--no-explain", action="store_true", help="Skip the before/after EXPLAIN report")
+    rollback_parser = commands.add_parser("rollback", help="Roll back applied migrations")
+    rollback_parser.add_argument("--steps", type=int, default=1, help="How many migrations to roll back")
+    rollback_parser.add_argument("--to", help="Roll back everything after this version")
+    commands.add_parser("explain", help="Print the current plans of the hot view queries")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            status()
+        elif args.command == "apply":
+            apply(args.to, explain=not args.no_explain)
+        elif args.command == "rollback":
+            rollback(args.steps, args.to)
+        else:
+            explain()
+    except (Error, ValueError) as e:
+        print(f"Migration error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import pytest
+
+from app import competition_stats, counts, reference_data, table_versions
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    """competition_stats with _compute counting its calls and no version polls."""
+    calls = []
+
+    def compute(cursor, competition_id):
+        calls.append(competition_id)
+        return {"competition_id": competition_id, "club_ids": {1, 2} if competition_id == "GB1" else {3}}
+
+    monkeypatch.setattr(competition_stats, "_compute", compute)
+    monkeypatch.setattr(competition_stats, "versions", lambda tables: ("", 0.0))
+    competition_stats._cache.clear()
+    yield calls
+    competition_stats._cache.clear()
+
+
+def test_competition_stats_are_cached(stats):
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.competition_stats(None, "GB1")
+    assert stats == ["GB1"]
+
+
+def test_invalidate_clubs_drops_the_competitions_of_those_clubs(stats):
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.competition_stats(None, "ES1")
+    competition_stats.invalidate_clubs(2, None)
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.competition_stats(None, "ES1")
+    assert stats == ["GB1", "ES1", "GB1"]
+
+
+def test_invalidate_competitions(stats):
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.competition_stats(None, "ES1")
+    competition_stats.invalidate_competitions("ES1")
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.competition_stats(None, "ES1")
+    assert stats == ["GB1", "ES1", "ES1"]
+
+
+@pytest.mark.parametrize("tables, cleared", [
+    (("players",), True),
+    (("Clubs", "Games"), True),
+    (("Games", "Appearances"), False),
+])
+def test_invalidate_tables(stats, tables, cleared):
+    competition_stats.competition_stats(None, "GB1")
+    competition_stats.invalidate_tables(*tables)
+    competition_stats.competition_stats(None, "GB1")
+    assert len(stats) == (2 if cleared else 1)
+
+
+def test_invalidation_during_compute_is_not_cached(monkeypatch, stats):
+    def compute(cursor, competition_id):
+        stats.append(competition_id)
+        competition_stats.invalidate_competitions(competition_id)
+        return {"competition_id": competition_id, "club_ids": set()}
+
+    monkeypatch.setattr(competition_stats, "_compute", compute)
+    competition_stats.competition_stats(None, "GB1")
+    assert "GB1" not in competition_stats._cache
+
+
+def test_listeners_are_registered():
+    for listener in (competition_stats.invalidate_tables, reference_data.invalidate_reference,
+                     counts.invalidate_counts):
+        assert listener in table_versions._listeners
+
+
+def test_version_poll_notifies_the_listeners(monkeypatch):
+    seen = []
+    monkeypatch.setattr(table_versions, "_listeners", [lambda *tables: seen.append(tables)])
+    monkeypatch.setitem(table_versions._state, "shared", {"players": (1, 0.0), "clubs": (4, 0.0)})
+    monkeypatch.setitem(table_versions._state, "polled_at", 0.0)
+    monkeypatch.setattr(table_versions, "_poll", lambda: {"players": (2, 1.0), "clubs": (4, 0.0), "games": (1, 1.0)})
+    token, last_modified = table_versions.versions(["Players", "Clubs"])
+    assert seen == [("players", "games")]
+    assert token == "clubs:4,players:2"
+    assert last_modified == 1.0
+
+
+def test_invalidate_reference_bumps_the_sets_of_those_tables(monkeypatch):
+    monkeypatch.setattr(reference_data, "_generations", {})
+    reference_data.invalidate_reference("CLUBS")
+    bumped = {name for name, (tables, _, _) in reference_data.DATASETS.items()
+              if "clubs" in {t.lower() for t in tables}}
+    assert bumped and set(reference_data._generations) == bumped
+    assert all(reference_data._generations[name] == 1 for name in bumped)
+
+
+def test_invalidate_counts_retires_cached_counts(monkeypatch):
+    monkeypatch.setattr(counts, "_counts", counts.OrderedDict())
+    monkeypatch.setattr(counts, "_generations", {})
+
+    class Cursor:
+        executed = 0
+
+        def execute(self, sql, params):
+            Cursor.executed += 1
+
+        def fetchone(self):
+            return (Cursor.executed,)
+
+    cursor = Cursor()
+    args = ("players", ["Players"], {"position": "Attack"}, "SELECT COUNT(*)", ())
+    assert counts.count_total(cursor, *args) == (1, False)
+    assert counts.count_total(cursor, *args) == (1, False)
+    counts.invalidate_counts("Games")
+    assert counts.count_total(cursor, *args) == (1, False)
+    counts.invalidate_counts("PLAYERS")
+    assert counts.count_total(cursor, *args) == (2, False)
@@ -0,0 +1,286 @@
+import datetime
+import gzip
+
+import pytest
+from mysql.connector import errors
+
+import load_tables_from_csv as loader
+
+
+class FakeCursor:
+    """Answers SELECTs from {table: rows}; records executemany calls."""
+
+    def __init__(self, tables=None, fail=None):
+        self.tables = tables or {}
+        self.fail = fail or (lambda rows: None)
+        self.rows = []
+        self.batches = []
+
+    def execute(self, query, params=()):
+        if "max_allowed_packet" in query:
+            self.rows = [(4 * 1024 * 1024,)]
+            return
+        if "INSERT" in query:
+            self.fail([params])
+            return
+        table = query.split(" FROM ")[1].split()[0]
+        self.rows = list(self.tables.get(table, []))
+
+    def executemany(self, query, rows):
+        self.fail(rows)
+        self.batches.append(list(rows))
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConn:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+# -----------------------------
+# Id tracking
+# -----------------------------
+
+def test_id_bitmap_matches_a_set():
+    ids = [0, 1, 7, 8, 65535, 65536, 1_500_000, 7, 65536]
+    bitmap = loader.IdBitmap()
+    for value in ids:
+        bitmap.add(value)
+    assert len(bitmap) == len(set(ids))
+    for value in range(0, 70000):
+        assert (value in bitmap) == (value in set(ids))
+    assert 1_500_000 in bitmap and 1_500_001 not in bitmap
+    assert bitmap.nbytes == 3 * 8192
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_id_allocator_keeps_csv_ids_and_replaces_duplicates(compact):
+    ids = loader.IdAllocator(max_id=100, compact=compact)
+    assert ids.assign(5) == 5
+    assert ids.assign(500) == 500
+    # duplicate and missing ids get fresh ones after the highest id seen
+    assert ids.assign(5) == 501
+    assert ids.assign(None) == 502
+    assert ids.fresh() == 503
+    assert ids.max_id == 503
+
+
+def test_id_allocator_shards_never_share_fresh_ids():
+    shards = [loader.IdAllocator(max_id=10, stride=3, offset=k) for k in range(3)]
+    fresh = [[ids.fresh() for _ in range(5)] for ids in shards]
+    for k, values in enumerate(fresh):
+        assert all(v % 3 == k and v > 10 for v in values)
+    assert len({v for values in fresh for v in values}) == 15
+
+
+# -----------------------------
+# Columnar decoding
+# -----------------------------
+
+def test_columnar_decoder_matches_parse_column():
+    spec = loader.PLAYERS
+    fieldnames = ["player_id", "name", "current_club_id", "last_season", "date_of_birth",
+                  "market_value_in_eur", "foot", "image_url"]
+    rows = [
+        ["1", "  Bukayo Saka ", "11", "2023", "2001-09-05", "120000000", "left", ""],
+        ["2.0", "A" * 150, "", "x", "05/09/2001", "", "", "http://img"],
+        ["", "Short row"],
+    ]
+    decoded = loader.ColumnarDecoder(spec.columns, fieldnames).decode([list(r) for r in rows])
+
+    assert decoded[0] == (1, "Bukayo Saka", 11, 2023, None, "2001-09-05", None, None, "left",
+                          120000000.0, None)
+    assert decoded[1][0] == 2
+    assert decoded[1][1] == "A" * 100
+    assert decoded[1][3] is None
+    assert decoded[1][5] == "2001-09-05"
+    assert decoded[2][:2] == (None, "Short row")
+    for row, values in zip(rows, decoded):
+        padded = dict(zip(fieldnames, row + [""] * (len(fieldnames) - len(row))))
+        expected = tuple(loader.parse_column(c, padded) for c in spec.columns)
+        assert values == expected
+
+
+def test_columnar_decoder_first_non_empty_source_wins():
+    column = loader.Column("market_value", ("market_value", "market_value_in_eur"), "float")
+    decoder = loader.ColumnarDecoder([column], ["market_value", "market_value_in_eur"])
+    assert decoder.decode([["", "5"], ["3", "5"], ["", ""]]) == [(5.0,), (3.0,), (None,)]
+
+
+def test_converter_default_and_memo_limit():
+    column = loader.Column("squad_size", ("squad_size",), "int", default=0)
+    convert = loader.make_converter(column, memo_limit=1)
+    assert convert("") == 0
+    assert convert("25") == 25
+    assert convert("25.0") == 25
+
+
+# -----------------------------
+# Foreign keys
+# -----------------------------
+
+def test_foreign_key_checker_rejects_or_nulls():
+    cursor = FakeCursor({"Players": [(1,), (2,)], "Clubs": [(10,), (11,)]})
+    columns = loader.TRANSFERS.columns[1:]
+    checker = loader.ForeignKeyChecker(cursor, loader.TRANSFERS, columns)
+    names = [c.name for c in columns]
+
+    def row(player_id, from_club_id, to_club_id):
+        values = [None] * len(columns)
+        values[names.index("player_id")] = player_id
+        values[names.index("from_club_id")] = from_club_id
+        values[names.index("to_club_id")] = to_club_id
+        return tuple(values)
+
+    values, reasons, rejected = checker.check(row(1, 10, None))
+    assert (reasons, rejected) == ([], False)
+
+    # unknown club: set to NULL, the row is still loaded
+    values, reasons, rejected = checker.check(row(2, 99, 11))
+    assert not rejected and reasons == ["from_club_id=99 not in Clubs"]
+    assert values[names.index("from_club_id")] is None
+    assert values[names.index("to_club_id")] == 11
+
+    # unknown player: rejected
+    _, reasons, rejected = checker.check(row(3, 10, 11))
+    assert rejected and reasons == ["player_id=3 not in Players"]
+    assert (checker.rejected, checker.nulled) == (1, 1)
+
+
+# -----------------------------
+# Shards
+# -----------------------------
+
+def write_csv(path, count, opener=open):
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        f.write("id,name\n")
+        for i in range(count):
+            # varying line lengths so boundaries fall anywhere inside a line
+            f.write(f'{i},"name {"x" * (i % 13)}"\n')
+
+
+@pytest.mark.parametrize("shard_count", [1, 2, 3, 7, 50, 200])
+def test_shards_cover_every_row_once(tmp_path, shard_count):
+    path = tmp_path / "rows.csv"
+    write_csv(path, 97)
+    everything = list(loader.read_records(str(path)))
+    assert len(everything) == 97
+
+    shards = loader.compute_shards(str(path), shard_count)
+    assert shards[0][0] == len("id,name\n")
+    assert shards[-1][1] == path.stat().st_size
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+
+    read = [row for start, end in shards for row in loader.read_records(str(path), start, end)]
+    assert read == everything
+
+
+def test_empty_and_compressed_files_are_not_split(tmp_path):
+    empty = tmp_path / "empty.csv"
+    write_csv(empty, 0)
+    assert loader.compute_shards(str(empty), 4) == [(len("id,name\n"), len("id,name\n"))]
+
+    packed = tmp_path / "rows.csv.gz"
+    write_csv(packed, 10, opener=gzip.open)
+    assert loader.compute_shards(str(packed), 4) == [(None, None)]
+
+
+def test_positions_resume_after_a_row(tmp_path):
+    path = tmp_path / "rows.csv"
+    write_csv(path, 20)
+    with_positions = list(loader.read_records(str(path), positions=True))
+    row, offset = with_positions[9]
+    assert list(loader.read_records(str(path), start=offset)) == [r for r, _ in with_positions[10:]]
+
+
+# -----------------------------
+# BatchInserter
+# -----------------------------
+
+def test_failed_rows_get_no_success_callback():
+    written = []
+
+    def fail(rows):
+        if any(r[0] == 3 for r in rows):
+            raise errors.DataError(msg="bad value")
+
+    batch = loader.BatchInserter(FakeConn(), FakeCursor(fail=fail), "INSERT", "T", "t",
+                                 batch_size=3, on_success=written.extend)
+    for i in range(6):
+        batch.add((i,))
+    batch.finish()
+    assert [r[0] for r in written] == [0, 1, 2, 4, 5]
+    assert (batch.inserted, batch.errors) == (5, 1)
+
+
+def test_deadlock_resets_inserted_to_the_committed_rows():
+    calls = []
+
+    def fail(rows):
+        calls.append(rows)
+        if len(calls) == 4:
+            raise errors.InternalError(msg="Deadlock found", errno=1213)
+
+    conn = FakeConn()
+    batch = loader.BatchInserter(conn, FakeCursor(fail=fail), "INSERT", "T", "t", batch_size=2, commit_size=4)
+    with pytest.raises(errors.InternalError):
+        for i in range(10):
+            batch.add((i,))
+    assert (batch.inserted, batch.committed) == (4, 4)
+    assert conn.rollbacks == 1
+
+
+# -----------------------------
+# Delta fingerprints
+# -----------------------------
+
+def delta_key(spec, values):
+    positions = [i for i, c in enumerate(spec.columns[1:]) if c.name in spec.natural_key]
+    return loader._hash_values([values[i] for i in positions])
+
+
+def test_seeded_fingerprints_match_the_csv_rows():
+    spec = loader.TRANSFERS
+    fieldnames = [c.name for c in spec.columns[1:]]
+    csv_row = ["7", "2020-07-01", "20/21", "1", "2", "A", "B", "1000000", "2000000", "Joe"]
+    values = loader.ColumnarDecoder(spec.columns, fieldnames).decode([csv_row])[0][1:]
+
+    existing = [
+        (5, 7, datetime.date(2020, 7, 1), "20/21", 1, 2, "A", "B", 1000000.0, 2000000.0, "Joe"),
+        # same natural key again: the lowest id keeps it
+        (9, 7, datetime.date(2020, 7, 1), "20/21", 1, 2, "A", "B", 1.0, 2.0, "Joe"),
+        (12, 8, datetime.date(2021, 1, 1), "20/21", 2, 1, "B", "A", None, None, "Ann"),
+    ]
+    cursor = FakeCursor({"Transfers": existing})
+    seeded = loader.seed_fingerprints(cursor, spec, keyed_by_id=False)
+
+    assert seeded[delta_key(spec, values)] == ("5", loader._hash_values(values))
+    assert len(seeded) == 2
+    assert sorted(entry[2] for batch in cursor.batches for entry in batch) == ["12", "5"]
+
+
+def test_seeded_fingerprints_by_id():
+    spec = loader.CLUBS
+    existing = [(11, "ARS", "Arsenal", 25, 24.5, "Emirates", 60000, "http://a")]
+    seeded = loader.seed_fingerprints(FakeCursor({"Clubs": existing}), spec, keyed_by_id=True)
+    assert seeded == {"11": ("11", loader._hash_values(existing[0][1:]))}
+
+
+def test_fingerprint_changes_with_any_value():
+    base = (1, "2020-07-01", None, "x")
+    assert loader._hash_values(base) == loader._hash_values(list(base))
+    assert loader._hash_values(base) != loader._hash_values((1, "2020-07-01", "", "x"))
+    assert loader._hash_values(base) != loader._hash_values((1, "2020-07-02", None, "x"))
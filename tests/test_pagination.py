@@ -0,0 +1,95 @@
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.pagination import Keyset, finish_page, plan_page
+
+# SQLite orders NULLs like MySQL (first in ASC, last in DESC), so the generated
+# seek conditions can be checked against a real ORDER BY
+ROWS = [
+    (1, 10), (2, None), (3, 5), (4, 10), (5, None), (6, 7),
+    (7, 5), (8, None), (9, 12), (10, 7), (11, 10),
+]
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", ROWS)
+    yield conn
+    conn.close()
+
+
+def read(db, keyset, position, page, per_page, total):
+    plan = plan_page(keyset, position, page, per_page, total)
+    where = f"WHERE {plan.seek_sql}" if plan.seek_sql else ""
+    sql = f"SELECT id, value FROM t {where} ORDER BY {plan.order_by} {plan.limit_sql}"
+    rows = [dict(r) for r in db.execute(sql.replace("%s", "?"), plan.seek_params + plan.limit_params)]
+    total_pages = -(-total // per_page)
+    return finish_page(keyset, plan, rows, per_page, total_pages)
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+@pytest.mark.parametrize("per_page", [1, 2, 3, 4, 11, 20])
+def test_next_cursors_walk_the_whole_order(db, direction, per_page):
+    keyset = Keyset("value", direction, "value", "id", "DESC", "id")
+    expected = [r["id"] for r in db.execute(f"SELECT id FROM t ORDER BY {keyset.order_by()}")]
+
+    seen, position, page = [], None, 1
+    while True:
+        rows, prev_token, next_token, _ = read(db, keyset, position, page, per_page, len(ROWS))
+        seen.extend(r["id"] for r in rows)
+        if next_token is None:
+            break
+        position = keyset.decode(next_token)
+        page = position.page
+    assert seen == expected
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+def test_prev_cursor_returns_the_previous_page(db, direction):
+    keyset = Keyset("value", direction, "value", "id", "DESC", "id")
+    per_page = 3
+    first, _, next_token, _ = read(db, keyset, None, 1, per_page, len(ROWS))
+    second, prev_token, _, _ = read(db, keyset, keyset.decode(next_token), 2, per_page, len(ROWS))
+    back, _, _, _ = read(db, keyset, keyset.decode(prev_token), 1, per_page, len(ROWS))
+    assert [r["id"] for r in back] == [r["id"] for r in first]
+    assert not {r["id"] for r in first} & {r["id"] for r in second}
+
+
+def test_last_token_reads_the_last_page(db):
+    keyset = Keyset("value", "DESC", "value", "id", "DESC", "id")
+    expected = [r["id"] for r in db.execute(f"SELECT id FROM t ORDER BY {keyset.order_by()}")]
+    _, _, _, last_token = read(db, keyset, None, 1, 4, len(ROWS))
+    rows, _, next_token, _ = read(db, keyset, keyset.decode(last_token), 1, 4, len(ROWS))
+    assert [r["id"] for r in rows] == expected[8:]
+    assert next_token is None
+
+
+@pytest.mark.parametrize("value", [
+    None, 0, 42, -7, 2.5, "Arsenal", Decimal("12.50"), date(2024, 1, 31), datetime(2024, 1, 31, 20, 45),
+])
+def test_token_round_trip(value):
+    keyset = Keyset("g.date", "DESC", "date", "g.game_id", "DESC", "game_id")
+    position = keyset.decode(keyset.token({"date": value, "game_id": 99}, 3, reverse=True))
+    assert position.page == 3
+    assert position.reverse
+    assert position.has_key
+    assert position.value == value and type(position.value) is type(value)
+    assert position.tiebreak == 99
+
+
+def test_token_of_another_sort_order_is_ignored():
+    by_date = Keyset("g.date", "DESC", "date", "g.game_id", "DESC", "game_id")
+    by_season = Keyset("g.season", "DESC", "season", "g.game_id", "DESC", "game_id")
+    assert by_season.decode(by_date.token({"date": date(2024, 1, 1), "game_id": 1}, 2)) is None
+
+
+@pytest.mark.parametrize("token", ["", None, "not-base64!", "e30", "eyJzIjogMX0"])
+def test_broken_tokens_decode_to_none(token):
+    keyset = Keyset("g.date", "DESC", "date", "g.game_id", "DESC", "game_id")
+    assert keyset.decode(token) is None